@@ -1,15 +1,45 @@
+from typing import List, Optional
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.schemas.statistics_schemas import (
     UserStatisticsEvent,
     CourseStatisticsEvent,
     ExportFilters,
+    ExportFormat,
+    ExportJobRequest,
+    CoursesSummaryRequest,
 )
 from app.services.statistics_service import (
     process_user_event,
     process_course_event,
+    process_user_events_batch,
+    process_course_events_batch,
     get_global_statistics,
     get_course_detailed_statistics,
     get_user_detailed_statistics,
+    global_statistics_etag,
+    course_statistics_etag,
+    user_statistics_etag,
+    get_course_trends,
+    get_user_trends,
+    course_trends_etag,
+    user_trends_etag,
+    get_grade_distribution,
+    grade_distribution_etag,
+    get_courses_summary,
+    get_assessment_breakdown,
+    assessment_breakdown_etag,
+    get_course_ranking_statistics,
+    course_ranking_etag,
+)
+from app.services.export_jobs_service import (
+    create_export_job,
+    get_export_job,
+    get_export_job_file,
+    export_job_status,
+)
+from app.services.export_service import (
+    export_statistics,
     export_statistics_to_excel,
 )
 
@@ -22,23 +52,217 @@ async def handle_save_course_statistics(db: Session, event: CourseStatisticsEven
     return await process_course_event(db, event)
 
 
+async def handle_save_user_statistics_batch(
+    db: Session, events: List[UserStatisticsEvent]
+):
+    return await process_user_events_batch(db, events)
+
+
+async def handle_save_course_statistics_batch(
+    db: Session, events: List[CourseStatisticsEvent]
+):
+    return await process_course_events_batch(db, events)
+
+
+def handle_get_global_statistics_etag():
+    return global_statistics_etag()
+
+
+def handle_get_course_statistics_etag(
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: int = settings.LOGS_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    include_logs: bool = True,
+):
+    return course_statistics_etag(
+        course_id, start_date, end_date, limit, cursor, include_logs
+    )
+
+
+def handle_get_user_statistics_etag(
+    user_id: int,
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: int = settings.LOGS_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    include_logs: bool = True,
+):
+    return user_statistics_etag(
+        user_id, course_id, start_date, end_date, limit, cursor, include_logs
+    )
+
+
 async def handle_get_global_statistics(db: Session):
     return await get_global_statistics(db)
 
 
 async def handle_get_course_detailed_statistics(
-    db: Session, course_id: str, start_date=None, end_date=None
+    db: Session,
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: int = settings.LOGS_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    include_logs: bool = True,
 ):
-    return await get_course_detailed_statistics(db, course_id, start_date, end_date)
+    return await get_course_detailed_statistics(
+        db, course_id, start_date, end_date, limit, cursor, include_logs
+    )
 
 
 async def handle_get_user_detailed_statistics(
-    db: Session, user_id: int, course_id: str, start_date=None, end_date=None
+    db: Session,
+    user_id: int,
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: int = settings.LOGS_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    include_logs: bool = True,
 ):
     return await get_user_detailed_statistics(
-        db, user_id, course_id, start_date, end_date
+        db, user_id, course_id, start_date, end_date, limit, cursor, include_logs
+    )
+
+
+def handle_get_course_trends_etag(
+    course_id: str, granularity: str = "day", start_date=None, end_date=None
+):
+    return course_trends_etag(course_id, granularity, start_date, end_date)
+
+
+async def handle_get_course_trends(
+    db: Session,
+    course_id: str,
+    granularity: str = "day",
+    start_date=None,
+    end_date=None,
+):
+    return await get_course_trends(db, course_id, granularity, start_date, end_date)
+
+
+def handle_get_user_trends_etag(
+    user_id: int,
+    course_id: str,
+    granularity: str = "day",
+    start_date=None,
+    end_date=None,
+):
+    return user_trends_etag(user_id, course_id, granularity, start_date, end_date)
+
+
+async def handle_get_user_trends(
+    db: Session,
+    user_id: int,
+    course_id: str,
+    granularity: str = "day",
+    start_date=None,
+    end_date=None,
+):
+    return await get_user_trends(
+        db, user_id, course_id, granularity, start_date, end_date
+    )
+
+
+def handle_get_grade_distribution_etag(
+    course_id: str,
+    assessment_id: Optional[str] = None,
+    bin_width: float = 1.0,
+    start_date=None,
+    end_date=None,
+):
+    return grade_distribution_etag(
+        course_id, assessment_id, bin_width, start_date, end_date
+    )
+
+
+async def handle_get_grade_distribution(
+    db: Session,
+    course_id: str,
+    assessment_id: Optional[str] = None,
+    bin_width: float = 1.0,
+    start_date=None,
+    end_date=None,
+):
+    return await get_grade_distribution(
+        db, course_id, assessment_id, bin_width, start_date, end_date
+    )
+
+
+def handle_get_assessment_breakdown_etag(
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+):
+    return assessment_breakdown_etag(course_id, start_date, end_date, limit, cursor)
+
+
+async def handle_get_assessment_breakdown(
+    db: Session,
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+):
+    return await get_assessment_breakdown(
+        db, course_id, start_date, end_date, limit, cursor
+    )
+
+
+def handle_get_course_ranking_etag(
+    course_id: str,
+    order: str = "promedio",
+    start_date=None,
+    end_date=None,
+    limit: int = settings.LOGS_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+):
+    return course_ranking_etag(course_id, order, start_date, end_date, limit, cursor)
+
+
+async def handle_get_course_ranking(
+    db: Session,
+    course_id: str,
+    order: str = "promedio",
+    start_date=None,
+    end_date=None,
+    limit: int = settings.LOGS_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+):
+    return await get_course_ranking_statistics(
+        db, course_id, order, start_date, end_date, limit, cursor
+    )
+
+
+async def handle_get_courses_summary(db: Session, request: CoursesSummaryRequest):
+    return await get_courses_summary(
+        db, request.course_ids, request.start_date, request.end_date
     )
 
 
 async def handle_export_statistics_to_excel(db: Session, filters: ExportFilters):
     return await export_statistics_to_excel(db, filters)
+
+
+async def handle_export_statistics(
+    db: Session, filters: ExportFilters, export_format: ExportFormat
+):
+    return await export_statistics(db, filters, export_format)
+
+
+def handle_create_export_job(request: ExportJobRequest):
+    return export_job_status(create_export_job(request))
+
+
+def handle_get_export_job(job_id: str):
+    return export_job_status(get_export_job(job_id))
+
+
+def handle_get_export_job_file(job_id: str):
+    return get_export_job_file(job_id)
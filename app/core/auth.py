@@ -5,6 +5,7 @@ from typing import Optional
 from functools import lru_cache
 from dotenv import load_dotenv
 from app.core.config import settings
+from app.core.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -12,8 +13,9 @@ load_dotenv()
 
 
 class ServiceAuth:
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.base_url = settings.AUTH_SERVICE_URL
+        self.client = client
         self.access_token: Optional[str] = None
         self.service_username = os.getenv("SERVICE_USERNAME")
         self.service_password = os.getenv("SERVICE_PASSWORD")
@@ -30,36 +32,37 @@ class ServiceAuth:
             await self.login()
 
     async def login(self) -> Optional[str]:
+        client = self.client or get_http_client()
+
         try:
-            async with httpx.AsyncClient() as client:
-                logger.info("Intentando autenticar servicio...")
-                logger.debug(f"URL: {self.base_url}/api/v1/token/service")
-                logger.debug(f"Username: {self.service_username}")
+            logger.info("Intentando autenticar servicio...")
+            logger.debug(f"URL: {self.base_url}/api/v1/token/service")
+            logger.debug(f"Username: {self.service_username}")
 
-                response = await client.post(
-                    f"{self.base_url}/api/v1/token/service",
-                    data={
-                        "username": self.service_username,
-                        "password": self.service_password,
-                    },
-                    headers={"Content-Type": "application/x-www-form-urlencoded"},
-                )
+            response = await client.post(
+                f"{self.base_url}/api/v1/token/service",
+                data={
+                    "username": self.service_username,
+                    "password": self.service_password,
+                },
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+            )
 
-                logger.debug(
-                    f"Respuesta del servicio: Status={response.status_code}, Body={response.text}"
-                )
+            logger.debug(
+                f"Respuesta del servicio: Status={response.status_code}, Body={response.text}"
+            )
 
-                if response.status_code == 200:
-                    self.access_token = response.json()["access_token"]
-                    logger.info("Servicio autenticado exitosamente")
-                    return self.access_token
-                else:
-                    logger.error(
-                        f"Error en la autenticación del servicio. Status: {response.status_code}"
-                    )
-                    logger.error(f"URL: {self.base_url}/token/service")
-                    logger.error(f"Detalle del error: {response.text}")
-                    return None
+            if response.status_code == 200:
+                self.access_token = response.json()["access_token"]
+                logger.info("Servicio autenticado exitosamente")
+                return self.access_token
+            else:
+                logger.error(
+                    f"Error en la autenticación del servicio. Status: {response.status_code}"
+                )
+                logger.error(f"URL: {self.base_url}/token/service")
+                logger.error(f"Detalle del error: {response.text}")
+                return None
 
         except Exception as e:
             logger.error(f"Error al intentar autenticar el servicio: {str(e)}")
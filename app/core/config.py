@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Optional
 import logging
 
 # Configurar logging
@@ -26,12 +27,95 @@ class Settings(BaseSettings):
     def DATABASE_URL(self) -> str:
         return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}?sslmode={self.PGSSLMODE}"
 
+    # Replica de solo lectura para los GET de estadisticas y los exports. Sin
+    # host, las lecturas usan la base principal. Con un atraso maximo > 0, las
+    # lecturas vuelven a la principal mientras la replica lo supere
+    DB_REPLICA_HOST: Optional[str] = None
+    DB_REPLICA_PORT: Optional[int] = None
+    DB_REPLICA_MAX_LAG_SECONDS: float = 0.0
+    DB_REPLICA_LAG_CHECK_SECONDS: float = 5.0
+
+    @property
+    def REPLICA_DATABASE_URL(self) -> Optional[str]:
+        if not self.DB_REPLICA_HOST:
+            return None
+        port = self.DB_REPLICA_PORT or self.DB_PORT
+        return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_REPLICA_HOST}:{port}/{self.DB_NAME}?sslmode={self.PGSSLMODE}"
+
     AUTH_SERVICE_URL: str
     COURSES_SERVICE_URL: str
 
     SERVICE_USERNAME: str
     SERVICE_PASSWORD: str
 
+    # Cliente HTTP compartido para los servicios de auth y cursos
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_TIMEOUT: float = 10.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+
+    # Cache de validacion de tokens (TTL <= 0 la desactiva)
+    AUTH_CACHE_TTL_SECONDS: float = 60.0
+    AUTH_CACHE_MAX_SIZE: int = 1024
+
+    # Cache de alumnos inscriptos por curso (TTL <= 0 la desactiva)
+    COURSE_ROSTER_CACHE_TTL_SECONDS: float = 30.0
+    COURSE_ROSTER_CACHE_MAX_SIZE: int = 256
+
+    # Cache de respuestas de los GET de estadisticas (TTL <= 0 la desactiva)
+    RESPONSE_CACHE_TTL_SECONDS: float = 300.0
+    RESPONSE_CACHE_MAX_SIZE: int = 1024
+    # Alcances (global, curso, usuario en un curso) con version registrada
+    RESPONSE_CACHE_MAX_SCOPES: int = 100000
+
+    EVENTS_BATCH_MAX_SIZE: int = 1000
+
+    # Cursos por consulta del resumen de varios cursos
+    COURSES_SUMMARY_MAX_SIZE: int = 1000
+
+    # Paginacion de los logs en los endpoints de detalle
+    LOGS_DEFAULT_LIMIT: int = 100
+    LOGS_MAX_LIMIT: int = 1000
+
+    # Particionado mensual de statistics por fecha (solo PostgreSQL). Se
+    # aplica al crear la tabla; una tabla existente se migra con
+    # scripts/partition_statistics.py
+    STATISTICS_PARTITIONING: bool = False
+    STATISTICS_PARTITION_MONTHS_AHEAD: int = 3
+    STATISTICS_PARTITION_CHECK_SECONDS: float = 86400.0
+
+    # Retencion: meses completos que se conservan antes de archivar la
+    # particion en STATISTICS_ARCHIVE_DIR (0 no archiva)
+    STATISTICS_RETENTION_MONTHS: int = 24
+    STATISTICS_ARCHIVE_DIR: str = "archive"
+
+    # Ancho de los tramos del histograma de calificaciones. Cambiarlo requiere
+    # recalcular los rollups
+    GRADE_HISTOGRAM_BUCKET_WIDTH: float = 0.1
+
+    # Tramos como maximo en el histograma de la distribucion de notas
+    DISTRIBUTION_MAX_BINS: int = 1000
+
+    # Hilos para las operaciones sincronicas de base de datos
+    DB_THREADPOOL_SIZE: int = 15
+
+    # Pool de conexiones de cada base (principal y replica). DB_POOL_SIZE +
+    # DB_MAX_OVERFLOW deberia cubrir DB_THREADPOOL_SIZE. Recycle < 0 no recicla
+    # y un statement timeout de 0 no limita las sentencias
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+
+    # Trabajos de exportacion en segundo plano
+    EXPORT_JOBS_WORKERS: int = 2
+    EXPORT_JOBS_SPOOL_DIR: str = "/tmp/statistics-exports"
+    EXPORT_JOBS_TTL_SECONDS: float = 3600.0
+    EXPORT_JOBS_PURGE_SECONDS: float = 60.0
+
 
 try:
     settings = Settings()
@@ -0,0 +1,43 @@
+import httpx
+import logging
+from typing import Optional
+from app.core.config import settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Crea el cliente HTTP compartido, con pool de conexiones keep-alive.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT
+        ),
+    )
+
+
+def init_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = create_http_client()
+        logging.info("Cliente HTTP compartido inicializado")
+    return _client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    # Se crea bajo demanda si la aplicacion no pasó por el lifespan (scripts, tests)
+    return init_http_client()
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logging.info("Cliente HTTP compartido cerrado")
@@ -0,0 +1,28 @@
+from sqlalchemy import Date, cast, func
+from sqlalchemy.orm import Session
+from datetime import date
+
+
+def date_bucket(db: Session, column, granularity: str):
+    """
+    Devuelve una expresion con el primer dia del periodo (day, week o month)
+    de la fecha de column, en el dialecto de la conexion. Las semanas empiezan
+    el lunes.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return cast(func.date_trunc(granularity, column), Date)
+    if dialect == "sqlite":
+        modifiers = {
+            "day": (),
+            # weekday 0 avanza al domingo; -6 days vuelve al lunes de esa semana
+            "week": ("weekday 0", "-6 days"),
+            "month": ("start of month",),
+        }[granularity]
+        return func.date(column, *modifiers)
+    raise NotImplementedError(f"Dialecto no soportado para agrupar fechas: {dialect}")
+
+
+def bucket_start(value) -> date:
+    # sqlite devuelve las fechas como texto ISO
+    return date.fromisoformat(value) if isinstance(value, str) else value
@@ -1,12 +1,15 @@
 from app.db.session import SessionLocal
-from fastapi import HTTPException
+from app.db.replica import reader_session
+from app.services.statistics_cache import statistics_written_at
+from fastapi import HTTPException, Request
+from functools import partial
 import logging
 
 
-def get_db():
+def _session_dependency(session_factory):
     db = None
     try:
-        db = SessionLocal()
+        db = session_factory()
         yield db
     except HTTPException:
         raise
@@ -21,3 +24,33 @@ def get_db():
                 db.close()
             except Exception as e:
                 logging.error(f"Error al cerrar conexión DB: {str(e)}")
+
+
+def get_db():
+    """Sesion en la base principal, para las escrituras."""
+    yield from _session_dependency(SessionLocal)
+
+
+def get_reader_db():
+    """
+    Sesion para las consultas de solo lectura: la replica si esta configurada
+    y al dia, o la base principal.
+    """
+    yield from _session_dependency(reader_session)
+
+
+def get_statistics_reader_db(request: Request):
+    """
+    Sesion para las consultas de estadisticas cacheadas. Como get_reader_db,
+    pero el alcance de la ruta (course_id y user_id) se lee de la principal
+    hasta que la replica aplique su ultima escritura: si no, la respuesta
+    vieja quedaria cacheada bajo la version nueva y su ETag.
+    """
+    course_id = request.path_params.get("course_id")
+    user_id = request.path_params.get("user_id")
+    # Un user_id invalido lo rechaza la validacion de la ruta
+    if user_id is not None and user_id.lstrip("-").isdigit():
+        written_at = statistics_written_at(course_id, int(user_id))
+    else:
+        written_at = statistics_written_at(course_id)
+    yield from _session_dependency(partial(reader_session, written_at))
@@ -0,0 +1,37 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional, TypeVar
+from app.core.config import settings
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.DB_THREADPOOL_SIZE, thread_name_prefix="db"
+        )
+    return _executor
+
+
+def shutdown_db_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def run_db(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Ejecuta una operacion sincronica de base de datos en el pool de hilos
+    acotado, sin bloquear el event loop.
+
+    La sesion se sigue usando de a una operacion por vez, solo cambia el
+    hilo que la ejecuta.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), partial(func, *args, **kwargs))
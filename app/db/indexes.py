@@ -0,0 +1,35 @@
+from sqlalchemy import inspect
+from app.models.statistics_model import Statistics
+from typing import List
+
+# Indice unico sobre la clave natural de statistics, del que dependen los
+# INSERT ... ON CONFLICT de los eventos de curso
+STATISTICS_UNIQUE_INDEX = "ux_statistics_user_assessment_tipo"
+
+
+def missing_statistics_indexes(bind) -> List:
+    """
+    Indices declarados en el modelo de statistics que todavia no existen.
+
+    create_all no agrega indices nuevos a tablas ya creadas; los crea
+    scripts/create_statistics_indexes.py.
+    """
+    existing = {
+        index["name"] for index in inspect(bind).get_indexes(Statistics.__tablename__)
+    }
+    return [
+        index for index in Statistics.__table__.indexes if index.name not in existing
+    ]
+
+
+def check_statistics_unique_index(bind) -> None:
+    """
+    Falla si la tabla no particionada no tiene el indice unico: sin el, los
+    eventos de curso fallan en el ON CONFLICT.
+    """
+    missing = {index.name for index in missing_statistics_indexes(bind)}
+    if STATISTICS_UNIQUE_INDEX in missing:
+        raise RuntimeError(
+            f"Falta el indice unico {STATISTICS_UNIQUE_INDEX} de statistics; "
+            "crearlo con scripts/create_statistics_indexes.py"
+        )
@@ -0,0 +1,124 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from app.core.config import settings
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+import asyncio
+import logging
+import re
+import traceback
+
+PARENT_TABLE = "statistics"
+DEFAULT_PARTITION = "statistics_default"
+_PARTITION_NAME = re.compile(r"^statistics_p(\d{4})_(\d{2})$")
+
+
+def month_start(value: date, offset: int = 0) -> date:
+    """Primer dia del mes de value, desplazado offset meses."""
+    months = value.year * 12 + value.month - 1 + offset
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"statistics_p{month.year:04d}_{month.month:02d}"
+
+
+def partition_bounds(name: str) -> Optional[Tuple[date, date]]:
+    """
+    Rango [desde, hasta) de una particion mensual a partir de su nombre, o
+    None si no es una particion mensual.
+    """
+    match = _PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    start = date(int(match.group(1)), int(match.group(2)), 1)
+    return start, month_start(start, 1)
+
+
+def partitioning_enabled(bind) -> bool:
+    return settings.STATISTICS_PARTITIONING and bind.dialect.name == "postgresql"
+
+
+def list_partitions(conn: Connection) -> List[str]:
+    rows = conn.execute(
+        text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :parent
+            ORDER BY child.relname
+            """),
+        {"parent": PARENT_TABLE},
+    )
+    return [row[0] for row in rows]
+
+
+def create_month_partition(conn: Connection, month: date) -> None:
+    start, end = month_start(month), month_start(month, 1)
+    conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(start)} "
+            f"PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    )
+
+
+def create_upcoming_partitions(conn: Connection, today: date) -> None:
+    """
+    Crea las particiones mensuales del mes de today y de los
+    STATISTICS_PARTITION_MONTHS_AHEAD siguientes, y la particion por defecto
+    para las fechas fuera de rango.
+    """
+    for offset in range(settings.STATISTICS_PARTITION_MONTHS_AHEAD + 1):
+        create_month_partition(conn, month_start(today, offset))
+    conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} "
+            f"PARTITION OF {PARENT_TABLE} DEFAULT"
+        )
+    )
+
+
+def ensure_statistics_partitions(engine: Engine, today: Optional[date] = None) -> None:
+    """
+    Crea las particiones que faltan para el mes actual y los siguientes. No
+    hace nada si la tabla no esta particionada.
+    """
+    if not partitioning_enabled(engine):
+        return
+
+    with engine.begin() as conn:
+        create_upcoming_partitions(conn, today or datetime.utcnow().date())
+
+
+def expired_partitions(
+    partitions: List[str], today: date, retention_months: int
+) -> List[str]:
+    """
+    Particiones mensuales que terminan antes de los retention_months meses
+    completos que se conservan.
+    """
+    if retention_months <= 0:
+        return []
+    cutoff = month_start(today, -retention_months)
+    return [
+        name
+        for name in partitions
+        if (bounds := partition_bounds(name)) is not None and bounds[1] <= cutoff
+    ]
+
+
+async def partition_maintenance_loop(engine: Engine) -> None:
+    """
+    Crea periodicamente las particiones de los meses siguientes, para que
+    nunca falte la del mes en curso.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(ensure_statistics_partitions, engine)
+        except Exception as e:
+            logging.error(f"Error al crear las particiones de statistics: {str(e)}")
+            logging.error(traceback.format_exc())
+        await asyncio.sleep(settings.STATISTICS_PARTITION_CHECK_SECONDS)
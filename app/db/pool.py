@@ -0,0 +1,92 @@
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from app.core.config import settings
+import threading
+import time
+
+
+class MonitoredQueuePool(QueuePool):
+    """
+    QueuePool que mide cuanto esperan los pedidos de conexion (incluido el
+    pre-ping) y cuantos agotan DB_POOL_TIMEOUT.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.reset_wait_stats()
+
+    def reset_wait_stats(self) -> None:
+        with self._stats_lock:
+            self._checkouts = 0
+            self._timeouts = 0
+            self._wait_total = 0.0
+            self._wait_max = 0.0
+
+    def connect(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self._checkouts += 1
+                self._timeouts += 1 if timed_out else 0
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+
+    def wait_stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "pedidos": self._checkouts,
+                "timeouts": self._timeouts,
+                "espera_promedio_ms": round(
+                    self._wait_total / self._checkouts * 1000 if self._checkouts else 0,
+                    3,
+                ),
+                "espera_maxima_ms": round(self._wait_max * 1000, 3),
+            }
+
+
+def engine_options(statement_timeout: bool = True) -> dict:
+    """
+    Opciones de create_engine para el pool y los timeouts configurados en
+    Settings. Con statement_timeout=False no se limita la duracion de las
+    sentencias.
+    """
+    options = {
+        "poolclass": MonitoredQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if statement_timeout and settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        # Lo aplica el servidor a cada sentencia de las conexiones del pool
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+        }
+    return options
+
+
+def pool_stats(engine: Engine) -> dict:
+    """Estado actual del pool de conexiones de engine."""
+    pool = engine.pool
+    stats = {
+        "tamano": pool.size(),
+        "en_uso": pool.checkedout(),
+        "disponibles": pool.checkedin(),
+        # Conexiones abiertas por encima del tamano (negativo mientras el pool
+        # no se lleno)
+        "overflow": pool.overflow(),
+    }
+    if isinstance(pool, MonitoredQueuePool):
+        stats["max_overflow"] = pool._max_overflow
+        stats.update(pool.wait_stats())
+    return stats
@@ -0,0 +1,96 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db import session as db_session
+from typing import Optional
+import logging
+import threading
+import time
+
+# Atraso de una replica: cero si ya aplico todo lo que recibio, o el tiempo
+# desde la ultima transaccion aplicada
+_REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """)
+
+_lag_lock = threading.Lock()
+_lag_checked_at = 0.0
+# Ultimo atraso medido, o None si la replica no respondio
+_replica_lag: Optional[float] = None
+# Hora (time.time) hasta la que la replica ya aplico las escrituras de la
+# principal, segun la ultima medicion
+_replayed_until = 0.0
+
+
+def _measure_replica_lag(engine) -> Optional[float]:
+    try:
+        with engine.connect() as conn:
+            lag = conn.execute(_REPLICA_LAG_QUERY).scalar()
+    except Exception as e:
+        logging.warning(f"No se pudo consultar el atraso de la replica: {str(e)}")
+        return None
+    return None if lag is None else float(lag)
+
+
+def _refresh_replica_lag(engine) -> None:
+    # Se consulta a lo sumo cada DB_REPLICA_LAG_CHECK_SECONDS
+    global _lag_checked_at, _replica_lag, _replayed_until
+    with _lag_lock:
+        now = time.monotonic()
+        if now - _lag_checked_at < settings.DB_REPLICA_LAG_CHECK_SECONDS:
+            return
+        measured_at = time.time()
+        _replica_lag = _measure_replica_lag(engine)
+        _lag_checked_at = now
+        if _replica_lag is None:
+            return
+        _replayed_until = max(_replayed_until, measured_at - _replica_lag)
+        if 0 < settings.DB_REPLICA_MAX_LAG_SECONDS < _replica_lag:
+            logging.warning(
+                f"Replica atrasada ({_replica_lag} s), las lecturas usan la base principal"
+            )
+
+
+def replica_is_fresh(engine) -> bool:
+    """
+    Indica si la replica esta dentro de DB_REPLICA_MAX_LAG_SECONDS. Sin limite
+    configurado la replica siempre se considera al dia.
+    """
+    if settings.DB_REPLICA_MAX_LAG_SECONDS <= 0:
+        return True
+
+    _refresh_replica_lag(engine)
+    return (
+        _replica_lag is not None and _replica_lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+    )
+
+
+def replica_has_replayed(engine, written_at: float) -> bool:
+    """
+    Indica si la replica ya aplico las escrituras hechas en la principal hasta
+    written_at (time.time). Mientras no se confirme con una medicion del
+    atraso posterior, la lectura debe ir a la principal.
+    """
+    if written_at <= _replayed_until:
+        return True
+    _refresh_replica_lag(engine)
+    return written_at <= _replayed_until
+
+
+def reader_session(written_at: float = 0.0) -> Session:
+    """
+    Abre una sesion para consultas de solo lectura: en la replica si hay una
+    configurada, al dia y con las escrituras hasta written_at ya aplicadas, o
+    en la base principal.
+    """
+    engine = db_session.replica_engine
+    if (
+        db_session.ReplicaSessionLocal is not None
+        and replica_is_fresh(engine)
+        and replica_has_replayed(engine, written_at)
+    ):
+        return db_session.ReplicaSessionLocal()
+    return db_session.SessionLocal()
@@ -1,7 +1,32 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.pool import engine_options
 
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL, **engine_options())
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def create_script_engine():
+    """
+    Engine para los scripts de mantenimiento, sin DB_STATEMENT_TIMEOUT_MS: sus
+    migraciones, copias y VACUUM duran mucho mas que una consulta de la API.
+    """
+    return create_engine(
+        settings.DATABASE_URL, **engine_options(statement_timeout=False)
+    )
+
+
+# Replica para las lecturas analiticas; None si no hay una configurada
+replica_engine = (
+    create_engine(settings.REPLICA_DATABASE_URL, **engine_options())
+    if settings.REPLICA_DATABASE_URL
+    else None
+)
+
+ReplicaSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    if replica_engine is not None
+    else None
+)
@@ -1,12 +1,23 @@
 from fastapi import FastAPI, HTTPException, Request
 from app.routes.statistics_routes import router as statistics_router
 from app.db.base import Base
-from app.db.session import engine
+from app.db.indexes import check_statistics_unique_index
+from app.db.session import engine, replica_engine
+from app.db.pool import pool_stats
+from app.db.executor import shutdown_db_executor
+from app.db.partitioning import partition_maintenance_loop, partitioning_enabled
+from app.services.export_jobs_service import (
+    clear_spool_dir,
+    purge_expired_jobs_loop,
+    shutdown_export_jobs,
+)
+import asyncio
 import logging
 import traceback
 from contextlib import asynccontextmanager
 from app.core.auth import get_service_auth
 from app.core.config import settings
+from app.core.http_client import init_http_client, close_http_client
 from app.utils.problem_details import problem_detail_response
 
 
@@ -16,6 +27,10 @@ logging.getLogger("httpcore").setLevel(logging.INFO)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Inicializa los servicios necesarios al arrancar la aplicación"""
+    init_http_client()
+    partition_task = None
+    purge_task = None
+
     if settings.ENVIRONMENT != "test":
         try:
             service_auth = get_service_auth()
@@ -31,8 +46,30 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logging.error(f"Error al crear tablas en la base de datos: {str(e)}")
             logging.error(traceback.format_exc())
+        else:
+            # Sin el indice unico los eventos de curso fallan: no arrancar
+            check_statistics_unique_index(engine)
+
+        if partitioning_enabled(engine):
+            # Crea las particiones de los proximos meses y las mantiene al dia
+            partition_task = asyncio.create_task(partition_maintenance_loop(engine))
+
+        try:
+            clear_spool_dir()
+        except Exception as e:
+            logging.error(f"Error al limpiar las exportaciones anteriores: {str(e)}")
+        # Vence los trabajos de exportacion aunque no haya pedidos
+        purge_task = asyncio.create_task(purge_expired_jobs_loop())
     yield
 
+    if partition_task is not None:
+        partition_task.cancel()
+    if purge_task is not None:
+        purge_task.cancel()
+    shutdown_export_jobs()
+    await close_http_client()
+    shutdown_db_executor()
+
 
 app = FastAPI(lifespan=lifespan)
 
@@ -79,3 +116,12 @@ app.include_router(statistics_router)
 @app.get("/health")
 def get_health():
     return {"status": "ok"}
+
+
+@app.get("/health/db-pool")
+def get_db_pool_health():
+    """Estado de los pools de conexiones, para monitoreo."""
+    return {
+        "principal": pool_stats(engine),
+        "replica": pool_stats(replica_engine) if replica_engine is not None else None,
+    }
@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, SmallInteger, String
+from sqlalchemy.types import TypeDecorator
+from app.db.base import Base
+
+# Tipos de tarea/examen, en el orden de sus codigos: el orden de los codigos
+# coincide con el alfabetico
+ASSESSMENT_TYPES = ("Examen", "Tarea")
+_ASSESSMENT_TYPE_CODES = {tipo: code for code, tipo in enumerate(ASSESSMENT_TYPES)}
+
+
+class AssessmentType(TypeDecorator):
+    """
+    Guarda el tipo de una estadistica ("Examen" o "Tarea") como un entero
+    chico y lo devuelve como texto.
+    """
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else _ASSESSMENT_TYPE_CODES[value]
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else ASSESSMENT_TYPES[value]
+
+
+class StatisticsCourse(Base):
+    """
+    Diccionario de los course_id: statistics guarda la clave entera en lugar
+    del texto.
+    """
+
+    __tablename__ = "statistics_course"
+
+    id = Column(Integer, primary_key=True)
+    course_id = Column(String, nullable=False, unique=True)
+
+
+class StatisticsAssessment(Base):
+    """
+    Diccionario de los assessment_id: statistics guarda la clave entera en
+    lugar del texto.
+    """
+
+    __tablename__ = "statistics_assessment"
+
+    id = Column(Integer, primary_key=True)
+    assessment_id = Column(String, nullable=False, unique=True)
@@ -1,17 +1,77 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Boolean,
+    Float,
+    DateTime,
+    ForeignKey,
+    Index,
+    text,
+)
 from app.db.base import Base
+from app.core.config import settings
+from app.models.statistics_dictionary_model import AssessmentType
 from datetime import datetime
 
+# Con particionado, PostgreSQL exige que la clave primaria y los indices unicos
+# incluyan la fecha, que es la clave de particion
+_PARTITIONED = settings.STATISTICS_PARTITIONING
+
 
 class Statistics(Base):
     __tablename__ = "statistics"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_id = Column(Integer, nullable=False)
-    course_id = Column(String, nullable=False)
+    # course_id y assessment_id se guardan como claves de sus diccionarios;
+    # el repositorio traduce los textos
+    course_key = Column(Integer, ForeignKey("statistics_course.id"), nullable=False)
     titulo = Column(String, nullable=False)
-    tipo = Column(String, nullable=False)  # "Examen" o "Tarea"
+    tipo = Column(AssessmentType, nullable=False)  # "Examen" o "Tarea"
     entregado = Column(Boolean, default=False)
     calificacion = Column(Float, nullable=True)
-    assessment_id = Column(String, nullable=False)
-    date = Column(DateTime, default=datetime.utcnow, nullable=False)
+    assessment_key = Column(
+        Integer, ForeignKey("statistics_assessment.id"), nullable=False
+    )
+    date = Column(
+        DateTime, default=datetime.utcnow, nullable=False, primary_key=_PARTITIONED
+    )
+
+    __table_args__ = (
+        # Clave natural de la estadistica: un registro por usuario y tarea/examen.
+        # Particionada no puede ser unica; la unicidad la asegura el repositorio
+        Index(
+            (
+                "ix_statistics_user_assessment_tipo"
+                if _PARTITIONED
+                else "ux_statistics_user_assessment_tipo"
+            ),
+            "user_id",
+            "assessment_key",
+            "tipo",
+            unique=not _PARTITIONED,
+        ),
+        # Logs y agregados por curso, ordenados por fecha
+        Index("ix_statistics_course_date", "course_key", "date", "id"),
+        # Logs y agregados de un usuario (en un curso), ordenados por fecha
+        Index("ix_statistics_user_course_date", "user_id", "course_key", "date", "id"),
+        # Desglose por tarea/examen de un curso, sin leer la tabla
+        Index(
+            "ix_statistics_course_assessment",
+            "course_key",
+            "assessment_key",
+            "tipo",
+            postgresql_include=["titulo", "entregado", "calificacion"],
+        ),
+        # Promedios: solo las filas calificadas, con la nota incluida en el indice
+        Index(
+            "ix_statistics_course_date_graded",
+            "course_key",
+            "date",
+            postgresql_include=["calificacion"],
+            postgresql_where=text("calificacion IS NOT NULL"),
+            sqlite_where=text("calificacion IS NOT NULL"),
+        ),
+        {"postgresql_partition_by": "RANGE (date)"} if _PARTITIONED else {},
+    )
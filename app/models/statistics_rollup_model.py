@@ -0,0 +1,57 @@
+from sqlalchemy import Column, Integer, String, Float, Date
+from app.db.base import Base
+
+
+class RollupCountersMixin:
+    """
+    Contadores acumulados de las estadisticas de un agrupamiento. El promedio
+    de calificaciones es grade_sum / graded.
+    """
+
+    total = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    graded = Column(Integer, nullable=False, default=0)
+    grade_sum = Column(Float, nullable=False, default=0.0)
+
+
+class GlobalStatisticsRollup(RollupCountersMixin, Base):
+    __tablename__ = "statistics_rollup_global"
+
+    # Una unica fila, con id = 1
+    id = Column(Integer, primary_key=True, autoincrement=False)
+
+
+class CourseStatisticsRollup(RollupCountersMixin, Base):
+    __tablename__ = "statistics_rollup_course"
+
+    course_id = Column(String, primary_key=True)
+
+
+class UserCourseStatisticsRollup(RollupCountersMixin, Base):
+    __tablename__ = "statistics_rollup_user_course"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    course_id = Column(String, primary_key=True)
+
+
+class CourseDayStatisticsRollup(RollupCountersMixin, Base):
+    __tablename__ = "statistics_rollup_course_day"
+
+    course_id = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+
+
+class GradeHistogramRollup(Base):
+    """
+    Cantidad de calificaciones por tramo de GRADE_HISTOGRAM_BUCKET_WIDTH, por
+    curso y tarea/examen. Es un histograma fino del que se derivan los
+    percentiles y los histogramas de tramos mas anchos.
+    """
+
+    __tablename__ = "statistics_rollup_grade_histogram"
+
+    course_id = Column(String, primary_key=True)
+    assessment_id = Column(String, primary_key=True)
+    # Tramo [bucket * ancho, (bucket + 1) * ancho)
+    bucket = Column(Integer, primary_key=True, autoincrement=False)
+    count = Column(Integer, nullable=False, default=0)
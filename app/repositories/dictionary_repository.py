@@ -0,0 +1,79 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from app.db.upsert import dialect_insert
+from app.models.statistics_dictionary_model import (
+    StatisticsAssessment,
+    StatisticsCourse,
+)
+from app.models.statistics_model import Statistics
+from typing import Dict, Iterable, Tuple
+
+
+def course_key_subquery(course_id: str):
+    """
+    Subconsulta con la clave del course_id, para filtrar statistics sin un
+    viaje extra a la base. No coincide con ninguna fila si el curso no existe.
+    """
+    return (
+        select(StatisticsCourse.id)
+        .where(StatisticsCourse.course_id == course_id)
+        .scalar_subquery()
+    )
+
+
+def assessment_key_subquery(assessment_id: str):
+    """Subconsulta con la clave del assessment_id, como course_key_subquery."""
+    return (
+        select(StatisticsAssessment.id)
+        .where(StatisticsAssessment.assessment_id == assessment_id)
+        .scalar_subquery()
+    )
+
+
+def join_dictionaries(query):
+    """
+    Agrega a una consulta sobre statistics los diccionarios, para leer
+    StatisticsCourse.course_id y StatisticsAssessment.assessment_id.
+    """
+    return (
+        query.select_from(Statistics)
+        .join(StatisticsCourse, StatisticsCourse.id == Statistics.course_key)
+        .join(
+            StatisticsAssessment, StatisticsAssessment.id == Statistics.assessment_key
+        )
+    )
+
+
+def _get_or_create_keys(db: Session, column, values: Iterable[str]) -> Dict[str, int]:
+    model = column.class_
+    values = sorted(set(values))
+    # Orden estable para no generar deadlocks entre escrituras concurrentes
+    db.execute(
+        dialect_insert(db, model).on_conflict_do_nothing(index_elements=[column.key]),
+        [{column.key: value} for value in values],
+    )
+    return dict(db.query(column, model.id).filter(column.in_(values)).all())
+
+
+def get_or_create_course_keys(db: Session, course_ids: Iterable[str]) -> Dict[str, int]:
+    """
+    Devuelve la clave de cada course_id, registrando los nuevos. No hace
+    commit: se aplica en la misma transaccion que la escritura.
+    """
+    return _get_or_create_keys(db, StatisticsCourse.course_id, course_ids)
+
+
+def get_or_create_assessment_keys(
+    db: Session, assessment_ids: Iterable[str]
+) -> Dict[str, int]:
+    """Devuelve la clave de cada assessment_id, registrando los nuevos."""
+    return _get_or_create_keys(db, StatisticsAssessment.assessment_id, assessment_ids)
+
+
+def get_or_create_statistics_keys(
+    db: Session, course_id: str, assessment_id: str
+) -> Tuple[int, int]:
+    """Devuelve (course_key, assessment_key) de una estadistica."""
+    course_keys = get_or_create_course_keys(db, [course_id])
+    assessment_keys = get_or_create_assessment_keys(db, [assessment_id])
+    return course_keys[course_id], assessment_keys[assessment_id]
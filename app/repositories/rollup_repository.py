@@ -0,0 +1,418 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.engine import Row
+from sqlalchemy import Integer, case, cast, func, insert, literal, select, text
+from app.db.date_bucket import bucket_start, date_bucket
+from app.db.upsert import dialect_insert
+from app.core.config import settings
+from app.models.statistics_dictionary_model import (
+    StatisticsAssessment,
+    StatisticsCourse,
+)
+from app.models.statistics_model import Statistics
+from app.models.statistics_rollup_model import (
+    GlobalStatisticsRollup,
+    CourseStatisticsRollup,
+    UserCourseStatisticsRollup,
+    CourseDayStatisticsRollup,
+    GradeHistogramRollup,
+)
+from app.repositories.dictionary_repository import join_dictionaries
+from typing import Optional, List, Tuple
+from datetime import date, datetime, time
+import math
+
+COUNTERS = ("total", "completed", "graded", "grade_sum")
+
+# Columnas clave de cada tabla de rollups
+ROLLUP_KEYS = {
+    GlobalStatisticsRollup: ("id",),
+    CourseStatisticsRollup: ("course_id",),
+    UserCourseStatisticsRollup: ("user_id", "course_id"),
+    CourseDayStatisticsRollup: ("course_id", "day"),
+}
+
+
+def rollup_delta(
+    course_id: str,
+    user_id: int,
+    day: date,
+    total: int = 0,
+    completed: int = 0,
+    graded: int = 0,
+    grade_sum: float = 0.0,
+) -> dict:
+    """
+    Variacion de los contadores que produce una escritura sobre una fila de
+    estadisticas.
+    """
+    return {
+        "course_id": course_id,
+        "user_id": user_id,
+        "day": day,
+        "total": total,
+        "completed": completed,
+        "graded": graded,
+        "grade_sum": grade_sum,
+    }
+
+
+def _rollup_keys(delta: dict):
+    yield GlobalStatisticsRollup, (1,)
+    yield CourseStatisticsRollup, (delta["course_id"],)
+    yield UserCourseStatisticsRollup, (delta["user_id"], delta["course_id"])
+    yield CourseDayStatisticsRollup, (delta["course_id"], delta["day"])
+
+
+def apply_rollup_deltas(db: Session, deltas: List[dict]) -> None:
+    """
+    Suma las variaciones a todas las tablas de rollups con un upsert por tabla.
+    No hace commit: se aplica en la misma transaccion que la escritura.
+    """
+    merged = {model: {} for model in ROLLUP_KEYS}
+    for delta in deltas:
+        for model, key in _rollup_keys(delta):
+            counters = merged[model].setdefault(key, dict.fromkeys(COUNTERS, 0))
+            for name in COUNTERS:
+                counters[name] += delta[name]
+
+    for model, key_columns in ROLLUP_KEYS.items():
+        # Orden estable de las claves para no generar deadlocks entre escrituras
+        rows = [
+            {**dict(zip(key_columns, key)), **counters}
+            for key, counters in sorted(merged[model].items())
+            if any(counters.values())
+        ]
+        if not rows:
+            continue
+
+        stmt = dialect_insert(db, model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={
+                name: getattr(model, name) + getattr(stmt.excluded, name)
+                for name in COUNTERS
+            },
+        )
+        db.execute(stmt, rows)
+
+
+# Margen para que una nota sobre el borde de un tramo (8.5 / 0.1) no caiga en el
+# anterior por redondeo de punto flotante
+_BUCKET_EPSILON = 1e-9
+
+
+def grade_bucket(calificacion: float) -> int:
+    return math.floor(
+        calificacion / settings.GRADE_HISTOGRAM_BUCKET_WIDTH + _BUCKET_EPSILON
+    )
+
+
+def grade_bucket_expression(column):
+    """Equivalente en SQL de grade_bucket."""
+    return cast(
+        func.floor(column / settings.GRADE_HISTOGRAM_BUCKET_WIDTH + _BUCKET_EPSILON),
+        Integer,
+    )
+
+
+def grade_histogram_deltas(
+    course_id: str,
+    assessment_id: str,
+    old_grade: Optional[float],
+    new_grade: Optional[float],
+) -> List[dict]:
+    """
+    Variaciones del histograma de calificaciones al pasar una nota de
+    old_grade a new_grade (None si no estaba o no queda calificada).
+    """
+    deltas = []
+    for grade, count in ((old_grade, -1), (new_grade, 1)):
+        if grade is not None:
+            deltas.append(
+                {
+                    "course_id": course_id,
+                    "assessment_id": assessment_id,
+                    "bucket": grade_bucket(grade),
+                    "count": count,
+                }
+            )
+    return deltas
+
+
+def apply_grade_histogram_deltas(db: Session, deltas: List[dict]) -> None:
+    """
+    Suma las variaciones al histograma de calificaciones con un upsert. No
+    hace commit.
+    """
+    merged = {}
+    for delta in deltas:
+        key = (delta["course_id"], delta["assessment_id"], delta["bucket"])
+        merged[key] = merged.get(key, 0) + delta["count"]
+
+    rows = [
+        {
+            "course_id": course_id,
+            "assessment_id": assessment_id,
+            "bucket": bucket,
+            "count": count,
+        }
+        for (course_id, assessment_id, bucket), count in sorted(merged.items())
+        if count
+    ]
+    if not rows:
+        return
+
+    stmt = dialect_insert(db, GradeHistogramRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["course_id", "assessment_id", "bucket"],
+        set_={"count": GradeHistogramRollup.count + stmt.excluded.count},
+    )
+    db.execute(stmt, rows)
+
+
+class RollupDeltas:
+    """
+    Acumula las variaciones de los rollups y del histograma de varias
+    escrituras, para aplicarlas juntas al final de la transaccion: un lote
+    toma los locks de las filas de rollups una sola vez y en orden estable, en
+    lugar de retener el rollup global mientras bloquea las filas de los
+    eventos siguientes.
+    """
+
+    def __init__(self):
+        self.rollups: List[dict] = []
+        self.histogram: List[dict] = []
+
+    def extend(self, other: "RollupDeltas") -> None:
+        self.rollups.extend(other.rollups)
+        self.histogram.extend(other.histogram)
+
+    def apply(self, db: Session) -> None:
+        """Aplica las variaciones acumuladas. No hace commit."""
+        apply_rollup_deltas(db, self.rollups)
+        apply_grade_histogram_deltas(db, self.histogram)
+
+
+def get_grade_histogram(
+    db: Session, course_id: str, assessment_id: Optional[str] = None
+) -> List[Row]:
+    """
+    Devuelve (tramo, cantidad) de las calificaciones del curso, o de una
+    tarea/examen, ordenado por tramo.
+    """
+    query = db.query(
+        GradeHistogramRollup.bucket.label("bucket"),
+        func.sum(GradeHistogramRollup.count).label("count"),
+    ).filter(GradeHistogramRollup.course_id == course_id)
+    if assessment_id is not None:
+        query = query.filter(GradeHistogramRollup.assessment_id == assessment_id)
+
+    return (
+        query.group_by(GradeHistogramRollup.bucket)
+        .having(func.sum(GradeHistogramRollup.count) > 0)
+        .order_by(GradeHistogramRollup.bucket)
+        .all()
+    )
+
+
+def get_rollup_stats(
+    db: Session, user_id: Optional[int] = None, course_id: Optional[str] = None
+) -> Tuple[float, int, int]:
+    """
+    Devuelve (promedio de calificaciones, total, entregadas) leyendo la fila
+    de rollups global, del curso o del usuario en el curso.
+    """
+    if course_id is None and user_id is None:
+        model, filters = GlobalStatisticsRollup, {"id": 1}
+    elif user_id is None:
+        model, filters = CourseStatisticsRollup, {"course_id": course_id}
+    elif course_id is not None:
+        model = UserCourseStatisticsRollup
+        filters = {"user_id": user_id, "course_id": course_id}
+    else:
+        raise ValueError("No hay rollups por usuario sin curso")
+
+    row = (
+        db.query(model.total, model.completed, model.graded, model.grade_sum)
+        .filter_by(**filters)
+        .one_or_none()
+    )
+    if row is None:
+        return 0.0, 0, 0
+
+    avg_grade = row.grade_sum / row.graded if row.graded else 0.0
+    return avg_grade, row.total, row.completed
+
+
+def get_course_day_rollup_buckets(
+    db: Session, course_id: str, granularity: str, start_date=None
+) -> List[Row]:
+    """
+    Devuelve (periodo, total, entregadas, calificadas, suma de calificaciones)
+    del curso por periodo, sumando los rollups diarios.
+    """
+    bucket = date_bucket(db, CourseDayStatisticsRollup.day, granularity)
+    query = db.query(
+        bucket.label("bucket"),
+        func.sum(CourseDayStatisticsRollup.total).label("total"),
+        func.sum(CourseDayStatisticsRollup.completed).label("completed"),
+        func.sum(CourseDayStatisticsRollup.graded).label("graded"),
+        func.sum(CourseDayStatisticsRollup.grade_sum).label("grade_sum"),
+    ).filter(CourseDayStatisticsRollup.course_id == course_id)
+    if start_date:
+        query = query.filter(CourseDayStatisticsRollup.day >= start_date)
+
+    return query.group_by(bucket).order_by(bucket).all()
+
+
+def get_courses_rollup_stats(db: Session, course_ids: List[str]) -> List[Row]:
+    """
+    Devuelve (course_id, total, entregadas, calificadas, suma de
+    calificaciones) de los cursos que tienen rollups.
+    """
+    return (
+        db.query(
+            CourseStatisticsRollup.course_id,
+            CourseStatisticsRollup.total,
+            CourseStatisticsRollup.completed,
+            CourseStatisticsRollup.graded,
+            CourseStatisticsRollup.grade_sum,
+        )
+        .filter(CourseStatisticsRollup.course_id.in_(course_ids))
+        .all()
+    )
+
+
+def rebuild_rollups(db: Session) -> None:
+    """
+    Recalcula todas las tablas de rollups a partir de la tabla statistics.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # Bloquea las escrituras (no las lecturas) mientras se recalcula
+        db.execute(text("LOCK TABLE statistics IN SHARE MODE"))
+
+    for model in ROLLUP_KEYS:
+        db.query(model).delete(synchronize_session=False)
+    db.query(GradeHistogramRollup).delete(synchronize_session=False)
+
+    counters = (
+        func.count(Statistics.id),
+        func.count(case((Statistics.entregado == True, Statistics.id))),
+        func.count(Statistics.calificacion),
+        func.coalesce(func.sum(Statistics.calificacion), 0.0),
+    )
+    day = func.date(Statistics.date)
+    course_id = StatisticsCourse.course_id
+    assessment_id = StatisticsAssessment.assessment_id
+    selects = {
+        GlobalStatisticsRollup: select(literal(1), *counters),
+        CourseStatisticsRollup: join_dictionaries(
+            select(course_id, *counters)
+        ).group_by(course_id),
+        UserCourseStatisticsRollup: join_dictionaries(
+            select(Statistics.user_id, course_id, *counters)
+        ).group_by(Statistics.user_id, course_id),
+        CourseDayStatisticsRollup: join_dictionaries(
+            select(course_id, day, *counters)
+        ).group_by(course_id, day),
+    }
+
+    for model, query in selects.items():
+        db.execute(insert(model).from_select([*ROLLUP_KEYS[model], *COUNTERS], query))
+
+    bucket = grade_bucket_expression(Statistics.calificacion)
+    db.execute(
+        insert(GradeHistogramRollup).from_select(
+            ["course_id", "assessment_id", "bucket", "count"],
+            join_dictionaries(
+                select(
+                    course_id,
+                    assessment_id,
+                    bucket,
+                    func.count(Statistics.id),
+                )
+            )
+            .where(Statistics.calificacion.is_not(None))
+            .group_by(course_id, assessment_id, bucket),
+        )
+    )
+
+    db.commit()
+
+
+def subtract_rollups_for_range(db: Session, start_day: date, end_day: date) -> None:
+    """
+    Resta de los rollups y del histograma las filas de statistics de los dias
+    [start_day, end_day), antes de borrarlas al archivar una particion. No
+    hace commit: debe ir en la misma transaccion que el borrado.
+    """
+    in_range = (
+        Statistics.date >= datetime.combine(start_day, time.min),
+        Statistics.date < datetime.combine(end_day, time.min),
+    )
+    day = date_bucket(db, Statistics.date, "day")
+    counters = join_dictionaries(
+        db.query(
+            StatisticsCourse.course_id,
+            Statistics.user_id,
+            day.label("day"),
+            func.count(Statistics.id).label("total"),
+            func.count(case((Statistics.entregado == True, Statistics.id))).label(
+                "completed"
+            ),
+            func.count(Statistics.calificacion).label("graded"),
+            func.coalesce(func.sum(Statistics.calificacion), 0.0).label("grade_sum"),
+        )
+    ).filter(*in_range)
+    counters = counters.group_by(StatisticsCourse.course_id, Statistics.user_id, day)
+
+    apply_rollup_deltas(
+        db,
+        [
+            rollup_delta(
+                row.course_id,
+                row.user_id,
+                bucket_start(row.day),
+                total=-row.total,
+                completed=-row.completed,
+                graded=-row.graded,
+                grade_sum=-row.grade_sum,
+            )
+            for row in counters
+        ],
+    )
+
+    bucket = grade_bucket_expression(Statistics.calificacion)
+    grades = (
+        join_dictionaries(
+            db.query(
+                StatisticsCourse.course_id,
+                StatisticsAssessment.assessment_id,
+                bucket.label("bucket"),
+                func.count(Statistics.id).label("count"),
+            )
+        )
+        .filter(*in_range, Statistics.calificacion.is_not(None))
+        .group_by(
+            StatisticsCourse.course_id, StatisticsAssessment.assessment_id, bucket
+        )
+    )
+    apply_grade_histogram_deltas(
+        db,
+        [
+            {
+                "course_id": row.course_id,
+                "assessment_id": row.assessment_id,
+                "bucket": row.bucket,
+                "count": -row.count,
+            }
+            for row in grades
+        ],
+    )
+
+    # Los dias archivados quedan sin filas
+    db.query(CourseDayStatisticsRollup).filter(
+        CourseDayStatisticsRollup.day >= start_day,
+        CourseDayStatisticsRollup.day < end_day,
+        CourseDayStatisticsRollup.total == 0,
+    ).delete(synchronize_session=False)
@@ -1,40 +1,137 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import (
+    Float,
+    String,
+    case,
+    cast,
+    func,
+    insert,
+    literal,
+    select,
+    tuple_,
+)
+from sqlalchemy.engine import Row
+from app.core.config import settings
+from app.db.date_bucket import date_bucket
+from app.db.upsert import dialect_insert
+from app.models.statistics_dictionary_model import (
+    ASSESSMENT_TYPES,
+    AssessmentType,
+    StatisticsAssessment,
+    StatisticsCourse,
+)
 from app.models.statistics_model import Statistics
-from typing import Optional, List
+from app.models.statistics_rollup_model import UserCourseStatisticsRollup
+from app.repositories.dictionary_repository import (
+    assessment_key_subquery,
+    course_key_subquery,
+    get_or_create_statistics_keys,
+    join_dictionaries,
+)
+from app.repositories.rollup_repository import (
+    RollupDeltas,
+    grade_bucket_expression,
+    grade_histogram_deltas,
+    rollup_delta,
+)
+from typing import Iterator, Optional, List, Tuple
 from datetime import datetime
 
+# Columnas de una estadistica que se leen como tuplas planas, sin instanciar el
+# modelo, para los logs y los exports. Se leen con join_dictionaries
+STATISTICS_ROW_COLUMNS = (
+    Statistics.id,
+    Statistics.user_id,
+    StatisticsCourse.course_id,
+    Statistics.titulo,
+    Statistics.tipo,
+    Statistics.entregado,
+    Statistics.calificacion,
+    StatisticsAssessment.assessment_id,
+    Statistics.date.label("fecha"),
+)
+STATISTICS_ROW_FIELDS = tuple(column.key for column in STATISTICS_ROW_COLUMNS)
 
-def find_statistics_by_user_and_assessment_id(
-    db: Session, user_id: int, assessment_id: str, tipo: str
-) -> Optional[Statistics]:
-    return (
-        db.query(Statistics)
+
+def _collect_deltas(
+    db: Session, pending: RollupDeltas, deltas: Optional[RollupDeltas]
+) -> None:
+    # Sin acumulador se aplican ya; con uno, quien lo paso las aplica al final
+    if deltas is None:
+        pending.apply(db)
+    else:
+        deltas.extend(pending)
+
+
+def mark_statistics_delivered(
+    db: Session,
+    user_id: int,
+    assessment_id: str,
+    tipo: str,
+    calificacion: float = None,
+    commit: bool = True,
+    deltas: Optional[RollupDeltas] = None,
+) -> Optional[str]:
+    """
+    Marca como entregada (y opcionalmente califica) la estadistica del usuario
+    para la tarea/examen, y actualiza los rollups en la misma transaccion. Si
+    se pasa deltas, las variaciones de los rollups se acumulan ahi en lugar de
+    aplicarse.
+
+    La fila se bloquea al leerla, para calcular la variacion de los rollups
+    sin carreras con otros eventos del mismo usuario.
+
+    Devuelve el course_id de la estadistica, o None si no existe.
+    """
+    stat = (
+        db.query(
+            Statistics.id,
+            StatisticsCourse.course_id,
+            Statistics.date,
+            Statistics.entregado,
+            Statistics.calificacion,
+        )
+        .select_from(Statistics)
+        .join(StatisticsCourse, StatisticsCourse.id == Statistics.course_key)
         .filter(
             Statistics.user_id == user_id,
-            Statistics.assessment_id == assessment_id,
+            Statistics.assessment_key == assessment_key_subquery(assessment_id),
             Statistics.tipo == tipo,
         )
-        .first()
+        .with_for_update(of=Statistics)
+        .one_or_none()
     )
+    if stat is None:
+        return None
 
+    values = {}
+    delta = rollup_delta(stat.course_id, user_id, stat.date.date())
+    if not stat.entregado:
+        values[Statistics.entregado] = True
+        delta["completed"] = 1
+    if calificacion is not None and calificacion != stat.calificacion:
+        values[Statistics.calificacion] = calificacion
+        delta["grade_sum"] = calificacion - (stat.calificacion or 0.0)
+        delta["graded"] = 1 if stat.calificacion is None else 0
 
-def update_statistics(
-    db: Session,
-    statistics: Statistics,
-    titulo: str = None,
-    entregado: bool = None,
-    calificacion: float = None,
-) -> Statistics:
-    if titulo is not None:
-        statistics.titulo = titulo
-    if entregado is not None:
-        statistics.entregado = entregado
-    if calificacion is not None:
-        statistics.calificacion = calificacion
-    db.commit()
-    db.refresh(statistics)
-    return statistics
+    if values:
+        # La fecha permite ir directo a la particion de la fila
+        db.query(Statistics).filter(
+            Statistics.id == stat.id, Statistics.date == stat.date
+        ).update(values, synchronize_session=False)
+        pending = RollupDeltas()
+        pending.rollups.append(delta)
+        if Statistics.calificacion in values:
+            pending.histogram.extend(
+                grade_histogram_deltas(
+                    stat.course_id, assessment_id, stat.calificacion, calificacion
+                )
+            )
+        _collect_deltas(db, pending, deltas)
+
+    if commit:
+        db.commit()
+    return stat.course_id
 
 
 def create_statistics(
@@ -47,115 +144,601 @@ def create_statistics(
     calificacion: float = None,
     course_id: str = None,
     date: datetime = None,
+    commit: bool = True,
+    deltas: Optional[RollupDeltas] = None,
 ) -> Statistics:
+    course_key, assessment_key = get_or_create_statistics_keys(
+        db, course_id, assessment_id
+    )
     statistics = Statistics(
         user_id=user_id,
-        assessment_id=assessment_id,
+        assessment_key=assessment_key,
         titulo=titulo,
         tipo=tipo,
         entregado=entregado,
         calificacion=calificacion,
-        course_id=course_id,
+        course_key=course_key,
         date=date,
     )
     db.add(statistics)
+    db.flush()
+    pending = RollupDeltas()
+    pending.rollups.append(
+        rollup_delta(
+            course_id,
+            user_id,
+            statistics.date.date(),
+            total=1,
+            completed=1 if entregado else 0,
+            graded=1 if calificacion is not None else 0,
+            grade_sum=calificacion or 0.0,
+        )
+    )
+    pending.histogram.extend(
+        grade_histogram_deltas(course_id, assessment_id, None, calificacion)
+    )
+    _collect_deltas(db, pending, deltas)
+    if not commit:
+        return statistics
     db.commit()
     db.refresh(statistics)
     return statistics
 
 
-def get_average_grade(
+def _insert_missing_statistics(
+    db: Session, rows: List[dict], assessment_id: str, tipo: str
+) -> List[Row]:
+    """
+    Inserta las filas de los usuarios que todavia no tienen la estadistica y
+    devuelve (user_id, date) de las creadas. Con la tabla particionada no hay
+    indice unico sobre (user_id, assessment_key, tipo) para un ON CONFLICT, por
+    lo que las escrituras de una misma tarea/examen se serializan con un lock
+    de la transaccion.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(
+            select(func.pg_advisory_xact_lock(func.hashtext(f"{assessment_id}|{tipo}")))
+        )
+
+    existing = {
+        user_id
+        for (user_id,) in db.query(Statistics.user_id).filter(
+            Statistics.assessment_key == rows[0]["assessment_key"],
+            Statistics.tipo == tipo,
+            Statistics.user_id.in_([row["user_id"] for row in rows]),
+        )
+    }
+    missing = [row for row in rows if row["user_id"] not in existing]
+    if not missing:
+        return []
+
+    stmt = insert(Statistics).returning(Statistics.user_id, Statistics.date)
+    return db.execute(stmt, missing).all()
+
+
+def upsert_course_statistics(
     db: Session,
+    user_ids: List[int],
+    assessment_id: str,
+    tipo: str,
+    titulo: Optional[str],
+    course_id: str,
+    commit: bool = True,
+    deltas: Optional[RollupDeltas] = None,
+) -> None:
+    """
+    Crea o actualiza en bloque las estadisticas de una tarea/examen para todos
+    los usuarios indicados: un INSERT ... ON CONFLICT DO NOTHING sobre la clave
+    (user_id, assessment_key, tipo) crea las faltantes y un UPDATE renombra las
+    existentes. Con la tabla particionada las faltantes se buscan antes de
+    insertarlas. Los rollups se actualizan con las filas creadas, o se
+    acumulan en deltas si se pasa.
+    """
+    if not user_ids:
+        return
+
+    course_key, assessment_key = get_or_create_statistics_keys(
+        db, course_id, assessment_id
+    )
+    rows = [
+        {
+            "user_id": user_id,
+            "assessment_key": assessment_key,
+            "titulo": titulo,
+            "tipo": tipo,
+            "entregado": False,
+            "course_key": course_key,
+        }
+        for user_id in user_ids
+    ]
+
+    if settings.STATISTICS_PARTITIONING:
+        inserted = _insert_missing_statistics(db, rows, assessment_id, tipo)
+    else:
+        stmt = (
+            dialect_insert(db, Statistics)
+            .on_conflict_do_nothing(
+                index_elements=[
+                    Statistics.user_id,
+                    Statistics.assessment_key,
+                    Statistics.tipo,
+                ]
+            )
+            .returning(Statistics.user_id, Statistics.date)
+        )
+        inserted = db.execute(stmt, rows).all()
+
+    existing_user_ids = set(user_ids) - {row.user_id for row in inserted}
+    if titulo is not None and existing_user_ids:
+        db.query(Statistics).filter(
+            Statistics.assessment_key == assessment_key,
+            Statistics.tipo == tipo,
+            Statistics.user_id.in_(existing_user_ids),
+        ).update({Statistics.titulo: titulo}, synchronize_session=False)
+
+    pending = RollupDeltas()
+    pending.rollups.extend(
+        rollup_delta(course_id, row.user_id, row.date.date(), total=1)
+        for row in inserted
+    )
+    _collect_deltas(db, pending, deltas)
+
+    if commit:
+        db.commit()
+
+
+def _apply_filters(
+    query,
     user_id: Optional[int] = None,
     course_id: Optional[str] = None,
     start_date=None,
     end_date=None,
 ):
-    base_query = db.query(func.avg(Statistics.calificacion)).filter(
-        Statistics.calificacion.isnot(None)
-    )
-
+    """
+    Aplica los filtros comunes en el orden de las columnas de los indices
+    (user_id, course_key, date) del modelo. Los textos se traducen a claves
+    con subconsultas sobre los diccionarios.
+    """
     if user_id is not None:
-        base_query = base_query.filter(Statistics.user_id == user_id)
+        query = query.filter(Statistics.user_id == user_id)
     if course_id is not None:
-        base_query = base_query.filter(Statistics.course_id == course_id)
-
+        query = query.filter(Statistics.course_key == course_key_subquery(course_id))
     if start_date:
-        base_query = base_query.filter(Statistics.date >= start_date)
+        query = query.filter(Statistics.date >= start_date)
     if end_date:
-        base_query = base_query.filter(Statistics.date <= end_date)
+        query = query.filter(Statistics.date <= end_date)
+    return query
+
 
-    return base_query.scalar() or 0.0
+def _order_by_date(query):
+    # El desempate por id coincide con los indices y hace el orden deterministico
+    return query.order_by(Statistics.date.desc(), Statistics.id.desc())
 
 
-def get_completion_stats(
+def get_aggregate_stats(
     db: Session,
     user_id: Optional[int] = None,
     course_id: Optional[str] = None,
     start_date=None,
     end_date=None,
+) -> Tuple[float, int, int]:
+    """
+    Devuelve (promedio de calificaciones, total, entregadas) con una sola
+    consulta de agregacion condicional sobre las filas filtradas.
+    """
+    query = db.query(
+        # avg ignora las filas sin calificar
+        func.avg(Statistics.calificacion),
+        func.count(Statistics.id),
+        func.count(case((Statistics.entregado == True, Statistics.id))),
+    )
+    avg_grade, total, completed = _apply_filters(
+        query, user_id, course_id, start_date, end_date
+    ).one()
+
+    return avg_grade or 0.0, total, completed
+
+
+def get_courses_aggregate_stats(
+    db: Session, course_ids: List[str], start_date=None, end_date=None
+) -> List[Row]:
+    """
+    Devuelve (course_id, total, entregadas, calificadas, suma de
+    calificaciones) de cada curso con filas, con un unico GROUP BY course_id.
+    """
+    query = db.query(
+        StatisticsCourse.course_id,
+        func.count(Statistics.id).label("total"),
+        func.count(case((Statistics.entregado == True, Statistics.id))).label(
+            "completed"
+        ),
+        func.count(Statistics.calificacion).label("graded"),
+        func.coalesce(func.sum(Statistics.calificacion), 0.0).label("grade_sum"),
+    )
+    query = query.select_from(Statistics).join(
+        StatisticsCourse, StatisticsCourse.id == Statistics.course_key
+    )
+    query = query.filter(StatisticsCourse.course_id.in_(course_ids))
+    query = _apply_filters(query, start_date=start_date, end_date=end_date)
+
+    return query.group_by(StatisticsCourse.course_id).all()
+
+
+def get_course_assessment_stats(
+    db: Session,
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: Optional[int] = None,
+    cursor: Optional[Tuple[str, str]] = None,
+) -> List[Row]:
+    """
+    Devuelve (assessment_id, tipo, titulo, total, entregadas, calificadas,
+    promedio) por tarea/examen del curso, con un unico GROUP BY sobre el indice
+    (course_key, assessment_key, tipo). Pagina por keyset sobre (assessment_id,
+    tipo) y trae un grupo de mas que el limite.
+    """
+    query = db.query(
+        StatisticsAssessment.assessment_id,
+        Statistics.tipo,
+        # El titulo se actualiza para todas las filas de la tarea/examen
+        func.max(Statistics.titulo).label("titulo"),
+        func.count(Statistics.id).label("total"),
+        func.count(case((Statistics.entregado == True, Statistics.id))).label(
+            "completed"
+        ),
+        func.count(Statistics.calificacion).label("graded"),
+        func.avg(Statistics.calificacion).label("avg_grade"),
+    )
+    query = query.select_from(Statistics).join(
+        StatisticsAssessment, StatisticsAssessment.id == Statistics.assessment_key
+    )
+    query = _apply_filters(
+        query, course_id=course_id, start_date=start_date, end_date=end_date
+    )
+    if cursor is not None:
+        # El tipo del cursor se traduce a su codigo, como la columna
+        assessment_id, tipo = cursor
+        query = query.filter(
+            tuple_(StatisticsAssessment.assessment_id, Statistics.tipo)
+            > tuple_(literal(assessment_id), literal(tipo, AssessmentType))
+        )
+
+    group = (
+        Statistics.assessment_key,
+        StatisticsAssessment.assessment_id,
+        Statistics.tipo,
+    )
+    query = query.group_by(*group).order_by(
+        StatisticsAssessment.assessment_id, Statistics.tipo
+    )
+    if limit is not None:
+        query = query.limit(limit + 1)
+    return query.all()
+
+
+def _user_course_counters(
+    course_id: str, start_date=None, end_date=None, from_rollups: bool = False
 ):
-    base_query = db.query(Statistics)
+    # Contadores por usuario del curso, de los rollups o agrupando las filas
+    if from_rollups:
+        return select(
+            UserCourseStatisticsRollup.user_id,
+            UserCourseStatisticsRollup.total,
+            UserCourseStatisticsRollup.completed,
+            UserCourseStatisticsRollup.graded,
+            UserCourseStatisticsRollup.grade_sum,
+        ).where(UserCourseStatisticsRollup.course_id == course_id)
 
-    if user_id is not None:
-        base_query = base_query.filter(Statistics.user_id == user_id)
-    if course_id is not None:
-        base_query = base_query.filter(Statistics.course_id == course_id)
+    query = select(
+        Statistics.user_id,
+        func.count(Statistics.id).label("total"),
+        func.count(case((Statistics.entregado == True, Statistics.id))).label(
+            "completed"
+        ),
+        func.count(Statistics.calificacion).label("graded"),
+        func.coalesce(func.sum(Statistics.calificacion), 0.0).label("grade_sum"),
+    )
+    query = _apply_filters(
+        query, course_id=course_id, start_date=start_date, end_date=end_date
+    )
+    return query.group_by(Statistics.user_id)
 
-    if start_date:
-        base_query = base_query.filter(Statistics.date >= start_date)
-    if end_date:
-        base_query = base_query.filter(Statistics.date <= end_date)
 
-    total = base_query.count()
-    completed = base_query.filter(Statistics.entregado == True).count()
+def get_course_ranking(
+    db: Session,
+    course_id: str,
+    order: str = "promedio",
+    start_date=None,
+    end_date=None,
+    from_rollups: bool = False,
+    limit: Optional[int] = None,
+    cursor: Optional[Tuple[int, int]] = None,
+) -> List[Row]:
+    """
+    Devuelve los usuarios del curso ordenados por promedio o por tasa de
+    finalizacion, con su posicion (rank) y la cantidad total de usuarios,
+    calculados con funciones de ventana en una sola consulta. Pagina por
+    keyset sobre (posicion, user_id) y trae una fila de mas que el limite.
+    """
+    counters = _user_course_counters(
+        course_id, start_date, end_date, from_rollups
+    ).subquery()
+    avg_grade = case((counters.c.graded > 0, counters.c.grade_sum / counters.c.graded))
+    completion_rate = case(
+        (counters.c.total > 0, cast(counters.c.completed, Float) / counters.c.total)
+    )
+    metrics = (
+        (avg_grade, completion_rate)
+        if order == "promedio"
+        else (completion_rate, avg_grade)
+    )
+
+    ranked = select(
+        counters.c.user_id,
+        counters.c.total,
+        counters.c.completed,
+        avg_grade.label("avg_grade"),
+        completion_rate.label("completion_rate"),
+        func.rank()
+        .over(order_by=[metric.desc().nulls_last() for metric in metrics])
+        .label("position"),
+        func.count().over().label("users"),
+    ).subquery()
 
-    return total, completed
+    query = select(ranked)
+    if cursor is not None:
+        query = query.where(
+            tuple_(ranked.c.position, ranked.c.user_id) > tuple_(*cursor)
+        )
+    query = query.order_by(ranked.c.position, ranked.c.user_id)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    return db.execute(query).all()
 
 
-def get_course_statistics(db: Session, course_id: str, start_date=None, end_date=None):
-    query = db.query(Statistics).filter(Statistics.course_id == course_id)
+def get_statistics_buckets(
+    db: Session,
+    granularity: str,
+    user_id: Optional[int] = None,
+    course_id: Optional[str] = None,
+    start_date=None,
+    end_date=None,
+) -> List[Row]:
+    """
+    Devuelve (periodo, total, entregadas, calificadas, suma de calificaciones)
+    de las filas filtradas, agrupadas por dia, semana o mes en la base.
+    """
+    bucket = date_bucket(db, Statistics.date, granularity)
+    query = db.query(
+        bucket.label("bucket"),
+        func.count(Statistics.id).label("total"),
+        func.count(case((Statistics.entregado == True, Statistics.id))).label(
+            "completed"
+        ),
+        func.count(Statistics.calificacion).label("graded"),
+        func.coalesce(func.sum(Statistics.calificacion), 0.0).label("grade_sum"),
+    )
+    query = _apply_filters(query, user_id, course_id, start_date, end_date)
 
-    if start_date:
-        query = query.filter(Statistics.date >= start_date)
-    if end_date:
-        query = query.filter(Statistics.date <= end_date)
+    return query.group_by(bucket).order_by(bucket).all()
 
-    return query.order_by(Statistics.date.desc()).all()
 
+def _graded_statistics(
+    query,
+    course_id: str,
+    assessment_id: Optional[str] = None,
+    start_date=None,
+    end_date=None,
+):
+    # Calificaciones del curso, o de una tarea/examen, en el rango de fechas
+    query = _apply_filters(
+        query, course_id=course_id, start_date=start_date, end_date=end_date
+    ).filter(Statistics.calificacion.is_not(None))
+    if assessment_id is not None:
+        query = query.filter(
+            Statistics.assessment_key == assessment_key_subquery(assessment_id)
+        )
+    return query
 
-def get_user_course_statistics(
-    db: Session, user_id: int, course_id: str, start_date=None, end_date=None
+
+def get_grade_histogram_from_statistics(
+    db: Session,
+    course_id: str,
+    assessment_id: Optional[str] = None,
+    start_date=None,
+    end_date=None,
+) -> List[Row]:
+    """
+    Devuelve (tramo, cantidad) de las calificaciones filtradas, agrupadas en la
+    base con los mismos tramos que el histograma de los rollups.
+    """
+    bucket = grade_bucket_expression(Statistics.calificacion)
+    query = _graded_statistics(
+        db.query(bucket.label("bucket"), func.count(Statistics.id).label("count")),
+        course_id,
+        assessment_id,
+        start_date,
+        end_date,
+    )
+
+    return query.group_by(bucket).order_by(bucket).all()
+
+
+def get_grade_range(
+    db: Session,
+    course_id: str,
+    assessment_id: Optional[str] = None,
+    start_date=None,
+    end_date=None,
+) -> Row:
+    """
+    Devuelve (minima, maxima) de las calificaciones filtradas, exactas, ya
+    que el histograma solo guarda el inicio de cada tramo.
+    """
+    query = _graded_statistics(
+        db.query(
+            func.min(Statistics.calificacion).label("minimo"),
+            func.max(Statistics.calificacion).label("maximo"),
+        ),
+        course_id,
+        assessment_id,
+        start_date,
+        end_date,
+    )
+    return query.one()
+
+
+def _paginate(
+    query, limit: Optional[int] = None, cursor: Optional[Tuple[datetime, int]] = None
 ):
-    query = db.query(Statistics).filter(
-        Statistics.user_id == user_id,
-        Statistics.course_id == course_id,
+    """
+    Pagina por keyset sobre (date, id) en orden descendente. Trae una fila de
+    mas que el limite para saber si existe una pagina siguiente.
+    """
+    if cursor is not None:
+        # La cota sobre date sola permite descartar particiones; la comparacion
+        # de tuplas no
+        query = query.filter(
+            Statistics.date <= cursor[0],
+            tuple_(Statistics.date, Statistics.id) < tuple_(*cursor),
+        )
+    query = _order_by_date(query)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    return query
+
+
+def get_course_statistics(
+    db: Session,
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: Optional[int] = None,
+    cursor: Optional[Tuple[datetime, int]] = None,
+) -> List[Row]:
+    query = _apply_filters(
+        join_dictionaries(db.query(*STATISTICS_ROW_COLUMNS)),
+        course_id=course_id,
+        start_date=start_date,
+        end_date=end_date,
     )
 
-    if start_date:
-        query = query.filter(Statistics.date >= start_date)
-    if end_date:
-        query = query.filter(Statistics.date <= end_date)
+    return _paginate(query, limit, cursor).all()
 
-    return query.order_by(Statistics.date.desc()).all()
 
+def get_user_course_statistics(
+    db: Session,
+    user_id: int,
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: Optional[int] = None,
+    cursor: Optional[Tuple[datetime, int]] = None,
+) -> List[Row]:
+    query = _apply_filters(
+        join_dictionaries(db.query(*STATISTICS_ROW_COLUMNS)),
+        user_id,
+        course_id,
+        start_date,
+        end_date,
+    )
+
+    return _paginate(query, limit, cursor).all()
 
-def get_all_statistics_with_filters(
+
+def iter_statistics_with_filters(
     db: Session,
     user_id: Optional[int] = None,
     course_id: Optional[str] = None,
     start_date=None,
     end_date=None,
-) -> List[Statistics]:
-    query = db.query(Statistics)
+    batch_size: int = 1000,
+) -> Iterator[Row]:
+    """
+    Recorre las estadisticas filtradas como tuplas de columnas, trayendolas de
+    a batch_size filas con un cursor del lado del servidor.
+    """
+    query = _apply_filters(
+        join_dictionaries(db.query(*STATISTICS_ROW_COLUMNS)),
+        user_id,
+        course_id,
+        start_date,
+        end_date,
+    )
 
-    if user_id is not None:
-        query = query.filter(Statistics.user_id == user_id)
-    if course_id is not None:
-        query = query.filter(Statistics.course_id == course_id)
-    if start_date:
-        query = query.filter(Statistics.date >= start_date)
-    if end_date:
-        query = query.filter(Statistics.date <= end_date)
+    return iter(_order_by_date(query).yield_per(batch_size))
+
+
+def exists_statistics_with_filters(
+    db: Session,
+    user_id: Optional[int] = None,
+    course_id: Optional[str] = None,
+    start_date=None,
+    end_date=None,
+) -> bool:
+    query = _apply_filters(
+        db.query(Statistics.id), user_id, course_id, start_date, end_date
+    )
+    return db.query(query.exists()).scalar()
+
+
+def count_statistics_with_filters(
+    db: Session,
+    user_id: Optional[int] = None,
+    course_id: Optional[str] = None,
+    start_date=None,
+    end_date=None,
+) -> int:
+    query = _apply_filters(
+        db.query(func.count(Statistics.id)), user_id, course_id, start_date, end_date
+    )
+    return query.scalar()
+
+
+def get_export_summary(
+    db: Session,
+    user_id: Optional[int] = None,
+    course_id: Optional[str] = None,
+    start_date=None,
+    end_date=None,
+) -> Row:
+    """
+    Devuelve la cantidad de filas filtradas y el largo maximo del texto de
+    cada columna, para dimensionar un export antes de escribirlo.
+    """
+
+    def max_length(column):
+        return func.max(func.length(cast(column, String)))
+
+    query = _apply_filters(
+        join_dictionaries(
+            db.query(
+                func.count(Statistics.id).label("total"),
+                max_length(Statistics.id).label("id"),
+                max_length(Statistics.user_id).label("user_id"),
+                max_length(StatisticsCourse.course_id).label("course_id"),
+                max_length(Statistics.titulo).label("titulo"),
+                # El tipo se guarda como codigo: el largo sale de su texto
+                func.max(
+                    case(
+                        *(
+                            (Statistics.tipo == tipo, len(tipo))
+                            for tipo in ASSESSMENT_TYPES
+                        )
+                    )
+                ).label("tipo"),
+                max_length(Statistics.calificacion).label("calificacion"),
+                max_length(StatisticsAssessment.assessment_id).label("assessment_id"),
+                func.count(
+                    case((Statistics.calificacion.is_(None), Statistics.id))
+                ).label("sin_calificar"),
+            )
+        ),
+        user_id,
+        course_id,
+        start_date,
+        end_date,
+    )
 
-    return query.order_by(Statistics.date.desc()).all()
+    return query.one()
@@ -1,27 +1,65 @@
 import logging
 import traceback
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Annotated, List, Optional
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    HTTPException,
+    Response,
+    status,
+    Query,
+)
 from fastapi.security import OAuth2PasswordBearer
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
 from app.schemas.statistics_schemas import (
     UserStatisticsEvent,
     CourseStatisticsEvent,
     ExportFilters,
+    ExportFormat,
+    ExportJobRequest,
+    TrendGranularity,
+    CoursesSummaryRequest,
+    RankingOrder,
 )
-from app.db.dependencies import get_db
+from app.core.config import settings
+from app.db.dependencies import get_db, get_reader_db, get_statistics_reader_db
 from app.controller.statistics_controller import (
     handle_save_user_statistics,
     handle_save_course_statistics,
+    handle_save_user_statistics_batch,
+    handle_save_course_statistics_batch,
     handle_get_global_statistics,
+    handle_get_global_statistics_etag,
+    handle_get_course_statistics_etag,
+    handle_get_user_statistics_etag,
     handle_get_course_detailed_statistics,
     handle_get_user_detailed_statistics,
+    handle_get_course_trends_etag,
+    handle_get_course_trends,
+    handle_get_user_trends_etag,
+    handle_get_user_trends,
+    handle_get_grade_distribution_etag,
+    handle_get_grade_distribution,
+    handle_get_courses_summary,
+    handle_get_assessment_breakdown_etag,
+    handle_get_assessment_breakdown,
+    handle_get_course_ranking_etag,
+    handle_get_course_ranking,
     handle_export_statistics_to_excel,
+    handle_export_statistics,
+    handle_create_export_job,
+    handle_get_export_job,
+    handle_get_export_job_file,
 )
 from app.controller.user_controller import handle_validate_user
+from app.utils.etag import etag_matches
+from app.utils.json_response import FastJSONResponse
 from datetime import date
-import io
+import os
 
 
 oauth2_scheme = OAuth2PasswordBearer(
@@ -104,10 +142,115 @@ async def save_course_statistics(
         )
 
 
+def _batch_response(results: List[dict], message: str):
+    failed = sum(1 for result in results if not result["success"])
+    return {
+        "success": failed == 0,
+        "message": message,
+        "procesados": len(results),
+        "fallidos": failed,
+        "resultados": results,
+    }
+
+
+@router.post("/user-statistics/batch")
+async def save_user_statistics_batch(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    events: Annotated[
+        List[UserStatisticsEvent],
+        Body(min_length=1, max_length=settings.EVENTS_BATCH_MAX_SIZE),
+    ],
+    db: Session = Depends(get_db),
+):
+    try:
+        try:
+            await handle_validate_user(token)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Credenciales de autenticación inválidas",
+            )
+
+        results = await handle_save_user_statistics_batch(db, events)
+
+        return _batch_response(
+            results, "Lote de estadísticas de usuario procesado correctamente"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(
+            f"Exception no manejada al guardar el lote de estadisticas de usuario: {str(e)}"
+        )
+        logging.error(traceback.format_exc())
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor",
+        )
+
+
+@router.post("/course-statistics/batch")
+async def save_course_statistics_batch(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    events: Annotated[
+        List[CourseStatisticsEvent],
+        Body(min_length=1, max_length=settings.EVENTS_BATCH_MAX_SIZE),
+    ],
+    db: Session = Depends(get_db),
+):
+    try:
+        try:
+            await handle_validate_user(token)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Credenciales de autenticación inválidas",
+            )
+
+        results = await handle_save_course_statistics_batch(db, events)
+
+        return _batch_response(
+            results, "Lote de estadísticas de curso procesado correctamente"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(
+            f"Exception no manejada al guardar el lote de estadisticas de curso: {str(e)}"
+        )
+        logging.error(traceback.format_exc())
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor",
+        )
+
+
+def _cache_headers(etag: str) -> dict:
+    # no-cache: el cliente guarda la respuesta pero la revalida con el ETag
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED, headers=_cache_headers(etag)
+    )
+
+
 @router.get("/statistics/global")
-async def get_global_statistics(db: Session = Depends(get_db)):
+async def get_global_statistics(
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_statistics_reader_db),
+):
     try:
-        return await handle_get_global_statistics(db)
+        # El ETag se calcula sin consultar la base
+        etag = handle_get_global_statistics_etag()
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
+        result = await handle_get_global_statistics(db)
+        return FastJSONResponse(result, headers=_cache_headers(etag))
     except HTTPException:
         raise
     except Exception as e:
@@ -127,12 +270,30 @@ async def get_course_detailed_statistics(
     course_id: str,
     start_date: date = Query(None, description="Fecha de inicio (YYYY-MM-DD)"),
     end_date: date = Query(None, description="Fecha de fin (YYYY-MM-DD)"),
-    db: Session = Depends(get_db),
+    limit: int = Query(
+        settings.LOGS_DEFAULT_LIMIT,
+        ge=1,
+        le=settings.LOGS_MAX_LIMIT,
+        description="Cantidad máxima de logs por página",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Cursor de la página siguiente (next_cursor)"
+    ),
+    include_logs: bool = Query(True, description="Incluir los logs en la respuesta"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_statistics_reader_db),
 ):
     try:
-        return await handle_get_course_detailed_statistics(
-            db, course_id, start_date, end_date
+        etag = handle_get_course_statistics_etag(
+            course_id, start_date, end_date, limit, cursor, include_logs
+        )
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
+        result = await handle_get_course_detailed_statistics(
+            db, course_id, start_date, end_date, limit, cursor, include_logs
         )
+        return FastJSONResponse(result, headers=_cache_headers(etag))
     except HTTPException as e:
         raise
     except Exception as e:
@@ -153,12 +314,30 @@ async def get_user_detailed_statistics(
     course_id: str,
     start_date: date = Query(None, description="Fecha de inicio (YYYY-MM-DD)"),
     end_date: date = Query(None, description="Fecha de fin (YYYY-MM-DD)"),
-    db: Session = Depends(get_db),
+    limit: int = Query(
+        settings.LOGS_DEFAULT_LIMIT,
+        ge=1,
+        le=settings.LOGS_MAX_LIMIT,
+        description="Cantidad máxima de logs por página",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Cursor de la página siguiente (next_cursor)"
+    ),
+    include_logs: bool = Query(True, description="Incluir los logs en la respuesta"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_statistics_reader_db),
 ):
     try:
-        return await handle_get_user_detailed_statistics(
-            db, user_id, course_id, start_date, end_date
+        etag = handle_get_user_statistics_etag(
+            user_id, course_id, start_date, end_date, limit, cursor, include_logs
+        )
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
+        result = await handle_get_user_detailed_statistics(
+            db, user_id, course_id, start_date, end_date, limit, cursor, include_logs
         )
+        return FastJSONResponse(result, headers=_cache_headers(etag))
     except HTTPException:
         raise
     except Exception as e:
@@ -173,11 +352,236 @@ async def get_user_detailed_statistics(
         )
 
 
+@router.get("/statistics/course/{course_id}/trends")
+async def get_course_trends(
+    course_id: str,
+    granularity: TrendGranularity = Query(
+        "day", description="Periodo de agrupamiento: day, week o month"
+    ),
+    start_date: date = Query(None, description="Fecha de inicio (YYYY-MM-DD)"),
+    end_date: date = Query(None, description="Fecha de fin (YYYY-MM-DD)"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_statistics_reader_db),
+):
+    try:
+        etag = handle_get_course_trends_etag(
+            course_id, granularity, start_date, end_date
+        )
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
+        result = await handle_get_course_trends(
+            db, course_id, granularity, start_date, end_date
+        )
+        return FastJSONResponse(result, headers=_cache_headers(etag))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(
+            f"Exception no manejada al obtener la evolucion del curso: {str(e)}"
+        )
+        logging.error(traceback.format_exc())
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor",
+        )
+
+
+@router.get("/statistics/user/{course_id}/{user_id}/trends")
+async def get_user_trends(
+    user_id: int,
+    course_id: str,
+    granularity: TrendGranularity = Query(
+        "day", description="Periodo de agrupamiento: day, week o month"
+    ),
+    start_date: date = Query(None, description="Fecha de inicio (YYYY-MM-DD)"),
+    end_date: date = Query(None, description="Fecha de fin (YYYY-MM-DD)"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_statistics_reader_db),
+):
+    try:
+        etag = handle_get_user_trends_etag(
+            user_id, course_id, granularity, start_date, end_date
+        )
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
+        result = await handle_get_user_trends(
+            db, user_id, course_id, granularity, start_date, end_date
+        )
+        return FastJSONResponse(result, headers=_cache_headers(etag))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(
+            f"Exception no manejada al obtener la evolucion del usuario: {str(e)}"
+        )
+        logging.error(traceback.format_exc())
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor",
+        )
+
+
+@router.get("/statistics/course/{course_id}/distribution")
+async def get_grade_distribution(
+    course_id: str,
+    assessment_id: Optional[str] = Query(
+        None, description="Tarea/examen (por defecto, todo el curso)"
+    ),
+    bin_width: float = Query(
+        1.0,
+        # Tramos mas finos que los del histograma de los rollups no aportan
+        ge=settings.GRADE_HISTOGRAM_BUCKET_WIDTH,
+        description="Ancho de los tramos",
+    ),
+    start_date: date = Query(None, description="Fecha de inicio (YYYY-MM-DD)"),
+    end_date: date = Query(None, description="Fecha de fin (YYYY-MM-DD)"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_statistics_reader_db),
+):
+    try:
+        etag = handle_get_grade_distribution_etag(
+            course_id, assessment_id, bin_width, start_date, end_date
+        )
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
+        result = await handle_get_grade_distribution(
+            db, course_id, assessment_id, bin_width, start_date, end_date
+        )
+        return FastJSONResponse(result, headers=_cache_headers(etag))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(
+            f"Exception no manejada al obtener la distribucion de notas: {str(e)}"
+        )
+        logging.error(traceback.format_exc())
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor",
+        )
+
+
+@router.get("/statistics/course/{course_id}/assessments")
+async def get_assessment_breakdown(
+    course_id: str,
+    start_date: date = Query(None, description="Fecha de inicio (YYYY-MM-DD)"),
+    end_date: date = Query(None, description="Fecha de fin (YYYY-MM-DD)"),
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        le=settings.LOGS_MAX_LIMIT,
+        description="Cantidad máxima de tareas/exámenes por página",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Cursor de la página siguiente (next_cursor)"
+    ),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_statistics_reader_db),
+):
+    try:
+        etag = handle_get_assessment_breakdown_etag(
+            course_id, start_date, end_date, limit, cursor
+        )
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
+        result = await handle_get_assessment_breakdown(
+            db, course_id, start_date, end_date, limit, cursor
+        )
+        return FastJSONResponse(result, headers=_cache_headers(etag))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(
+            f"Exception no manejada al obtener el desglose por evaluacion: {str(e)}"
+        )
+        logging.error(traceback.format_exc())
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor",
+        )
+
+
+@router.get("/statistics/course/{course_id}/ranking")
+async def get_course_ranking(
+    course_id: str,
+    order_by: RankingOrder = Query(
+        "promedio", description="Criterio del ranking: promedio o finalizacion"
+    ),
+    start_date: date = Query(None, description="Fecha de inicio (YYYY-MM-DD)"),
+    end_date: date = Query(None, description="Fecha de fin (YYYY-MM-DD)"),
+    limit: int = Query(
+        settings.LOGS_DEFAULT_LIMIT,
+        ge=1,
+        le=settings.LOGS_MAX_LIMIT,
+        description="Cantidad de alumnos por página (top N)",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Cursor de la página siguiente (next_cursor)"
+    ),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_statistics_reader_db),
+):
+    try:
+        etag = handle_get_course_ranking_etag(
+            course_id, order_by, start_date, end_date, limit, cursor
+        )
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
+        result = await handle_get_course_ranking(
+            db, course_id, order_by, start_date, end_date, limit, cursor
+        )
+        return FastJSONResponse(result, headers=_cache_headers(etag))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(
+            f"Exception no manejada al obtener el ranking del curso: {str(e)}"
+        )
+        logging.error(traceback.format_exc())
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor",
+        )
+
+
+@router.post("/statistics/courses/summary")
+async def get_courses_summary(
+    request: CoursesSummaryRequest,
+    db: Session = Depends(get_reader_db),
+):
+    try:
+        # Solo agregados, sin logs: una consulta para todos los cursos
+        result = await handle_get_courses_summary(db, request)
+        return FastJSONResponse(result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(
+            f"Exception no manejada al obtener el resumen de cursos: {str(e)}"
+        )
+        logging.error(traceback.format_exc())
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor",
+        )
+
+
 @router.post("/statistics/export-excel")
 async def export_statistics_to_excel(
     token: Annotated[str, Depends(oauth2_scheme)],
     filters: ExportFilters,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_reader_db),
 ):
     try:
         try:
@@ -188,12 +592,14 @@ async def export_statistics_to_excel(
                 detail="Credenciales de autenticación inválidas",
             )
 
-        output, filename = await handle_export_statistics_to_excel(db, filters)
+        path, filename = await handle_export_statistics_to_excel(db, filters)
 
-        return StreamingResponse(
-            io.BytesIO(output.getvalue()),
+        # El archivo se envia por partes y se borra al terminar la respuesta
+        return FileResponse(
+            path,
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={"Content-Disposition": f"attachment; filename={filename}"},
+            background=BackgroundTask(os.remove, path),
         )
 
     except HTTPException:
@@ -208,3 +614,140 @@ async def export_statistics_to_excel(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor",
         )
+
+
+@router.post("/statistics/export")
+async def export_statistics(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    filters: ExportFilters,
+    format: ExportFormat = Query("csv", description="Formato: csv, ndjson o parquet"),
+    db: Session = Depends(get_reader_db),
+):
+    try:
+        try:
+            await handle_validate_user(token)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Credenciales de autenticación inválidas",
+            )
+
+        chunks, filename, media_type = await handle_export_statistics(
+            db, filters, format
+        )
+
+        # Las filas se leen y se envian por lotes mientras dura la respuesta
+        return StreamingResponse(
+            chunks,
+            media_type=media_type,
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Exception no manejada al exportar estadisticas: {str(e)}")
+        logging.error(traceback.format_exc())
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor",
+        )
+
+
+@router.post("/statistics/export-jobs", status_code=status.HTTP_202_ACCEPTED)
+async def create_export_job(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    request: ExportJobRequest,
+):
+    try:
+        try:
+            await handle_validate_user(token)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Credenciales de autenticación inválidas",
+            )
+
+        # El archivo se genera en segundo plano; se consulta con el job_id
+        return handle_create_export_job(request)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(
+            f"Exception no manejada al crear el trabajo de exportacion: {str(e)}"
+        )
+        logging.error(traceback.format_exc())
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor",
+        )
+
+
+@router.get("/statistics/export-jobs/{job_id}")
+async def get_export_job(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    job_id: str,
+):
+    try:
+        try:
+            await handle_validate_user(token)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Credenciales de autenticación inválidas",
+            )
+
+        return handle_get_export_job(job_id)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(
+            f"Exception no manejada al consultar el trabajo de exportacion: {str(e)}"
+        )
+        logging.error(traceback.format_exc())
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor",
+        )
+
+
+@router.get("/statistics/export-jobs/{job_id}/download")
+async def download_export_job(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    job_id: str,
+):
+    try:
+        try:
+            await handle_validate_user(token)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Credenciales de autenticación inválidas",
+            )
+
+        path, filename, media_type = handle_get_export_job_file(job_id)
+
+        # El archivo se conserva hasta que el trabajo expira
+        return FileResponse(
+            path,
+            media_type=media_type,
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(
+            f"Exception no manejada al descargar el trabajo de exportacion: {str(e)}"
+        )
+        logging.error(traceback.format_exc())
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor",
+        )
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Literal, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from app.core.config import settings
 from datetime import date
 
 
@@ -52,3 +53,22 @@ class ExportFilters(BaseModel):
     course_id: Optional[str] = None
     start_date: Optional[date] = None
     end_date: Optional[date] = None
+
+
+ExportFormat = Literal["csv", "ndjson", "parquet"]
+
+TrendGranularity = Literal["day", "week", "month"]
+
+RankingOrder = Literal["promedio", "finalizacion"]
+
+
+class ExportJobRequest(ExportFilters):
+    format: Literal["xlsx", "csv", "ndjson", "parquet"] = "xlsx"
+
+
+class CoursesSummaryRequest(BaseModel):
+    course_ids: List[str] = Field(
+        min_length=1, max_length=settings.COURSES_SUMMARY_MAX_SIZE
+    )
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
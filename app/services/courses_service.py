@@ -1,38 +1,67 @@
 from fastapi import HTTPException
+from typing import Optional
 from app.core.config import settings
+from app.core.http_client import get_http_client
+from app.utils.ttl_cache import AsyncTTLCache
 import httpx
 import logging
 
+# Alumnos inscriptos por curso: course_id -> tupla de user_id
+_roster_cache: AsyncTTLCache[tuple] = AsyncTTLCache(
+    ttl=settings.COURSE_ROSTER_CACHE_TTL_SECONDS,
+    max_size=settings.COURSE_ROSTER_CACHE_MAX_SIZE,
+)
 
-async def get_course_users(course_id: str):
+
+def invalidate_course_users(course_id: str) -> None:
+    """
+    Descarta el listado cacheado del curso, para que la proxima consulta
+    vuelva a pedirlo al courses service.
+    """
+    _roster_cache.invalidate(course_id)
+
+
+async def get_course_users(course_id: str, client: Optional[httpx.AsyncClient] = None):
     """
     Obtiene los datos del curso con el courses service y devuelve el listado de user_id del curso.
+
+    El listado se cachea por COURSE_ROSTER_CACHE_TTL_SECONDS y las consultas
+    concurrentes de un mismo curso comparten una unica llamada.
     """
-    # Llamar al auth service para validar el token
-    async with httpx.AsyncClient() as client:
-        try:
-            logging.info(
-                f"Obteniendo usuarios del curso {course_id} desde {settings.COURSES_SERVICE_URL}/courses/{course_id}"
-            )
-
-            response = await client.get(
-                f"{settings.COURSES_SERVICE_URL}/courses/{course_id}",
-            )
-
-            if response.status_code == 200:
-                logging.info("Curso obtenido exitosamente")
-                course_data = response.json()
-                users_list = course_data.get("enrolled_users")
-                return users_list
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Error al obtener los usuarios del curso: {response.text}",
-            )
-
-        except httpx.RequestError as e:
-            logging.error(f"Error al conectar con el servicio de cursos: {str(e)}")
-            logging.error(f"URL: {settings.COURSES_SERVICE_URL}/courses/{course_id}")
-            raise HTTPException(
-                status_code=500,
-                detail="Error al conectar con el servicio de usuarios",
-            )
+    users = await _roster_cache.get_or_load(
+        course_id, lambda: _fetch_course_users(course_id, client)
+    )
+    return list(users) if users is not None else None
+
+
+async def _fetch_course_users(
+    course_id: str, client: Optional[httpx.AsyncClient] = None
+):
+    client = client or get_http_client()
+
+    try:
+        logging.info(
+            f"Obteniendo usuarios del curso {course_id} desde {settings.COURSES_SERVICE_URL}/courses/{course_id}"
+        )
+
+        response = await client.get(
+            f"{settings.COURSES_SERVICE_URL}/courses/{course_id}",
+        )
+
+        if response.status_code == 200:
+            logging.info("Curso obtenido exitosamente")
+            course_data = response.json()
+            users_list = course_data.get("enrolled_users")
+            return tuple(users_list) if users_list is not None else None
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Error al obtener los usuarios del curso: {response.text}",
+        )
+
+    except httpx.RequestError as e:
+        logging.error(f"Error al conectar con el servicio de cursos: {str(e)}")
+        logging.error(f"URL: {settings.COURSES_SERVICE_URL}/courses/{course_id}")
+        raise HTTPException(
+            status_code=500,
+            detail="Error al conectar con el servicio de usuarios",
+        )
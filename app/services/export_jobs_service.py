@@ -0,0 +1,237 @@
+from fastapi import HTTPException
+from app.core.config import settings
+from app.db.replica import reader_session
+from app.schemas.statistics_schemas import ExportJobRequest
+from app.repositories.statistics_repository import count_statistics_with_filters
+from app.services.export_service import EXPORT_MEDIA_TYPES, write_statistics_file
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+import uuid
+
+JOB_PENDING = "pendiente"
+JOB_RUNNING = "en_proceso"
+JOB_DONE = "completado"
+JOB_FAILED = "fallido"
+
+
+@dataclass
+class ExportJob:
+    id: str
+    request: ExportJobRequest
+    status: str = JOB_PENDING
+    total: Optional[int] = None
+    processed: int = 0
+    path: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def filename(self) -> str:
+        timestamp = datetime.fromtimestamp(self.created_at).strftime("%Y%m%d_%H%M%S")
+        return f"estadisticas_{timestamp}.{self.request.format}"
+
+
+# Nombres de los archivos de los trabajos: <job_id>.<formato>, mas .part
+# mientras se generan
+_JOB_FILE_PATTERN = re.compile(
+    rf"[0-9a-f]{{32}}\.({'|'.join(EXPORT_MEDIA_TYPES)})(\.part)?"
+)
+
+# Registro de trabajos en memoria del proceso
+_jobs: Dict[str, ExportJob] = {}
+_jobs_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.EXPORT_JOBS_WORKERS, thread_name_prefix="export"
+        )
+    return _executor
+
+
+def shutdown_export_jobs() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _remove_file(path: Optional[str]) -> None:
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def _run_export_job(job: ExportJob) -> None:
+    """
+    Genera el archivo del trabajo con una sesion de lectura propia, fuera de
+    los hilos que atienden los requests.
+    """
+    job.status = JOB_RUNNING
+    request = job.request
+    path = os.path.join(settings.EXPORT_JOBS_SPOOL_DIR, f"{job.id}.{request.format}")
+    partial_path = f"{path}.part"
+
+    def add_progress(rows: int) -> None:
+        job.processed += rows
+
+    db = reader_session()
+    try:
+        job.total = count_statistics_with_filters(
+            db,
+            user_id=request.user_id,
+            course_id=request.course_id,
+            start_date=request.start_date,
+            end_date=request.end_date,
+        )
+        if not job.total:
+            job.error = "No se encontraron estadísticas con los filtros especificados"
+            job.status = JOB_FAILED
+            return
+
+        write_statistics_file(
+            db, request, request.format, partial_path, on_progress=add_progress
+        )
+        # El archivo solo aparece con su nombre final cuando esta completo
+        os.replace(partial_path, path)
+        job.path = path
+        job.status = JOB_DONE
+    except Exception as e:
+        logging.error(f"Error en el trabajo de exportacion {job.id}: {str(e)}")
+        logging.error(traceback.format_exc())
+        _remove_file(partial_path)
+        job.error = "Error interno al generar la exportación"
+        job.status = JOB_FAILED
+    finally:
+        db.close()
+        job.finished_at = time.time()
+
+
+def purge_expired_jobs(now: Optional[float] = None) -> None:
+    """
+    Elimina los trabajos terminados hace mas de EXPORT_JOBS_TTL_SECONDS junto
+    con sus archivos.
+    """
+    now = time.time() if now is None else now
+    with _jobs_lock:
+        expired = [
+            job
+            for job in _jobs.values()
+            if job.finished_at is not None
+            and now - job.finished_at > settings.EXPORT_JOBS_TTL_SECONDS
+        ]
+        for job in expired:
+            del _jobs[job.id]
+
+    for job in expired:
+        _remove_file(job.path)
+
+
+async def purge_expired_jobs_loop() -> None:
+    """
+    Purga periodicamente los trabajos vencidos, para que sus archivos no
+    queden en disco cuando no hay pedidos de exportacion.
+    """
+    while True:
+        try:
+            purge_expired_jobs()
+        except Exception as e:
+            logging.error(f"Error al purgar las exportaciones vencidas: {str(e)}")
+        await asyncio.sleep(settings.EXPORT_JOBS_PURGE_SECONDS)
+
+
+def clear_spool_dir() -> None:
+    """
+    Borra los archivos de trabajos que quedaron de una ejecucion anterior: el
+    registro de trabajos vive en memoria, por lo que ya no pueden descargarse.
+    Solo se borran los nombres de archivos de trabajos, por si el directorio
+    es compartido.
+    """
+    spool_dir = settings.EXPORT_JOBS_SPOOL_DIR
+    if not os.path.isdir(spool_dir):
+        return
+    for name in os.listdir(spool_dir):
+        path = os.path.join(spool_dir, name)
+        if _JOB_FILE_PATTERN.fullmatch(name) and os.path.isfile(path):
+            _remove_file(path)
+
+
+def create_export_job(request: ExportJobRequest) -> ExportJob:
+    purge_expired_jobs()
+    os.makedirs(settings.EXPORT_JOBS_SPOOL_DIR, exist_ok=True)
+
+    job = ExportJob(id=uuid.uuid4().hex, request=request)
+    with _jobs_lock:
+        _jobs[job.id] = job
+    _get_executor().submit(_run_export_job, job)
+    return job
+
+
+def get_export_job(job_id: str) -> ExportJob:
+    purge_expired_jobs()
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404, detail="No se encontró el trabajo de exportación"
+        )
+    return job
+
+
+def get_export_job_file(job_id: str):
+    """
+    Devuelve la ruta, el nombre de descarga y el media type del archivo de un
+    trabajo terminado.
+    """
+    job = get_export_job(job_id)
+    if job.status != JOB_DONE:
+        raise HTTPException(
+            status_code=409,
+            detail=f"El trabajo de exportación no está completado ({job.status})",
+        )
+    return job.path, job.filename, EXPORT_MEDIA_TYPES[job.request.format]
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+
+def export_job_status(job: ExportJob) -> dict:
+    if job.total:
+        progress = job.processed / job.total * 100
+    else:
+        progress = 100 if job.status in (JOB_DONE, JOB_FAILED) else 0
+
+    return {
+        "job_id": job.id,
+        "estado": job.status,
+        "formato": job.request.format,
+        "total": job.total,
+        "procesadas": job.processed,
+        "progreso": round(min(progress, 100), 2),
+        "error": job.error,
+        "creado": _isoformat(job.created_at),
+        "finalizado": _isoformat(job.finished_at),
+        "expira": _isoformat(
+            job.finished_at + settings.EXPORT_JOBS_TTL_SECONDS
+            if job.finished_at
+            else None
+        ),
+        "descarga": (
+            f"/statistics/export-jobs/{job.id}/download"
+            if job.status == JOB_DONE
+            else None
+        ),
+    }
@@ -0,0 +1,353 @@
+from fastapi import HTTPException
+from app.schemas.statistics_schemas import ExportFilters, ExportFormat
+from app.db.executor import run_db
+from sqlalchemy.orm import Session
+from app.repositories.statistics_repository import (
+    exists_statistics_with_filters,
+    get_export_summary,
+    iter_statistics_with_filters,
+    STATISTICS_ROW_FIELDS,
+)
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+from typing import Callable, Iterator, List, Optional
+from itertools import islice
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime
+import orjson
+
+EXCEL_SHEET_NAME = "Estadísticas"
+EXCEL_COLUMNS = [
+    "ID",
+    "ID Usuario",
+    "ID Curso",
+    "Título",
+    "Tipo",
+    "Entregado",
+    "Calificación",
+    "ID Evaluación",
+    "Fecha",
+]
+EXCEL_MAX_COLUMN_WIDTH = 50
+
+# Filas que se traen de la base por cada viaje del cursor
+EXPORT_BATCH_SIZE = 1000
+
+# Columnas de los formatos para procesamiento (csv, ndjson, parquet), en el
+# orden en que las devuelve iter_statistics_with_filters
+EXPORT_FIELDS = list(STATISTICS_ROW_FIELDS)
+EXPORT_MEDIA_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _excel_row(stat) -> list:
+    return [
+        stat.id,
+        stat.user_id,
+        stat.course_id,
+        stat.titulo,
+        stat.tipo,
+        "Sí" if stat.entregado else "No",
+        stat.calificacion if stat.calificacion is not None else "Sin calificar",
+        stat.assessment_id,
+        stat.fecha.strftime("%Y-%m-%d %H:%M:%S") if stat.fecha else "Sin fecha",
+    ]
+
+
+def _excel_column_widths(summary) -> List[int]:
+    """
+    Calcula el ancho de cada columna a partir de los largos maximos que
+    devuelve la base, ya que en una hoja de solo escritura los anchos deben
+    fijarse antes de escribir las filas.
+    """
+    value_lengths = [
+        summary.id,
+        summary.user_id,
+        summary.course_id,
+        summary.titulo,
+        summary.tipo,
+        len("Sí"),
+        max(
+            summary.calificacion or 0,
+            len("Sin calificar") if summary.sin_calificar else 0,
+        ),
+        summary.assessment_id,
+        len("YYYY-MM-DD HH:MM:SS"),
+    ]
+    return [
+        min(max(len(header), length or 0) + 2, EXCEL_MAX_COLUMN_WIDTH)
+        for header, length in zip(EXCEL_COLUMNS, value_lengths)
+    ]
+
+
+def _filters_kwargs(filters: ExportFilters) -> dict:
+    return {
+        "user_id": filters.user_id,
+        "course_id": filters.course_id,
+        "start_date": filters.start_date,
+        "end_date": filters.end_date,
+    }
+
+
+def _batches(rows: Iterator) -> Iterator[list]:
+    while True:
+        batch = list(islice(rows, EXPORT_BATCH_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+def _save_excel(
+    db: Session,
+    filters: ExportFilters,
+    summary,
+    path: str,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> None:
+    # Hoja de solo escritura: las filas se vuelcan a disco a medida que llegan
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(EXCEL_SHEET_NAME)
+    for index, width in enumerate(_excel_column_widths(summary), start=1):
+        worksheet.column_dimensions[get_column_letter(index)].width = width
+
+    worksheet.append(EXCEL_COLUMNS)
+    rows = iter_statistics_with_filters(
+        db, **_filters_kwargs(filters), batch_size=EXPORT_BATCH_SIZE
+    )
+    for batch in _batches(rows):
+        for stat in batch:
+            worksheet.append(_excel_row(stat))
+        if on_progress:
+            on_progress(len(batch))
+
+    workbook.save(path)
+
+
+def _write_statistics_excel(db: Session, filters: ExportFilters) -> str:
+    summary = get_export_summary(db, **_filters_kwargs(filters))
+
+    if not summary.total:
+        raise HTTPException(
+            status_code=404,
+            detail="No se encontraron estadísticas con los filtros especificados",
+        )
+
+    fd, path = tempfile.mkstemp(prefix="estadisticas_", suffix=".xlsx")
+    os.close(fd)
+    try:
+        _save_excel(db, filters, summary, path)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+async def export_statistics_to_excel(db: Session, filters: ExportFilters):
+    """
+    Genera el Excel de las estadisticas filtradas en un archivo temporal y
+    devuelve su ruta y el nombre de descarga. Quien lo envie debe borrarlo.
+    """
+    path = await run_db(_write_statistics_excel, db, filters)
+
+    # Generar nombre de archivo con timestamp
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"estadisticas_{timestamp}.xlsx"
+
+    return path, filename
+
+
+class _CsvEncoder:
+    def start(self) -> bytes:
+        return self.encode([EXPORT_FIELDS])
+
+    def encode(self, rows) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in row
+            )
+        return buffer.getvalue().encode("utf-8")
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _NdjsonEncoder:
+    def start(self) -> bytes:
+        return b""
+
+    def encode(self, rows) -> bytes:
+        # orjson serializa las fechas en ISO 8601 y devuelve bytes UTF-8
+        return b"".join(
+            orjson.dumps(dict(zip(EXPORT_FIELDS, row))) + b"\n" for row in rows
+        )
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Destino de escritura que acumula los bytes en memoria hasta que se
+    retiran con drain().
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _ParquetEncoder:
+    """
+    Escribe cada lote como un row group de parquet y devuelve los bytes
+    producidos, de modo que el archivo se envia por partes sin armarlo entero.
+    """
+
+    def __init__(self):
+        # pyarrow solo se carga si se pide este formato
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema(
+            [
+                ("id", pa.int64()),
+                ("user_id", pa.int64()),
+                ("course_id", pa.string()),
+                ("titulo", pa.string()),
+                ("tipo", pa.string()),
+                ("entregado", pa.bool_()),
+                ("calificacion", pa.float64()),
+                ("assessment_id", pa.string()),
+                ("fecha", pa.timestamp("us")),
+            ]
+        )
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema)
+
+    def start(self) -> bytes:
+        return self._sink.drain()
+
+    def encode(self, rows) -> bytes:
+        columns = list(zip(*rows))
+        table = self._pa.Table.from_arrays(
+            [
+                self._pa.array(column, type=field.type)
+                for column, field in zip(columns, self._schema)
+            ],
+            schema=self._schema,
+        )
+        self._writer.write_table(table)
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+EXPORT_ENCODERS = {
+    "csv": _CsvEncoder,
+    "ndjson": _NdjsonEncoder,
+    "parquet": _ParquetEncoder,
+}
+
+
+def _encode_next_batch(rows: Iterator, encoder) -> Optional[bytes]:
+    # Trae y codifica el siguiente lote; None cuando no quedan filas
+    batch = next(_batches(rows), None)
+    if batch is None:
+        return None
+    return encoder.encode(batch)
+
+
+async def _stream_export(db: Session, filters: ExportFilters, encoder):
+    rows = await run_db(
+        iter_statistics_with_filters,
+        db,
+        **_filters_kwargs(filters),
+        batch_size=EXPORT_BATCH_SIZE,
+    )
+
+    yield encoder.start()
+    while True:
+        chunk = await run_db(_encode_next_batch, rows, encoder)
+        if chunk is None:
+            break
+        yield chunk
+    yield await run_db(encoder.finish)
+
+
+def write_statistics_file(
+    db: Session,
+    filters: ExportFilters,
+    export_format: str,
+    path: str,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> None:
+    """
+    Escribe en path las estadisticas filtradas en el formato pedido (xlsx,
+    csv, ndjson o parquet), de a EXPORT_BATCH_SIZE filas. on_progress recibe
+    la cantidad de filas de cada lote escrito.
+    """
+    if export_format == "xlsx":
+        summary = get_export_summary(db, **_filters_kwargs(filters))
+        _save_excel(db, filters, summary, path, on_progress)
+        return
+
+    encoder = EXPORT_ENCODERS[export_format]()
+    rows = iter_statistics_with_filters(
+        db, **_filters_kwargs(filters), batch_size=EXPORT_BATCH_SIZE
+    )
+    with open(path, "wb") as file:
+        file.write(encoder.start())
+        for batch in _batches(rows):
+            file.write(encoder.encode(batch))
+            if on_progress:
+                on_progress(len(batch))
+        file.write(encoder.finish())
+
+
+async def export_statistics(
+    db: Session, filters: ExportFilters, export_format: ExportFormat
+):
+    """
+    Exporta las estadisticas filtradas en csv, ndjson o parquet. Devuelve un
+    iterador asincronico con el contenido, que se lee de la base y se codifica
+    de a EXPORT_BATCH_SIZE filas, el nombre de descarga y el media type.
+    """
+    exists = await run_db(
+        exists_statistics_with_filters, db, **_filters_kwargs(filters)
+    )
+    if not exists:
+        raise HTTPException(
+            status_code=404,
+            detail="No se encontraron estadísticas con los filtros especificados",
+        )
+
+    encoder = EXPORT_ENCODERS[export_format]()
+    chunks = _stream_export(db, filters, encoder)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"estadisticas_{timestamp}.{export_format}"
+
+    return chunks, filename, EXPORT_MEDIA_TYPES[export_format]
@@ -0,0 +1,124 @@
+from app.core.config import settings
+from app.utils.ttl_cache import AsyncTTLCache
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, Iterable, Optional, Tuple
+import hashlib
+import time
+import uuid
+
+# Version y hora (time.time) de la ultima escritura por alcance: ("global",),
+# ("course", course_id) y ("user", course_id, user_id). Cada escritura da a lo
+# que toca la siguiente version de un contador unico, y las respuestas se
+# cachean bajo las versiones con que se leyeron. La hora evita leer el alcance
+# de una replica que todavia no aplico la escritura.
+#
+# Se guardan a lo sumo RESPONSE_CACHE_MAX_SCOPES alcances, desalojando los
+# escritos hace mas tiempo. Un alcance desalojado toma la mayor version y hora
+# desalojadas, que no son menores que las suyas: su version nunca retrocede y
+# a lo sumo invalida de mas.
+_scopes_written: "OrderedDict[Tuple, Tuple[int, float]]" = OrderedDict()
+_last_version = 0
+_evicted: Tuple[int, float] = (0, 0.0)
+
+# Distingue los ETag de esta ejecucion de los de una anterior, ya que las
+# versiones vuelven a cero al reiniciar
+_epoch = uuid.uuid4().hex
+
+_response_cache: AsyncTTLCache[dict] = AsyncTTLCache(
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    max_size=settings.RESPONSE_CACHE_MAX_SIZE,
+)
+
+
+def _scopes(course_id: Optional[str] = None, user_id: Optional[int] = None):
+    scopes = [("global",)]
+    if course_id is not None:
+        scopes.append(("course", course_id))
+        if user_id is not None:
+            scopes.append(("user", course_id, user_id))
+    return scopes
+
+
+def invalidate_statistics(course_id: str, user_ids: Iterable[int] = ()) -> None:
+    """
+    Invalida las respuestas cacheadas de las estadisticas globales, del curso y
+    de los usuarios indicados dentro del curso. Debe llamarse despues del
+    commit de la escritura.
+    """
+    global _last_version, _evicted
+    scopes = _scopes(course_id)
+    scopes.extend(("user", course_id, user_id) for user_id in user_ids)
+    _last_version += 1
+    now = time.time()
+    for scope in scopes:
+        _scopes_written[scope] = (_last_version, now)
+        _scopes_written.move_to_end(scope)
+
+    while len(_scopes_written) > max(settings.RESPONSE_CACHE_MAX_SCOPES, 1):
+        _, (version, written_at) = _scopes_written.popitem(last=False)
+        _evicted = (max(_evicted[0], version), max(_evicted[1], written_at))
+
+
+def _scope_written(course_id: Optional[str], user_id: Optional[int]):
+    # Una consulta de curso depende de su curso; una de usuario, de su fila
+    scope = _scopes(course_id, user_id)[-1]
+    return _scopes_written.get(scope, _evicted)
+
+
+def clear_statistics_cache() -> None:
+    global _last_version, _evicted
+    _scopes_written.clear()
+    _last_version = 0
+    _evicted = (0, 0.0)
+    _response_cache.clear()
+
+
+def _cache_key(
+    name: str,
+    course_id: Optional[str] = None,
+    user_id: Optional[int] = None,
+    params: Tuple = (),
+) -> Tuple:
+    version, _ = _scope_written(course_id, user_id)
+    return (name, course_id, user_id, params, version)
+
+
+def statistics_written_at(
+    course_id: Optional[str] = None, user_id: Optional[int] = None
+) -> float:
+    """
+    Hora de la ultima escritura que invalido el alcance de la consulta, o una
+    posterior si el alcance fue desalojado (0 si no hubo ninguna).
+    """
+    _, written_at = _scope_written(course_id, user_id)
+    return written_at
+
+
+def statistics_etag(
+    name: str,
+    course_id: Optional[str] = None,
+    user_id: Optional[int] = None,
+    params: Tuple = (),
+) -> str:
+    """
+    ETag de la respuesta, calculado sin consultar la base: cambia solo cuando
+    una escritura invalida el alcance de la consulta.
+    """
+    key = _cache_key(name, course_id, user_id, params)
+    digest = hashlib.sha256(repr((_epoch, key)).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+async def cached_statistics(
+    name: str,
+    loader: Callable[[], Awaitable[dict]],
+    course_id: Optional[str] = None,
+    user_id: Optional[int] = None,
+    params: Tuple = (),
+) -> dict:
+    """
+    Devuelve la respuesta cacheada para la consulta o la carga con loader. Las
+    cargas concurrentes de una misma consulta comparten una sola ejecucion.
+    """
+    key: Hashable = _cache_key(name, course_id, user_id, params)
+    return await _response_cache.get_or_load(key, loader)
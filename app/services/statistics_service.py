@@ -2,83 +2,228 @@ from fastapi import HTTPException
 from app.schemas.statistics_schemas import (
     UserStatisticsEvent,
     CourseStatisticsEvent,
-    ExportFilters,
 )
-from app.services.courses_service import get_course_users
+from app.services.courses_service import get_course_users, invalidate_course_users
+from app.db.executor import run_db
+from app.core.config import settings
 from sqlalchemy.orm import Session
 from app.repositories.statistics_repository import (
-    find_statistics_by_user_and_assessment_id,
-    update_statistics,
-    create_statistics,
-    get_average_grade,
-    get_completion_stats,
+    mark_statistics_delivered,
+    upsert_course_statistics,
+    get_aggregate_stats,
     get_course_statistics,
     get_user_course_statistics,
-    get_all_statistics_with_filters,
+    get_statistics_buckets,
+    get_grade_histogram_from_statistics,
+    get_grade_range,
+    get_courses_aggregate_stats,
+    get_course_assessment_stats,
+    get_course_ranking,
+    STATISTICS_ROW_FIELDS,
 )
-import pandas as pd
-import io
-from datetime import datetime
+from app.repositories.rollup_repository import (
+    RollupDeltas,
+    get_rollup_stats,
+    get_course_day_rollup_buckets,
+    get_grade_histogram,
+    get_courses_rollup_stats,
+)
+from app.db.date_bucket import bucket_start
+from app.models.statistics_dictionary_model import ASSESSMENT_TYPES
+from app.services.statistics_cache import (
+    cached_statistics,
+    invalidate_statistics,
+    statistics_etag,
+)
+from app.utils.pagination import (
+    encode_cursor,
+    decode_cursor,
+    encode_key_cursor,
+    decode_key_cursor,
+)
+from typing import List, Optional, Tuple
+import asyncio
+import logging
+import math
+import traceback
 
 
-async def process_user_event(db: Session, event: UserStatisticsEvent):
-    # Buscar si ya existe una entrada para este usuario y tarea/examen
-    existing_stat = find_statistics_by_user_and_assessment_id(
+def _apply_user_event(
+    db: Session,
+    event: UserStatisticsEvent,
+    commit: bool = True,
+    deltas: Optional[RollupDeltas] = None,
+) -> str:
+    # Si es calificado es porque ya se entregó
+    calificacion = event.data.nota if event.event == "Calificado" else None
+
+    course_id = mark_statistics_delivered(
         db,
         user_id=event.id_user,
         assessment_id=event.assessment_id,
         tipo=event.notification_type,
+        calificacion=calificacion,
+        commit=commit,
+        deltas=deltas,
     )
 
-    if existing_stat:
-        # Actualizar estadística existente
-        if event.event == "Entregado":
-            update_statistics(db, existing_stat, entregado=True)
-        elif event.event == "Calificado":
-            # Si es calificado es porque ya se entregó
-            update_statistics(
-                db, existing_stat, entregado=True, calificacion=event.data.nota
-            )
-    else:
+    if course_id is None:
         raise HTTPException(
             status_code=404,
             detail="No se encontró una estadística existente para este usuario y tarea/examen.",
         )
+    return course_id
+
+
+async def process_user_event(db: Session, event: UserStatisticsEvent):
+    course_id = await run_db(_apply_user_event, db, event)
+    invalidate_statistics(course_id, [event.id_user])
+
+
+def _apply_course_event(
+    db: Session,
+    event: CourseStatisticsEvent,
+    user_list,
+    commit: bool = True,
+    deltas: Optional[RollupDeltas] = None,
+):
+    # Eliminar duplicados conservando el orden del listado
+    user_ids = list(dict.fromkeys(user_list))
+
+    upsert_course_statistics(
+        db,
+        user_ids=user_ids,
+        assessment_id=event.assessment_id,
+        tipo=event.notification_type,
+        titulo=event.data.titulo,
+        course_id=event.course_id,
+        commit=commit,
+        deltas=deltas,
+    )
+
+
+def _refresh_rosters(events: List[CourseStatisticsEvent]) -> None:
+    # Una tarea/examen nuevo debe crear la fila de cada alumno inscripto hasta
+    # ahora: su listado se vuelve a pedir. Las actualizaciones siguientes
+    # reusan el cacheado
+    for course_id in {event.course_id for event in events if event.event == "Nuevo"}:
+        invalidate_course_users(course_id)
 
 
 async def process_course_event(db: Session, event: CourseStatisticsEvent):
     # Obtener usuarios del curso
+    _refresh_rosters([event])
     user_list = await get_course_users(event.course_id)
 
-    for id_user in user_list:
-        existing_stat = find_statistics_by_user_and_assessment_id(
-            db,
-            user_id=id_user,
-            assessment_id=event.assessment_id,
-            tipo=event.notification_type,
-        )
+    await run_db(_apply_course_event, db, event, user_list)
+    invalidate_statistics(event.course_id, user_list or [])
 
-        if existing_stat:
-            update_statistics(db, existing_stat, titulo=event.data.titulo)
-        else:
-            create_statistics(
-                db,
-                user_id=id_user,
-                assessment_id=event.assessment_id,
-                titulo=event.data.titulo,
-                tipo=event.notification_type,
-                entregado=False,
-                course_id=event.course_id,
-            )
 
+def _batch_item_error(index: int, error: Exception) -> dict:
+    if isinstance(error, HTTPException):
+        return {"index": index, "success": False, "detail": error.detail}
 
-async def get_global_statistics(db: Session):
-    # Obtener promedio de calificaciones
-    avg_grade = get_average_grade(db)
+    logging.error(f"Error al procesar el evento {index} del lote: {str(error)}")
+    logging.error(
+        "".join(traceback.format_exception(type(error), error, error.__traceback__))
+    )
+    return {
+        "index": index,
+        "success": False,
+        "detail": "Error interno al procesar el evento",
+    }
+
+
+def _apply_user_events_batch(
+    db: Session, events: List[UserStatisticsEvent]
+) -> Tuple[List[dict], List[tuple]]:
+    results = []
+    touched = []
+    batch_deltas = RollupDeltas()
+    for index, event in enumerate(events):
+        try:
+            # Las variaciones de un evento descartado no se suman al lote
+            event_deltas = RollupDeltas()
+            with db.begin_nested():
+                course_id = _apply_user_event(
+                    db, event, commit=False, deltas=event_deltas
+                )
+            batch_deltas.extend(event_deltas)
+            touched.append((course_id, [event.id_user]))
+            results.append({"index": index, "success": True, "detail": None})
+        except Exception as e:
+            results.append(_batch_item_error(index, e))
+
+    # Los rollups se actualizan una sola vez, al final del lote
+    batch_deltas.apply(db)
+    db.commit()
+    return results, touched
+
+
+async def process_user_events_batch(
+    db: Session, events: List[UserStatisticsEvent]
+) -> List[dict]:
+    """
+    Procesa un lote de eventos de usuario en una unica transaccion.
+
+    Cada evento se aplica dentro de un savepoint, de modo que un evento
+    invalido se descarta sin afectar al resto del lote.
+    """
+    results, touched = await run_db(_apply_user_events_batch, db, events)
+    for course_id, user_ids in touched:
+        invalidate_statistics(course_id, user_ids)
+    return results
+
+
+def _apply_course_events_batch(
+    db: Session, events: List[CourseStatisticsEvent], rosters: dict
+) -> List[dict]:
+    results = []
+    batch_deltas = RollupDeltas()
+    for index, event in enumerate(events):
+        try:
+            user_list = rosters[event.course_id]
+            if isinstance(user_list, Exception):
+                raise user_list
+            event_deltas = RollupDeltas()
+            with db.begin_nested():
+                _apply_course_event(
+                    db, event, user_list, commit=False, deltas=event_deltas
+                )
+            batch_deltas.extend(event_deltas)
+            results.append({"index": index, "success": True, "detail": None})
+        except Exception as e:
+            results.append(_batch_item_error(index, e))
+
+    batch_deltas.apply(db)
+    db.commit()
+    return results
+
+
+async def process_course_events_batch(
+    db: Session, events: List[CourseStatisticsEvent]
+) -> List[dict]:
+    """
+    Procesa un lote de eventos de curso en una unica transaccion.
+
+    Los listados de usuarios se obtienen una sola vez por curso y en paralelo.
+    """
+    _refresh_rosters(events)
+    course_ids = list(dict.fromkeys(event.course_id for event in events))
+    user_lists = await asyncio.gather(
+        *(get_course_users(course_id) for course_id in course_ids),
+        return_exceptions=True,
+    )
+    rosters = dict(zip(course_ids, user_lists))
 
-    # Obtener estadisticas de finalizacion
-    total_assignments, completed_assignments = get_completion_stats(db)
+    results = await run_db(_apply_course_events_batch, db, events, rosters)
+    for event, result in zip(events, results):
+        if result["success"]:
+            invalidate_statistics(event.course_id, rosters[event.course_id] or [])
+    return results
 
+
+def _summary(avg_grade: float, total_assignments: int, completed_assignments: int):
     completion_rate = (
         (completed_assignments / total_assignments * 100)
         if total_assignments > 0
@@ -93,157 +238,639 @@ async def get_global_statistics(db: Session):
     }
 
 
-async def get_course_detailed_statistics(
-    db: Session, course_id: str, start_date=None, end_date=None
+def _get_aggregates(
+    db: Session,
+    user_id: Optional[int] = None,
+    course_id: Optional[str] = None,
+    start_date=None,
+    end_date=None,
 ):
-    avg_grade = get_average_grade(
-        db, course_id=course_id, start_date=start_date, end_date=end_date
-    )
+    # Sin filtro de fechas los agregados se leen de los rollups
+    if start_date is None and end_date is None:
+        return get_rollup_stats(db, user_id=user_id, course_id=course_id)
+    return get_aggregate_stats(db, user_id, course_id, start_date, end_date)
 
-    # Obtener estadisticas de finalizacion
-    total_assignments, completed_assignments = get_completion_stats(
-        db, course_id=course_id, start_date=start_date, end_date=end_date
-    )
 
-    completion_rate = (
-        (completed_assignments / total_assignments * 100)
-        if total_assignments > 0
-        else 0
+def global_statistics_etag() -> str:
+    return statistics_etag("global")
+
+
+async def _load_global_statistics(db: Session):
+    # Promedio de calificaciones y estadisticas de finalizacion
+    avg_grade, total_assignments, completed_assignments = await run_db(
+        _get_aggregates, db
     )
-    statistics = get_course_statistics(db, course_id, start_date, end_date)
+
+    return _summary(avg_grade, total_assignments, completed_assignments)
+
+
+async def get_global_statistics(db: Session):
+    return await cached_statistics("global", lambda: _load_global_statistics(db))
+
+
+def _decode_cursor(cursor: Optional[str], decode=decode_cursor):
+    if cursor is None:
+        return None
+    try:
+        return decode(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _decode_typed_key_cursor(value: str, *types) -> tuple:
+    # El cursor llega del cliente: sus valores deben tener el tipo de la clave
+    values = decode_key_cursor(value, len(types))
+    if not all(
+        isinstance(item, expected) and not isinstance(item, bool)
+        for item, expected in zip(values, types)
+    ):
+        raise ValueError("Cursor de paginacion invalido")
+    return values
+
+
+def _decode_assessment_cursor(value: str) -> Tuple[str, str]:
+    assessment_id, tipo = _decode_typed_key_cursor(value, str, str)
+    if tipo not in ASSESSMENT_TYPES:
+        raise ValueError("Cursor de paginacion invalido")
+    return assessment_id, tipo
+
+
+def _decode_ranking_cursor(value: str) -> Tuple[int, int]:
+    return _decode_typed_key_cursor(value, int, int)
+
+
+def _logs_page(statistics, limit: int) -> dict:
+    # El repositorio trae una fila extra para saber si hay otra pagina
+    page = statistics[:limit]
+    has_more = len(statistics) > limit
     return {
-        "promedio_calificaciones": round(avg_grade, 2),
-        "tasa_finalizacion": round(completion_rate, 2),
-        "total_asignaciones": total_assignments,
-        "asignaciones_completadas": completed_assignments,
-        "course_id": course_id,
-        "logs": [
-            {
-                "id": stat.id,
-                "user_id": stat.user_id,
-                "course_id": stat.course_id,
-                "titulo": stat.titulo,
-                "tipo": stat.tipo,
-                "entregado": stat.entregado,
-                "calificacion": stat.calificacion,
-                "assessment_id": stat.assessment_id,
-                "fecha": stat.date.isoformat() if stat.date else None,
-            }
-            for stat in statistics
-        ],
+        # La fecha queda como datetime: la serializa FastJSONResponse
+        "logs": [dict(zip(STATISTICS_ROW_FIELDS, row)) for row in page],
+        "next_cursor": (
+            encode_cursor(page[-1].fecha, page[-1].id) if has_more and page else None
+        ),
     }
 
 
-async def get_user_detailed_statistics(
-    db: Session, user_id: int, course_id: str, start_date=None, end_date=None
+async def _load_course_detailed_statistics(
+    db: Session,
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: int = settings.LOGS_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    include_logs: bool = True,
 ):
-    avg_grade = get_average_grade(
+    position = _decode_cursor(cursor)
+
+    avg_grade, total_assignments, completed_assignments = await run_db(
+        _get_aggregates,
         db,
-        user_id=user_id,
         course_id=course_id,
         start_date=start_date,
         end_date=end_date,
     )
 
-    total_assignments, completed_assignments = get_completion_stats(
+    result = {
+        **_summary(avg_grade, total_assignments, completed_assignments),
+        "course_id": course_id,
+    }
+    if include_logs:
+        statistics = await run_db(
+            get_course_statistics,
+            db,
+            course_id,
+            start_date,
+            end_date,
+            limit=limit,
+            cursor=position,
+        )
+        result.update(_logs_page(statistics, limit))
+    return result
+
+
+async def _load_user_detailed_statistics(
+    db: Session,
+    user_id: int,
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: int = settings.LOGS_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    include_logs: bool = True,
+):
+    position = _decode_cursor(cursor)
+
+    avg_grade, total_assignments, completed_assignments = await run_db(
+        _get_aggregates,
         db,
         user_id=user_id,
         course_id=course_id,
         start_date=start_date,
         end_date=end_date,
     )
-    completion_rate = (
-        (completed_assignments / total_assignments * 100)
-        if total_assignments > 0
-        else 0
+
+    result = {
+        **_summary(avg_grade, total_assignments, completed_assignments),
+        "course_id": course_id,
+    }
+    if include_logs:
+        statistics = await run_db(
+            get_user_course_statistics,
+            db,
+            user_id,
+            course_id,
+            start_date,
+            end_date,
+            limit=limit,
+            cursor=position,
+        )
+        result.update(_logs_page(statistics, limit))
+    return result
+
+
+def course_statistics_etag(
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: int = settings.LOGS_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    include_logs: bool = True,
+) -> str:
+    params = (start_date, end_date, limit, cursor, include_logs)
+    return statistics_etag("course", course_id, params=params)
+
+
+async def get_course_detailed_statistics(
+    db: Session,
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: int = settings.LOGS_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    include_logs: bool = True,
+):
+    params = (start_date, end_date, limit, cursor, include_logs)
+    return await cached_statistics(
+        "course",
+        lambda: _load_course_detailed_statistics(db, course_id, *params),
+        course_id=course_id,
+        params=params,
     )
-    statistics = get_user_course_statistics(
-        db, user_id, course_id, start_date, end_date
+
+
+def user_statistics_etag(
+    user_id: int,
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: int = settings.LOGS_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    include_logs: bool = True,
+) -> str:
+    params = (start_date, end_date, limit, cursor, include_logs)
+    return statistics_etag("user", course_id, user_id, params=params)
+
+
+async def get_user_detailed_statistics(
+    db: Session,
+    user_id: int,
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: int = settings.LOGS_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    include_logs: bool = True,
+):
+    params = (start_date, end_date, limit, cursor, include_logs)
+    return await cached_statistics(
+        "user",
+        lambda: _load_user_detailed_statistics(db, user_id, course_id, *params),
+        course_id=course_id,
+        user_id=user_id,
+        params=params,
     )
+
+
+def _trend_bucket(row) -> dict:
     return {
-        "promedio_calificaciones": round(avg_grade, 2),
-        "tasa_finalizacion": round(completion_rate, 2),
-        "total_asignaciones": total_assignments,
-        "asignaciones_completadas": completed_assignments,
-        "course_id": course_id,
-        "logs": [
-            {
-                "id": stat.id,
-                "user_id": stat.user_id,
-                "course_id": stat.course_id,
-                "titulo": stat.titulo,
-                "tipo": stat.tipo,
-                "entregado": stat.entregado,
-                "calificacion": stat.calificacion,
-                "assessment_id": stat.assessment_id,
-                "fecha": stat.date.isoformat(),
-            }
-            for stat in statistics
-        ],
+        "periodo": bucket_start(row.bucket).isoformat(),
+        "total_asignaciones": row.total,
+        "asignaciones_completadas": row.completed,
+        "asignaciones_calificadas": row.graded,
+        "promedio_calificaciones": (
+            round(row.grade_sum / row.graded, 2) if row.graded else 0.0
+        ),
     }
 
 
-async def export_statistics_to_excel(db: Session, filters: ExportFilters):
-    statistics = get_all_statistics_with_filters(
-        db,
-        user_id=filters.user_id,
-        course_id=filters.course_id,
-        start_date=filters.start_date,
-        end_date=filters.end_date,
+def _get_trend_buckets(
+    db: Session,
+    granularity: str,
+    user_id: Optional[int] = None,
+    course_id: Optional[str] = None,
+    start_date=None,
+    end_date=None,
+):
+    # Los rollups diarios son por curso y por dia completo: no sirven para un
+    # usuario ni para la fecha de fin, que se compara contra la fecha y hora
+    if user_id is None and end_date is None:
+        return get_course_day_rollup_buckets(db, course_id, granularity, start_date)
+    return get_statistics_buckets(
+        db, granularity, user_id, course_id, start_date, end_date
+    )
+
+
+async def _load_trends(
+    db: Session,
+    granularity: str,
+    user_id: Optional[int] = None,
+    course_id: Optional[str] = None,
+    start_date=None,
+    end_date=None,
+):
+    rows = await run_db(
+        _get_trend_buckets, db, granularity, user_id, course_id, start_date, end_date
+    )
+
+    result = {"course_id": course_id, "granularidad": granularity}
+    if user_id is not None:
+        result["user_id"] = user_id
+    result["periodos"] = [_trend_bucket(row) for row in rows]
+    return result
+
+
+def course_trends_etag(
+    course_id: str, granularity: str = "day", start_date=None, end_date=None
+) -> str:
+    params = (granularity, start_date, end_date)
+    return statistics_etag("course_trends", course_id, params=params)
+
+
+async def get_course_trends(
+    db: Session,
+    course_id: str,
+    granularity: str = "day",
+    start_date=None,
+    end_date=None,
+):
+    params = (granularity, start_date, end_date)
+    return await cached_statistics(
+        "course_trends",
+        lambda: _load_trends(db, granularity, None, course_id, start_date, end_date),
+        course_id=course_id,
+        params=params,
+    )
+
+
+def user_trends_etag(
+    user_id: int,
+    course_id: str,
+    granularity: str = "day",
+    start_date=None,
+    end_date=None,
+) -> str:
+    params = (granularity, start_date, end_date)
+    return statistics_etag("user_trends", course_id, user_id, params=params)
+
+
+async def get_user_trends(
+    db: Session,
+    user_id: int,
+    course_id: str,
+    granularity: str = "day",
+    start_date=None,
+    end_date=None,
+):
+    params = (granularity, start_date, end_date)
+    return await cached_statistics(
+        "user_trends",
+        lambda: _load_trends(db, granularity, user_id, course_id, start_date, end_date),
+        course_id=course_id,
+        user_id=user_id,
+        params=params,
     )
 
-    if not statistics:
+
+DISTRIBUTION_PERCENTILES = (25, 50, 75, 90)
+
+
+def _bucket_value(bucket: int) -> float:
+    return round(bucket * settings.GRADE_HISTOGRAM_BUCKET_WIDTH, 6)
+
+
+def _value_at(histogram, index: int) -> float:
+    seen = 0
+    for row in histogram:
+        seen += row.count
+        if index < seen:
+            return _bucket_value(row.bucket)
+    return _bucket_value(histogram[-1].bucket)
+
+
+def _percentile(histogram, total: int, percentile: int, grade_range) -> float:
+    """
+    Percentil aproximado con interpolacion lineal entre posiciones (como
+    percentile_cont), tomando cada nota como el inicio de su tramo del
+    histograma y acotado a las notas minima y maxima exactas.
+    """
+    position = percentile / 100 * (total - 1)
+    lower = _value_at(histogram, math.floor(position))
+    upper = _value_at(histogram, math.ceil(position))
+    value = lower + (upper - lower) * (position - math.floor(position))
+    return round(min(max(value, grade_range.minimo), grade_range.maximo), 2)
+
+
+def _histogram_bins(histogram, bin_width: float) -> List[dict]:
+    # Se suman los tramos finos en tramos de bin_width, sin dejar huecos
+    counts = {}
+    for row in histogram:
+        index = math.floor(_bucket_value(row.bucket) / bin_width + 1e-9)
+        counts[index] = counts.get(index, 0) + row.count
+    if not counts:
+        return []
+    if max(counts) - min(counts) + 1 > settings.DISTRIBUTION_MAX_BINS:
         raise HTTPException(
-            status_code=404,
-            detail="No se encontraron estadísticas con los filtros especificados",
+            status_code=400,
+            detail=(
+                "El histograma supera los "
+                f"{settings.DISTRIBUTION_MAX_BINS} tramos; use un bin_width mayor"
+            ),
         )
+    return [
+        {
+            "desde": round(index * bin_width, 6),
+            "hasta": round((index + 1) * bin_width, 6),
+            "cantidad": counts.get(index, 0),
+        }
+        for index in range(min(counts), max(counts) + 1)
+    ]
 
-    # Convertir a DataFrame
-    data = []
-    for stat in statistics:
-        data.append(
-            {
-                "ID": stat.id,
-                "ID Usuario": stat.user_id,
-                "ID Curso": stat.course_id,
-                "Título": stat.titulo,
-                "Tipo": stat.tipo,
-                "Entregado": "Sí" if stat.entregado else "No",
-                "Calificación": stat.calificacion
-                if stat.calificacion is not None
-                else "Sin calificar",
-                "ID Evaluación": stat.assessment_id,
-                "Fecha": stat.date.strftime("%Y-%m-%d %H:%M:%S")
-                if stat.date
-                else "Sin fecha",
-            }
+
+def _get_grade_histogram(
+    db: Session,
+    course_id: str,
+    assessment_id: Optional[str] = None,
+    start_date=None,
+    end_date=None,
+):
+    """
+    Devuelve el histograma de las calificaciones y sus extremos exactos
+    (None si no hay calificaciones).
+    """
+    # El histograma de los rollups no guarda fechas
+    if start_date is None and end_date is None:
+        histogram = get_grade_histogram(db, course_id, assessment_id)
+    else:
+        histogram = get_grade_histogram_from_statistics(
+            db, course_id, assessment_id, start_date, end_date
         )
+    if not histogram:
+        return histogram, None
+    grade_range = get_grade_range(db, course_id, assessment_id, start_date, end_date)
+    return histogram, grade_range
+
+
+async def _load_grade_distribution(
+    db: Session,
+    course_id: str,
+    assessment_id: Optional[str] = None,
+    bin_width: float = 1.0,
+    start_date=None,
+    end_date=None,
+):
+    histogram, grade_range = await run_db(
+        _get_grade_histogram, db, course_id, assessment_id, start_date, end_date
+    )
+    total = sum(row.count for row in histogram)
+
+    return {
+        "course_id": course_id,
+        "assessment_id": assessment_id,
+        "calificadas": total,
+        "minimo": grade_range.minimo if total else None,
+        "maximo": grade_range.maximo if total else None,
+        "percentiles": {
+            f"p{percentile}": (
+                _percentile(histogram, total, percentile, grade_range)
+                if total
+                else None
+            )
+            for percentile in DISTRIBUTION_PERCENTILES
+        },
+        "histograma": _histogram_bins(histogram, bin_width),
+    }
+
+
+def grade_distribution_etag(
+    course_id: str,
+    assessment_id: Optional[str] = None,
+    bin_width: float = 1.0,
+    start_date=None,
+    end_date=None,
+) -> str:
+    params = (assessment_id, bin_width, start_date, end_date)
+    return statistics_etag("grade_distribution", course_id, params=params)
+
+
+async def get_grade_distribution(
+    db: Session,
+    course_id: str,
+    assessment_id: Optional[str] = None,
+    bin_width: float = 1.0,
+    start_date=None,
+    end_date=None,
+):
+    params = (assessment_id, bin_width, start_date, end_date)
+    return await cached_statistics(
+        "grade_distribution",
+        lambda: _load_grade_distribution(db, course_id, *params),
+        course_id=course_id,
+        params=params,
+    )
+
+
+def _get_courses_aggregates(
+    db: Session, course_ids: List[str], start_date=None, end_date=None
+):
+    # Sin filtro de fechas los agregados se leen de los rollups de cada curso
+    if start_date is None and end_date is None:
+        return get_courses_rollup_stats(db, course_ids)
+    return get_courses_aggregate_stats(db, course_ids, start_date, end_date)
+
+
+async def get_courses_summary(
+    db: Session, course_ids: List[str], start_date=None, end_date=None
+):
+    """
+    Resumen de varios cursos con una sola consulta. Los cursos sin
+    estadisticas se devuelven en cero, en el orden pedido.
+    """
+    course_ids = list(dict.fromkeys(course_ids))
+    rows = await run_db(_get_courses_aggregates, db, course_ids, start_date, end_date)
+    by_course = {row.course_id: row for row in rows}
+
+    courses = []
+    for course_id in course_ids:
+        row = by_course.get(course_id)
+        if row is None:
+            summary = _summary(0.0, 0, 0)
+        else:
+            avg_grade = row.grade_sum / row.graded if row.graded else 0.0
+            summary = _summary(avg_grade, row.total, row.completed)
+        courses.append({"course_id": course_id, **summary})
+
+    return {"cursos": courses}
+
+
+def _assessment_entry(row) -> dict:
+    return {
+        "assessment_id": row.assessment_id,
+        "tipo": row.tipo,
+        "titulo": row.titulo,
+        **_summary(row.avg_grade or 0.0, row.total, row.completed),
+        "asignaciones_calificadas": row.graded,
+    }
+
+
+async def _load_assessment_breakdown(
+    db: Session,
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+):
+    position = _decode_cursor(cursor, _decode_assessment_cursor)
+
+    rows = await run_db(
+        get_course_assessment_stats,
+        db,
+        course_id,
+        start_date,
+        end_date,
+        limit=limit,
+        cursor=position,
+    )
+    # Sin limite se devuelven todas las tareas/examenes del curso
+    page = rows[:limit] if limit is not None else rows
+    has_more = limit is not None and len(rows) > limit
+
+    return {
+        "course_id": course_id,
+        "evaluaciones": [_assessment_entry(row) for row in page],
+        "next_cursor": (
+            encode_key_cursor(page[-1].assessment_id, page[-1].tipo)
+            if has_more and page
+            else None
+        ),
+    }
+
 
-    df = pd.DataFrame(data)
-
-    # Crear archivo Excel en memoria
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        df.to_excel(writer, sheet_name="Estadísticas", index=False)
-
-        # Ajustar ancho de columnas
-        worksheet = writer.sheets["Estadísticas"]
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-
-    output.seek(0)
-
-    # Generar nombre de archivo con timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"estadisticas_{timestamp}.xlsx"
-
-    return output, filename
+def assessment_breakdown_etag(
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> str:
+    params = (start_date, end_date, limit, cursor)
+    return statistics_etag("assessment_breakdown", course_id, params=params)
+
+
+async def get_assessment_breakdown(
+    db: Session,
+    course_id: str,
+    start_date=None,
+    end_date=None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+):
+    params = (start_date, end_date, limit, cursor)
+    return await cached_statistics(
+        "assessment_breakdown",
+        lambda: _load_assessment_breakdown(db, course_id, *params),
+        course_id=course_id,
+        params=params,
+    )
+
+
+def _ranking_entry(row) -> dict:
+    return {
+        "posicion": row.position,
+        "user_id": row.user_id,
+        "promedio_calificaciones": round(row.avg_grade or 0.0, 2),
+        "tasa_finalizacion": round((row.completion_rate or 0.0) * 100, 2),
+        "total_asignaciones": row.total,
+        "asignaciones_completadas": row.completed,
+    }
+
+
+async def _load_course_ranking(
+    db: Session,
+    course_id: str,
+    order: str = "promedio",
+    start_date=None,
+    end_date=None,
+    limit: int = settings.LOGS_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+):
+    position = _decode_cursor(cursor, _decode_ranking_cursor)
+
+    rows = await run_db(
+        get_course_ranking,
+        db,
+        course_id,
+        order,
+        start_date,
+        end_date,
+        # Sin filtro de fechas los contadores por usuario salen de los rollups
+        from_rollups=start_date is None and end_date is None,
+        limit=limit,
+        cursor=position,
+    )
+    page = rows[:limit]
+    has_more = len(rows) > limit
+
+    return {
+        "course_id": course_id,
+        "orden": order,
+        "total_usuarios": rows[0].users if rows else 0,
+        "ranking": [_ranking_entry(row) for row in page],
+        "next_cursor": (
+            encode_key_cursor(page[-1].position, page[-1].user_id)
+            if has_more and page
+            else None
+        ),
+    }
+
+
+def course_ranking_etag(
+    course_id: str,
+    order: str = "promedio",
+    start_date=None,
+    end_date=None,
+    limit: int = settings.LOGS_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+) -> str:
+    params = (order, start_date, end_date, limit, cursor)
+    return statistics_etag("course_ranking", course_id, params=params)
+
+
+async def get_course_ranking_statistics(
+    db: Session,
+    course_id: str,
+    order: str = "promedio",
+    start_date=None,
+    end_date=None,
+    limit: int = settings.LOGS_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+):
+    # Se cachea con la version del curso: vale hasta su proxima escritura
+    params = (order, start_date, end_date, limit, cursor)
+    return await cached_statistics(
+        "course_ranking",
+        lambda: _load_course_ranking(db, course_id, *params),
+        course_id=course_id,
+        params=params,
+    )
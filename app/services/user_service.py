@@ -1,37 +1,61 @@
 from fastapi import HTTPException
+from typing import Optional
 from app.core.config import settings
+from app.core.http_client import get_http_client
+from app.utils.ttl_cache import AsyncTTLCache
+import hashlib
 import httpx
 import logging
 
+# Tokens validados recientemente: hash del token -> id del usuario
+_token_cache: AsyncTTLCache[int] = AsyncTTLCache(
+    ttl=settings.AUTH_CACHE_TTL_SECONDS, max_size=settings.AUTH_CACHE_MAX_SIZE
+)
 
-async def validate_user(token: str):
+
+def _token_key(token: str) -> str:
+    # No se guardan los tokens en claro en memoria
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+async def validate_user(token: str, client: Optional[httpx.AsyncClient] = None):
     """
     Valida al usuario con el auth service y devuelve el id del usuario.
+
+    Las validaciones exitosas se cachean por AUTH_CACHE_TTL_SECONDS, y las
+    validaciones concurrentes de un mismo token comparten una unica llamada.
     """
+    return await _token_cache.get_or_load(
+        _token_key(token), lambda: _fetch_user_id(token, client)
+    )
+
+
+async def _fetch_user_id(token: str, client: Optional[httpx.AsyncClient] = None):
+    client = client or get_http_client()
+
     # Llamar al auth service para validar el token
-    async with httpx.AsyncClient() as client:
-        try:
-            logging.info(f"Validando identidad del usuario con el token: {token}...")
-
-            response = await client.get(
-                f"{settings.AUTH_SERVICE_URL}/api/v1/me/",
-                headers={"Authorization": f"Bearer {token}"},
-            )
-
-            if response.status_code == 200:
-                logging.info("Token valido")
-                user_data = response.json()
-                user_id = user_data.get("id")
-                return user_id
-            raise HTTPException(
-                status_code=response.status_code,
-                detail="Token inválido o expirado",
-            )
-
-        except httpx.RequestError as e:
-            logging.error(f"Error al conectar con el servicio de usuarios: {str(e)}")
-            logging.error(f"URL: {settings.AUTH_SERVICE_URL}/me/")
-            raise HTTPException(
-                status_code=500,
-                detail="Error al conectar con el servicio de usuarios",
-            )
+    try:
+        logging.info(f"Validando identidad del usuario con el token: {token}...")
+
+        response = await client.get(
+            f"{settings.AUTH_SERVICE_URL}/api/v1/me/",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+        if response.status_code == 200:
+            logging.info("Token valido")
+            user_data = response.json()
+            user_id = user_data.get("id")
+            return user_id
+        raise HTTPException(
+            status_code=response.status_code,
+            detail="Token inválido o expirado",
+        )
+
+    except httpx.RequestError as e:
+        logging.error(f"Error al conectar con el servicio de usuarios: {str(e)}")
+        logging.error(f"URL: {settings.AUTH_SERVICE_URL}/me/")
+        raise HTTPException(
+            status_code=500,
+            detail="Error al conectar con el servicio de usuarios",
+        )
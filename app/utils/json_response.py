@@ -0,0 +1,14 @@
+from fastapi.responses import JSONResponse
+from typing import Any
+import orjson
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Respuesta JSON serializada con orjson. Se devuelve directamente desde la
+    ruta para evitar el recorrido de jsonable_encoder; acepta datetime, que se
+    escribe en ISO 8601.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,54 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple, Union
+
+
+def encode_cursor(date: datetime, id: int) -> str:
+    """
+    Codifica la posicion (date, id) de la ultima fila de una pagina como un
+    cursor opaco para la siguiente.
+    """
+    raw = f"{date.isoformat()}|{id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decodifica un cursor generado por encode_cursor. Lanza ValueError si el
+    cursor es invalido.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        date, id = raw.split("|")
+        return datetime.fromisoformat(date), int(id)
+    except Exception:
+        raise ValueError("Cursor de paginacion invalido")
+
+
+def encode_key_cursor(*values: Union[str, int]) -> str:
+    """
+    Codifica los valores de la clave de la ultima fila de una pagina (por
+    ejemplo (assessment_id, tipo)) como un cursor opaco.
+    """
+    raw = json.dumps(list(values)).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_key_cursor(cursor: str, size: int) -> Tuple[Union[str, int], ...]:
+    """
+    Decodifica un cursor generado por encode_key_cursor con size valores.
+    Lanza ValueError si el cursor es invalido.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if len(values) != size or not all(
+            isinstance(value, (str, int)) and not isinstance(value, bool)
+            for value in values
+        ):
+            raise ValueError
+        return tuple(values)
+    except Exception:
+        raise ValueError("Cursor de paginacion invalido")
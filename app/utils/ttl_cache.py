@@ -0,0 +1,83 @@
+import asyncio
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Tuple, TypeVar
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class AsyncTTLCache(Generic[V]):
+    """
+    Cache en memoria acotada, con expiracion por TTL y desalojo LRU.
+
+    get_or_load agrupa las cargas concurrentes de una misma clave en una sola
+    llamada (single-flight). Solo se guardan los resultados exitosos.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_size: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Descarta la entrada y cualquier carga en curso de la clave."""
+        self._entries.pop(key, None)
+        self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[V]]) -> V:
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(loader())
+            self._inflight[key] = future
+            future.add_done_callback(partial(self._on_loaded, key))
+
+        # shield: si un llamador se cancela, la carga sigue para el resto
+        return await asyncio.shield(future)
+
+    def _on_loaded(self, key: Hashable, future: asyncio.Future) -> None:
+        # Si la clave se invalidó durante la carga, el resultado no se guarda
+        if self._inflight.get(key) is not future:
+            return
+        del self._inflight[key]
+        if not future.cancelled() and future.exception() is None:
+            self.set(key, future.result())
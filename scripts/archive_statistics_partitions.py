@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Script para archivar las particiones mensuales de statistics mas antiguas que
+STATISTICS_RETENTION_MONTHS. Cada particion se vuelca a un CSV comprimido en
+STATISTICS_ARCHIVE_DIR y luego, en la misma transaccion, se restan sus filas
+de los rollups y se separa y borra la particion.
+
+Uso: PYTHONPATH=. python scripts/archive_statistics_partitions.py
+"""
+
+import gzip
+import logging
+import os
+import sys
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.partitioning import (
+    PARENT_TABLE,
+    expired_partitions,
+    list_partitions,
+    partition_bounds,
+    partitioning_enabled,
+)
+from app.db.session import create_script_engine
+from app.repositories.rollup_repository import subtract_rollups_for_range
+
+engine = create_script_engine()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def archive_partition(name: str) -> str:
+    start, end = partition_bounds(name)
+    path = os.path.join(settings.STATISTICS_ARCHIVE_DIR, f"{name}.csv.gz")
+    partial_path = f"{path}.part"
+
+    db = SessionLocal()
+    try:
+        # Sin escrituras sobre la particion entre el volcado y el borrado
+        db.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+
+        cursor = db.connection().connection.cursor()
+        with gzip.open(partial_path, "wb") as file:
+            cursor.copy_expert(f"COPY {name} TO STDOUT WITH CSV HEADER", file)
+            file.flush()
+            os.fsync(file.fileobj.fileno())
+        os.replace(partial_path, path)
+
+        subtract_rollups_for_range(db, start, end)
+        db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        db.execute(text(f"DROP TABLE {name}"))
+        db.commit()
+    except Exception:
+        db.rollback()
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    finally:
+        db.close()
+    return path
+
+
+def main():
+    if not partitioning_enabled(engine):
+        logging.error("La tabla statistics no esta particionada")
+        sys.exit(1)
+
+    os.makedirs(settings.STATISTICS_ARCHIVE_DIR, exist_ok=True)
+    with engine.connect() as conn:
+        partitions = list_partitions(conn)
+
+    today = datetime.utcnow().date()
+    for name in expired_partitions(
+        partitions, today, settings.STATISTICS_RETENTION_MONTHS
+    ):
+        try:
+            path = archive_partition(name)
+            logging.info(f"Particion {name} archivada en {path}")
+        except Exception as e:
+            logging.error(f"Error al archivar la particion {name}: {str(e)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
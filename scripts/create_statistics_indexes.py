@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Script para crear los indices de statistics declarados en el modelo que le
+faltan a una tabla existente, incluido el indice unico sobre
+(user_id, assessment_key, tipo).
+
+Primero fusiona las filas duplicadas de esa clave, que impedirian crear el
+indice unico: se conserva la fila mas antigua, entregada si alguna lo estaba y
+con la ultima calificacion registrada, y se recalculan los rollups. Luego crea
+cada indice con CREATE INDEX CONCURRENTLY, sin bloquear las escrituras. Si una
+creacion anterior fallo, el indice invalido que quedo se borra y se vuelve a
+crear.
+
+La aplicacion no arranca sin el indice unico, por lo que este script se corre
+antes de desplegarla sobre una tabla sin el, y despues de
+scripts/encode_statistics_dictionary.py. No aplica a la tabla particionada,
+que se crea con sus indices.
+
+Uso: PYTHONPATH=. python scripts/create_statistics_indexes.py
+"""
+
+import logging
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex
+
+from app.db.indexes import missing_statistics_indexes
+from app.db.partitioning import partitioning_enabled
+from app.db.session import create_script_engine
+from app.repositories.rollup_repository import rebuild_rollups
+
+engine = create_script_engine()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+_MERGE_DUPLICATES = text("""
+    WITH groups AS (
+        SELECT
+            min(id) AS id,
+            bool_or(coalesce(entregado, false)) AS entregado,
+            (array_agg(calificacion ORDER BY date DESC, id DESC)
+                FILTER (WHERE calificacion IS NOT NULL))[1] AS calificacion
+        FROM statistics
+        GROUP BY user_id, assessment_key, tipo
+        HAVING count(*) > 1
+    )
+    UPDATE statistics
+    SET entregado = groups.entregado, calificacion = groups.calificacion
+    FROM groups
+    WHERE statistics.id = groups.id
+    """)
+
+_DELETE_DUPLICATES = text("""
+    DELETE FROM statistics
+    USING statistics AS kept
+    WHERE statistics.user_id = kept.user_id
+    AND statistics.assessment_key = kept.assessment_key
+    AND statistics.tipo = kept.tipo
+    AND statistics.id > kept.id
+    """)
+
+
+def merge_duplicates() -> int:
+    """Fusiona las filas duplicadas y devuelve cuantas se borraron."""
+    db = SessionLocal()
+    try:
+        # Sin escrituras nuevas mientras se fusionan los duplicados
+        db.execute(text("LOCK TABLE statistics IN SHARE ROW EXCLUSIVE MODE"))
+        db.execute(_MERGE_DUPLICATES)
+        deleted = db.execute(_DELETE_DUPLICATES).rowcount
+        if deleted:
+            # Los rollups contaban tambien las filas duplicadas
+            rebuild_rollups(db)
+        else:
+            db.commit()
+        return deleted
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def drop_invalid_indexes(conn) -> None:
+    names = conn.execute(text("""
+            SELECT index_class.relname
+            FROM pg_index
+            JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+            JOIN pg_class table_class ON table_class.oid = pg_index.indrelid
+            WHERE table_class.relname = 'statistics' AND NOT pg_index.indisvalid
+            """)).scalars()
+    for name in list(names):
+        logging.info(f"Borrando el indice invalido {name}")
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+
+def main():
+    if engine.dialect.name != "postgresql" or partitioning_enabled(engine):
+        logging.error("La migracion requiere PostgreSQL y la tabla sin particionar")
+        sys.exit(1)
+
+    try:
+        deleted = merge_duplicates()
+        logging.info(f"Filas duplicadas de statistics fusionadas: {deleted}")
+
+        # CONCURRENTLY no puede correr dentro de una transaccion
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            drop_invalid_indexes(conn)
+            # Primero el indice unico, del que dependen los eventos de curso
+            indexes = sorted(
+                missing_statistics_indexes(conn), key=lambda index: not index.unique
+            )
+            for index in indexes:
+                index.dialect_options["postgresql"]["concurrently"] = True
+                conn.execute(CreateIndex(index, if_not_exists=True))
+                logging.info(f"Indice {index.name} creado")
+    except Exception as e:
+        logging.error(f"Error al crear los indices de statistics: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Script para migrar una tabla statistics existente a las claves de diccionario:
+course_id y assessment_id pasan a las tablas statistics_course y
+statistics_assessment, y statistics guarda sus claves enteras junto con el
+tipo como codigo. Todo se aplica en una transaccion; al final VACUUM FULL
+reescribe la tabla para recuperar el espacio de las columnas borradas.
+
+Debe ejecutarse con la aplicacion detenida, y seguirse de
+scripts/create_statistics_indexes.py, que vuelve a crear los indices sobre las
+claves, o de scripts/partition_statistics.py si tambien se particiona la tabla.
+
+Uso: PYTHONPATH=. python scripts/encode_statistics_dictionary.py
+"""
+
+import logging
+import sys
+
+from sqlalchemy import text
+
+from app.db.session import create_script_engine
+from app.models.statistics_dictionary_model import (
+    ASSESSMENT_TYPES,
+    StatisticsAssessment,
+    StatisticsCourse,
+)
+
+engine = create_script_engine()
+
+# Columna de texto, tabla de diccionario y columna de clave
+DICTIONARIES = (
+    ("course_id", "statistics_course", "course_key"),
+    ("assessment_id", "statistics_assessment", "assessment_key"),
+)
+
+
+def _encode(conn) -> None:
+    StatisticsCourse.__table__.create(bind=conn, checkfirst=True)
+    StatisticsAssessment.__table__.create(bind=conn, checkfirst=True)
+
+    for column, table, key in DICTIONARIES:
+        conn.execute(
+            text(
+                f"INSERT INTO {table} ({column}) "
+                f"SELECT DISTINCT {column} FROM statistics "
+                f"ON CONFLICT ({column}) DO NOTHING"
+            )
+        )
+        conn.execute(text(f"ALTER TABLE statistics ADD COLUMN {key} INTEGER"))
+
+    codes = " ".join(
+        f"WHEN '{tipo}' THEN {code}" for code, tipo in enumerate(ASSESSMENT_TYPES)
+    )
+    conn.execute(text("ALTER TABLE statistics ADD COLUMN tipo_code SMALLINT"))
+    conn.execute(
+        text(
+            "UPDATE statistics SET "
+            "course_key = statistics_course.id, "
+            "assessment_key = statistics_assessment.id, "
+            f"tipo_code = CASE statistics.tipo {codes} END "
+            "FROM statistics_course, statistics_assessment "
+            "WHERE statistics_course.course_id = statistics.course_id "
+            "AND statistics_assessment.assessment_id = statistics.assessment_id"
+        )
+    )
+
+    # Borrar las columnas de texto borra tambien los indices que las usan;
+    # scripts/create_statistics_indexes.py los vuelve a crear sobre las claves
+    conn.execute(
+        text(
+            "ALTER TABLE statistics "
+            "DROP COLUMN course_id, DROP COLUMN assessment_id, DROP COLUMN tipo"
+        )
+    )
+    conn.execute(text("ALTER TABLE statistics RENAME COLUMN tipo_code TO tipo"))
+    conn.execute(
+        text(
+            "ALTER TABLE statistics "
+            "ALTER COLUMN course_key SET NOT NULL, "
+            "ALTER COLUMN assessment_key SET NOT NULL, "
+            "ALTER COLUMN tipo SET NOT NULL"
+        )
+    )
+    for _, table, key in DICTIONARIES:
+        conn.execute(
+            text(
+                f"ALTER TABLE statistics ADD CONSTRAINT statistics_{key}_fkey "
+                f"FOREIGN KEY ({key}) REFERENCES {table} (id)"
+            )
+        )
+
+
+def main():
+    if engine.dialect.name != "postgresql":
+        logging.error("La migracion requiere PostgreSQL")
+        sys.exit(1)
+
+    try:
+        with engine.begin() as conn:
+            _encode(conn)
+
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM FULL ANALYZE statistics"))
+        logging.info("Tabla statistics migrada a las claves de diccionario")
+    except Exception as e:
+        logging.error(f"Error al migrar la tabla statistics: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
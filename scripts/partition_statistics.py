@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Script para migrar una tabla statistics existente a la tabla particionada por
+mes. Renombra la tabla actual a statistics_heap, crea la particionada con las
+particiones que cubren los datos y copia las filas, todo en una transaccion.
+statistics_heap queda como respaldo y se borra a mano una vez verificada la
+migracion.
+
+Requiere STATISTICS_PARTITIONING=true y la aplicacion detenida.
+
+Uso: STATISTICS_PARTITIONING=true PYTHONPATH=. python scripts/partition_statistics.py
+"""
+
+import logging
+import sys
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.partitioning import (
+    create_month_partition,
+    create_upcoming_partitions,
+    month_start,
+)
+from app.db.session import create_script_engine
+from app.models.statistics_model import Statistics
+
+HEAP_TABLE = "statistics_heap"
+
+engine = create_script_engine()
+
+
+def _rename_heap(conn) -> None:
+    conn.execute(text(f"ALTER TABLE statistics RENAME TO {HEAP_TABLE}"))
+    indexes = conn.execute(
+        text("SELECT indexname FROM pg_indexes WHERE tablename = :table"),
+        {"table": HEAP_TABLE},
+    ).scalars()
+    for name in list(indexes):
+        conn.execute(text(f"ALTER INDEX {name} RENAME TO {name}_heap"))
+    conn.execute(
+        text(
+            f"ALTER SEQUENCE IF EXISTS statistics_id_seq RENAME TO {HEAP_TABLE}_id_seq"
+        )
+    )
+
+
+def main():
+    if not settings.STATISTICS_PARTITIONING or engine.dialect.name != "postgresql":
+        logging.error("La migracion requiere PostgreSQL y STATISTICS_PARTITIONING=true")
+        sys.exit(1)
+
+    columns = ", ".join(column.name for column in Statistics.__table__.columns)
+    today = datetime.utcnow().date()
+    try:
+        with engine.begin() as conn:
+            _rename_heap(conn)
+            Statistics.__table__.create(bind=conn)
+
+            # Los meses con datos anteriores al actual, luego el actual, los
+            # siguientes y la particion por defecto
+            first_date = conn.execute(
+                text(f"SELECT min(date) FROM {HEAP_TABLE}")
+            ).scalar()
+            month = month_start(first_date or today)
+            while month < month_start(today):
+                create_month_partition(conn, month)
+                month = month_start(month, 1)
+            create_upcoming_partitions(conn, today)
+
+            conn.execute(
+                text(
+                    f"INSERT INTO statistics ({columns}) "
+                    f"SELECT {columns} FROM {HEAP_TABLE}"
+                )
+            )
+            conn.execute(
+                text(
+                    "SELECT setval(pg_get_serial_sequence('statistics', 'id'), "
+                    "coalesce(max(id), 0) + 1, false) FROM statistics"
+                )
+            )
+        logging.info(
+            f"Tabla statistics particionada; la tabla anterior quedo en {HEAP_TABLE}"
+        )
+    except Exception as e:
+        logging.error(f"Error al particionar la tabla statistics: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Script para recalcular las tablas de rollups de estadisticas a partir de la
+tabla statistics. Se usa al desplegar los rollups sobre una base con datos, o
+para corregir cualquier diferencia acumulada.
+
+Uso: PYTHONPATH=. python scripts/rebuild_rollups.py
+"""
+
+import logging
+import sys
+
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.session import create_script_engine
+from app.repositories.rollup_repository import rebuild_rollups
+
+engine = create_script_engine()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db)
+        logging.info("Rollups de estadisticas recalculados correctamente")
+    except Exception as e:
+        db.rollback()
+        logging.error(f"Error al recalcular los rollups: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
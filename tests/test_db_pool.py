@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app.core.config import settings
+from app.db.pool import MonitoredQueuePool, engine_options, pool_stats
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        poolclass=MonitoredQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_pool_stats_track_checkouts_and_timeouts(engine):
+    conn = engine.connect()
+    stats = pool_stats(engine)
+    assert stats["en_uso"] == 1
+    assert stats["pedidos"] == 1
+    assert stats["timeouts"] == 0
+
+    # Pool lleno: el segundo pedido espera pool_timeout y falla
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    stats = pool_stats(engine)
+    assert stats["pedidos"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["espera_maxima_ms"] >= 50
+
+    conn.close()
+    assert pool_stats(engine)["en_uso"] == 0
+    assert pool_stats(engine)["disponibles"] == 1
+
+
+def test_engine_options_statement_timeout(monkeypatch):
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 2000)
+
+    assert engine_options()["connect_args"] == {"options": "-c statement_timeout=2000"}
+    # Los scripts de mantenimiento no tienen limite
+    assert "connect_args" not in engine_options(statement_timeout=False)
@@ -0,0 +1,115 @@
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services import user_service, courses_service
+from app.services.user_service import validate_user
+from app.services.courses_service import get_course_users, invalidate_course_users
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    user_service._token_cache.clear()
+    courses_service._roster_cache.clear()
+    yield
+    user_service._token_cache.clear()
+    courses_service._roster_cache.clear()
+
+
+def make_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_validate_user_uses_injected_client():
+    requests = []
+
+    def handler(request: httpx.Request):
+        requests.append(request)
+        return httpx.Response(200, json={"id": 7})
+
+    async with make_client(handler) as client:
+        user_id = await validate_user("token-valido", client=client)
+
+    assert user_id == 7
+    assert str(requests[0].url) == f"{settings.AUTH_SERVICE_URL}/api/v1/me/"
+    assert requests[0].headers["Authorization"] == "Bearer token-valido"
+
+
+@pytest.mark.asyncio
+async def test_validate_user_invalid_token():
+    async with make_client(lambda request: httpx.Response(401)) as client:
+        with pytest.raises(HTTPException) as exc_info:
+            await validate_user("token-invalido", client=client)
+
+    assert exc_info.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_validate_user_caches_valid_tokens():
+    calls = 0
+
+    def handler(request: httpx.Request):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(200, json={"id": 7})
+
+    async with make_client(handler) as client:
+        first = await validate_user("token-valido", client=client)
+        second = await validate_user("token-valido", client=client)
+        other = await validate_user("otro-token", client=client)
+
+    assert first == second == other == 7
+    assert calls == 2
+    assert "token-valido" not in user_service._token_cache._entries
+
+
+@pytest.mark.asyncio
+async def test_validate_user_does_not_cache_invalid_tokens():
+    calls = 0
+
+    def handler(request: httpx.Request):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(401)
+
+    async with make_client(handler) as client:
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                await validate_user("token-invalido", client=client)
+
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_get_course_users_uses_injected_client():
+    def handler(request: httpx.Request):
+        return httpx.Response(200, json={"enrolled_users": [1, 2, 3]})
+
+    async with make_client(handler) as client:
+        users = await get_course_users("curso-123", client=client)
+
+    assert users == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_get_course_users_caches_roster_until_invalidated():
+    calls = 0
+
+    def handler(request: httpx.Request):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(200, json={"enrolled_users": [1, 2, 3]})
+
+    async with make_client(handler) as client:
+        first = await get_course_users("curso-123", client=client)
+        first.append(99)
+        second = await get_course_users("curso-123", client=client)
+        assert calls == 1
+        assert second == [1, 2, 3]
+
+        invalidate_course_users("curso-123")
+        await get_course_users("curso-123", client=client)
+
+    assert calls == 2
@@ -11,3 +11,14 @@ def test_get_health():
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
+
+
+def test_get_db_pool_health():
+    """Prueba que devuelva el estado del pool sin abrir conexiones"""
+
+    response = client.get("/health/db-pool")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["principal"]["en_uso"] == 0
+    assert data["principal"]["timeouts"] == 0
+    assert data["replica"] is None
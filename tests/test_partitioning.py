@@ -0,0 +1,37 @@
+from datetime import date
+
+from app.db.partitioning import (
+    expired_partitions,
+    month_start,
+    partition_bounds,
+    partition_name,
+)
+
+
+def test_month_start_crosses_years():
+    assert month_start(date(2024, 1, 15)) == date(2024, 1, 1)
+    assert month_start(date(2024, 1, 15), -1) == date(2023, 12, 1)
+    assert month_start(date(2024, 11, 30), 3) == date(2025, 2, 1)
+
+
+def test_partition_name_and_bounds():
+    name = partition_name(date(2024, 12, 1))
+
+    assert name == "statistics_p2024_12"
+    assert partition_bounds(name) == (date(2024, 12, 1), date(2025, 1, 1))
+    assert partition_bounds("statistics_default") is None
+
+
+def test_expired_partitions_keep_retention_months():
+    partitions = [
+        "statistics_default",
+        "statistics_p2023_12",
+        "statistics_p2024_01",
+        "statistics_p2024_02",
+    ]
+
+    # Se conservan los 2 meses completos anteriores a marzo de 2024
+    assert expired_partitions(partitions, date(2024, 3, 10), 2) == [
+        "statistics_p2023_12"
+    ]
+    assert expired_partitions(partitions, date(2024, 3, 10), 0) == []
@@ -0,0 +1,95 @@
+import pytest
+
+from app.core.config import settings
+from app.db import replica
+from app.db import session as db_session
+from app.services.statistics_cache import (
+    clear_statistics_cache,
+    invalidate_statistics,
+    statistics_written_at,
+)
+
+
+def primary_session():
+    return "principal"
+
+
+def replica_session():
+    return "replica"
+
+
+@pytest.fixture
+def with_replica(monkeypatch):
+    monkeypatch.setattr(db_session, "SessionLocal", primary_session)
+    monkeypatch.setattr(db_session, "ReplicaSessionLocal", replica_session)
+    monkeypatch.setattr(db_session, "replica_engine", object())
+    monkeypatch.setattr(replica, "_lag_checked_at", float("-inf"))
+    monkeypatch.setattr(replica, "_replica_lag", None)
+    monkeypatch.setattr(replica, "_replayed_until", 0.0)
+
+
+def test_reader_session_falls_back_to_primary_without_replica(monkeypatch):
+    monkeypatch.setattr(db_session, "SessionLocal", primary_session)
+    monkeypatch.setattr(db_session, "ReplicaSessionLocal", None)
+
+    assert replica.reader_session() == "principal"
+
+
+def test_reader_session_uses_replica_without_lag_bound(with_replica, monkeypatch):
+    monkeypatch.setattr(settings, "DB_REPLICA_MAX_LAG_SECONDS", 0.0)
+    monkeypatch.setattr(
+        replica, "_measure_replica_lag", lambda engine: pytest.fail("sin limite")
+    )
+
+    assert replica.reader_session() == "replica"
+
+
+def test_reader_session_avoids_stale_replica(with_replica, monkeypatch):
+    lags = [30.0, 1.0]
+
+    def measure(engine):
+        return lags.pop(0)
+
+    monkeypatch.setattr(settings, "DB_REPLICA_MAX_LAG_SECONDS", 5.0)
+    monkeypatch.setattr(settings, "DB_REPLICA_LAG_CHECK_SECONDS", 60.0)
+    monkeypatch.setattr(replica, "_measure_replica_lag", measure)
+
+    # El atraso se consulta una vez por intervalo
+    assert replica.reader_session() == "principal"
+    assert replica.reader_session() == "principal"
+    assert lags == [1.0]
+
+    monkeypatch.setattr(replica, "_lag_checked_at", float("-inf"))
+    assert replica.reader_session() == "replica"
+    assert lags == []
+
+
+def test_reader_session_waits_for_replica_to_apply_writes(with_replica, monkeypatch):
+    lags = []
+
+    def measure(engine):
+        lags.append(engine)
+        return 0.0
+
+    # Sin limite de atraso tampoco se lee de la replica una escritura que
+    # todavia no se confirmo aplicada
+    monkeypatch.setattr(settings, "DB_REPLICA_MAX_LAG_SECONDS", 0.0)
+    monkeypatch.setattr(settings, "DB_REPLICA_LAG_CHECK_SECONDS", 60.0)
+    monkeypatch.setattr(replica, "_measure_replica_lag", measure)
+    monkeypatch.setattr(replica, "_lag_checked_at", 0.0)
+    monkeypatch.setattr(replica.time, "monotonic", lambda: 30.0)
+    clear_statistics_cache()
+    invalidate_statistics("curso1", [1])
+
+    written_at = statistics_written_at("curso1")
+    assert statistics_written_at("curso1", 1) == written_at
+    assert statistics_written_at("curso2") == 0.0
+    assert replica.reader_session(statistics_written_at("curso2")) == "replica"
+    assert replica.reader_session(written_at) == "principal"
+    assert lags == []
+
+    # Una medicion posterior a la escritura la confirma aplicada
+    monkeypatch.setattr(replica.time, "monotonic", lambda: 90.0)
+    assert replica.reader_session(written_at) == "replica"
+    assert len(lags) == 1
+    clear_statistics_cache()
@@ -0,0 +1,373 @@
+import pytest
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from datetime import date, datetime
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.indexes import STATISTICS_UNIQUE_INDEX, check_statistics_unique_index
+from app.models.statistics_dictionary_model import (
+    StatisticsAssessment,
+    StatisticsCourse,
+)
+from app.models.statistics_model import Statistics
+from app.models.statistics_rollup_model import (
+    CourseDayStatisticsRollup,
+    UserCourseStatisticsRollup,
+)
+from app.repositories.dictionary_repository import get_or_create_statistics_keys
+from app.repositories.statistics_repository import (
+    create_statistics,
+    get_aggregate_stats,
+    get_course_statistics,
+    mark_statistics_delivered,
+    upsert_course_statistics,
+)
+from app.repositories import rollup_repository
+from app.repositories.rollup_repository import (
+    get_grade_histogram,
+    get_rollup_stats,
+    rebuild_rollups,
+    subtract_rollups_for_range,
+)
+from app.schemas.statistics_schemas import UserStatisticsEvent
+from app.services.statistics_service import _apply_user_events_batch
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def all_rollups(db_session):
+    return {
+        "global": get_rollup_stats(db_session),
+        "curso1": get_rollup_stats(db_session, course_id="curso1"),
+        "curso2": get_rollup_stats(db_session, course_id="curso2"),
+        "user1-curso1": get_rollup_stats(db_session, user_id=1, course_id="curso1"),
+        "user2-curso1": get_rollup_stats(db_session, user_id=2, course_id="curso1"),
+    }
+
+
+def test_rollups_follow_writes(db_session):
+    upsert_course_statistics(
+        db_session,
+        user_ids=[1, 2, 3],
+        assessment_id="tarea1",
+        tipo="Tarea",
+        titulo="Tarea 1",
+        course_id="curso1",
+    )
+    # Repetir el evento no vuelve a contar las filas existentes
+    upsert_course_statistics(
+        db_session,
+        user_ids=[1, 2, 3],
+        assessment_id="tarea1",
+        tipo="Tarea",
+        titulo="Tarea 1 (v2)",
+        course_id="curso1",
+    )
+    mark_statistics_delivered(db_session, 1, "tarea1", "Tarea")
+    mark_statistics_delivered(db_session, 1, "tarea1", "Tarea", calificacion=6.0)
+    mark_statistics_delivered(db_session, 1, "tarea1", "Tarea", calificacion=8.0)
+    mark_statistics_delivered(db_session, 2, "tarea1", "Tarea", calificacion=9.0)
+
+    assert get_rollup_stats(db_session) == (8.5, 3, 2)
+    assert get_rollup_stats(db_session, course_id="curso1") == (8.5, 3, 2)
+    assert get_rollup_stats(db_session, user_id=1, course_id="curso1") == (8.0, 1, 1)
+    assert get_rollup_stats(db_session, course_id="curso2") == (0.0, 0, 0)
+    assert get_aggregate_stats(db_session, course_id="curso1") == (8.5, 3, 2)
+
+
+def test_rebuild_rollups_matches_incremental_rollups(db_session):
+    create_statistics(
+        db_session,
+        user_id=1,
+        assessment_id="tarea1",
+        titulo="Tarea 1",
+        tipo="Tarea",
+        entregado=True,
+        calificacion=8.5,
+        course_id="curso1",
+        date=datetime(2023, 10, 1, 15, 30),
+    )
+    create_statistics(
+        db_session,
+        user_id=2,
+        assessment_id="tarea1",
+        titulo="Tarea 1",
+        tipo="Tarea",
+        entregado=False,
+        course_id="curso1",
+        date=datetime(2023, 10, 1, 18, 0),
+    )
+    create_statistics(
+        db_session,
+        user_id=1,
+        assessment_id="tarea2",
+        titulo="Tarea 2",
+        tipo="Tarea",
+        entregado=True,
+        calificacion=7.0,
+        course_id="curso2",
+        date=datetime(2023, 11, 1),
+    )
+    incremental = all_rollups(db_session)
+    days = db_session.query(CourseDayStatisticsRollup.day).all()
+
+    rebuild_rollups(db_session)
+
+    assert all_rollups(db_session) == incremental
+    assert db_session.query(CourseDayStatisticsRollup.day).all() == days
+    assert db_session.query(UserCourseStatisticsRollup).count() == 3
+
+
+def test_rebuild_rollups_fixes_rows_written_without_rollups(db_session):
+    course_key, assessment_key = get_or_create_statistics_keys(
+        db_session, "curso1", "tarea1"
+    )
+    db_session.add(
+        Statistics(
+            user_id=1,
+            course_key=course_key,
+            titulo="Tarea 1",
+            tipo="Tarea",
+            entregado=True,
+            calificacion=5.0,
+            assessment_key=assessment_key,
+        )
+    )
+    db_session.commit()
+    assert get_rollup_stats(db_session) == (0.0, 0, 0)
+
+    rebuild_rollups(db_session)
+
+    assert get_rollup_stats(db_session) == (5.0, 1, 1)
+
+
+def test_grade_histogram_follows_regrades(db_session):
+    upsert_course_statistics(
+        db_session,
+        user_ids=[1, 2],
+        assessment_id="examen1",
+        tipo="Examen",
+        titulo="Examen 1",
+        course_id="curso1",
+    )
+    mark_statistics_delivered(db_session, 1, "examen1", "Examen", calificacion=6.0)
+    mark_statistics_delivered(db_session, 1, "examen1", "Examen", calificacion=8.5)
+    mark_statistics_delivered(db_session, 2, "examen1", "Examen", calificacion=8.5)
+    create_statistics(
+        db_session,
+        user_id=1,
+        assessment_id="tarea1",
+        titulo="Tarea 1",
+        tipo="Tarea",
+        entregado=True,
+        calificacion=7.3,
+        course_id="curso1",
+    )
+
+    # Tramos de 0.1: la nota 6.0 ya no cuenta
+    assert get_grade_histogram(db_session, "curso1", "examen1") == [(85, 2)]
+    assert get_grade_histogram(db_session, "curso1") == [(73, 1), (85, 2)]
+
+    incremental = get_grade_histogram(db_session, "curso1")
+    rebuild_rollups(db_session)
+    assert get_grade_histogram(db_session, "curso1") == incremental
+
+
+def test_batch_applies_rollups_once_before_commit(db_session, monkeypatch):
+    upsert_course_statistics(
+        db_session,
+        user_ids=[1, 2],
+        assessment_id="examen1",
+        tipo="Examen",
+        titulo="Examen 1",
+        course_id="curso1",
+    )
+    applied = []
+    apply_rollup_deltas = rollup_repository.apply_rollup_deltas
+    monkeypatch.setattr(
+        rollup_repository,
+        "apply_rollup_deltas",
+        lambda db, deltas: applied.append(len(deltas))
+        or apply_rollup_deltas(db, deltas),
+    )
+
+    events = [
+        UserStatisticsEvent(
+            id_user=user_id,
+            assessment_id="examen1",
+            notification_type="Examen",
+            event="Calificado",
+            data={"entregado": True, "nota": nota},
+        )
+        for user_id, nota in ((1, 6.0), (99, 5.0), (1, 8.5), (2, 8.5))
+    ]
+    results, _ = _apply_user_events_batch(db_session, events)
+
+    assert [result["success"] for result in results] == [True, False, True, True]
+    # Las variaciones del evento fallido no se aplican
+    assert applied == [3]
+    incremental = all_rollups(db_session)
+    histogram = get_grade_histogram(db_session, "curso1")
+    assert incremental["curso1"] == (8.5, 2, 2)
+    assert histogram == [(85, 2)]
+
+    rebuild_rollups(db_session)
+    assert all_rollups(db_session) == incremental
+    assert get_grade_histogram(db_session, "curso1") == histogram
+
+
+def test_subtract_rollups_for_range_matches_rebuild(db_session):
+    for user_id, day, calificacion in [
+        (1, datetime(2023, 10, 1, 15, 30), 8.5),
+        (2, datetime(2023, 10, 31, 23, 59), None),
+        (1, datetime(2023, 11, 1), 7.0),
+    ]:
+        create_statistics(
+            db_session,
+            user_id=user_id,
+            assessment_id=f"tarea{day.month}",
+            titulo="Tarea",
+            tipo="Tarea",
+            entregado=calificacion is not None,
+            calificacion=calificacion,
+            course_id="curso1",
+            date=day,
+        )
+
+    # Archivar octubre: restar sus filas y borrarlas
+    subtract_rollups_for_range(db_session, date(2023, 10, 1), date(2023, 11, 1))
+    db_session.query(Statistics).filter(
+        Statistics.date < datetime(2023, 11, 1)
+    ).delete()
+    db_session.commit()
+    subtracted = all_rollups(db_session)
+    histogram = get_grade_histogram(db_session, "curso1")
+    days = db_session.query(CourseDayStatisticsRollup.day).all()
+
+    rebuild_rollups(db_session)
+
+    assert subtracted == all_rollups(db_session)
+    assert subtracted["curso1"] == (7.0, 1, 1)
+    assert histogram == get_grade_histogram(db_session, "curso1") == [(70, 1)]
+    assert days == db_session.query(CourseDayStatisticsRollup.day).all()
+
+
+def test_upsert_course_statistics_without_unique_index(db_session, monkeypatch):
+    # Con la tabla particionada las filas existentes se buscan antes de insertar
+    monkeypatch.setattr(settings, "STATISTICS_PARTITIONING", True)
+    for titulo in ("Tarea 1", "Tarea 1 (v2)"):
+        upsert_course_statistics(
+            db_session,
+            user_ids=[1, 2],
+            assessment_id="tarea1",
+            tipo="Tarea",
+            titulo=titulo,
+            course_id="curso1",
+        )
+    upsert_course_statistics(
+        db_session,
+        user_ids=[2, 3],
+        assessment_id="tarea1",
+        tipo="Tarea",
+        titulo="Tarea 1 (v3)",
+        course_id="curso1",
+    )
+
+    rows = db_session.query(Statistics.user_id, Statistics.titulo).all()
+    assert sorted(rows) == [
+        (1, "Tarea 1 (v2)"),
+        (2, "Tarea 1 (v3)"),
+        (3, "Tarea 1 (v3)"),
+    ]
+    assert get_rollup_stats(db_session, course_id="curso1") == (0.0, 3, 0)
+
+
+def test_statistics_store_dictionary_keys(db_session):
+    for course_id, user_ids in (("curso1", [1, 2]), ("curso2", [1])):
+        upsert_course_statistics(
+            db_session,
+            user_ids=user_ids,
+            assessment_id=f"{course_id}-examen1",
+            tipo="Examen",
+            titulo="Examen 1",
+            course_id=course_id,
+        )
+    upsert_course_statistics(
+        db_session,
+        user_ids=[1, 2],
+        assessment_id="curso1-tarea1",
+        tipo="Tarea",
+        titulo="Tarea 1",
+        course_id="curso1",
+    )
+
+    # Cada texto se registra una sola vez y el tipo se guarda como codigo
+    assert db_session.query(StatisticsCourse).count() == 2
+    assert db_session.query(StatisticsAssessment).count() == 3
+    assert db_session.execute(
+        text("SELECT DISTINCT tipo FROM statistics ORDER BY tipo")
+    ).scalars().all() == [0, 1]
+
+    rows = get_course_statistics(db_session, "curso1")
+    assert sorted((row.course_id, row.assessment_id, row.tipo) for row in rows) == [
+        ("curso1", "curso1-examen1", "Examen"),
+        ("curso1", "curso1-examen1", "Examen"),
+        ("curso1", "curso1-tarea1", "Tarea"),
+        ("curso1", "curso1-tarea1", "Tarea"),
+    ]
+    assert get_course_statistics(db_session, "curso3") == []
+
+
+def test_unique_index_rejects_duplicate_statistics(db_session):
+    upsert_course_statistics(
+        db_session,
+        user_ids=[1],
+        assessment_id="tarea1",
+        tipo="Tarea",
+        titulo="Tarea 1",
+        course_id="curso1",
+    )
+    course_key, assessment_key = get_or_create_statistics_keys(
+        db_session, "curso1", "tarea1"
+    )
+
+    with pytest.raises(IntegrityError):
+        db_session.execute(
+            insert(Statistics).values(
+                user_id=1,
+                assessment_key=assessment_key,
+                course_key=course_key,
+                titulo="Tarea 1",
+                tipo="Tarea",
+            )
+        )
+    db_session.rollback()
+
+
+def test_check_statistics_unique_index(db_session):
+    check_statistics_unique_index(engine)
+
+    db_session.execute(text(f"DROP INDEX {STATISTICS_UNIQUE_INDEX}"))
+    db_session.commit()
+    with pytest.raises(RuntimeError):
+        check_statistics_unique_index(engine)
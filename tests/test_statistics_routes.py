@@ -1,11 +1,25 @@
+import io
+import os
+import csv
+import json
+import time
+import asyncio
 import pytest
+import pyarrow.parquet as pq
 from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+from unittest.mock import patch, AsyncMock
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from app.main import app
+from app.core.config import settings
+from app.services import export_jobs_service
 from app.db.base import Base
-from app.db.dependencies import get_db
+from app.db.dependencies import get_db, get_reader_db, get_statistics_reader_db
+from app.services import statistics_cache
+from app.services.statistics_cache import clear_statistics_cache
+from app.utils.pagination import encode_key_cursor
 from app.repositories.statistics_repository import create_statistics
 from datetime import datetime
 
@@ -38,11 +52,29 @@ def client(db_session):
             db_session.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_reader_db] = override_get_db
+    app.dependency_overrides[get_statistics_reader_db] = override_get_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(scope="function")
+def mock_validate_user():
+    with patch(
+        "app.controller.user_controller.validate_user", new_callable=AsyncMock
+    ) as mock:
+        mock.return_value = 1  # Valido
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    clear_statistics_cache()
+    yield
+    clear_statistics_cache()
+
+
 @pytest.fixture(scope="function")
 def sample_statistics(db_session):
     """
@@ -110,7 +142,7 @@ def sample_statistics(db_session):
     create_statistics(
         db_session,
         user_id=1,
-        assessment_id="tarea1",
+        assessment_id="curso2-tarea1",
         titulo="Tarea 1",
         tipo="Tarea",
         entregado=True,
@@ -239,3 +271,694 @@ def test_get_user_statistics_with_date_range(client: TestClient, sample_statisti
     assert data["promedio_calificaciones"] == pytest.approx(
         8.25, 0.01
     )  # Tarea 2 y Examen 1
+
+
+def test_get_course_statistics_logs_pagination(client: TestClient, sample_statistics):
+    response = client.get("/statistics/course/curso1?limit=2")
+    assert response.status_code == 200
+    first_page = response.json()
+    assert [log["assessment_id"] for log in first_page["logs"]] == [
+        "tarea1",
+        "tarea3",
+    ]
+    assert first_page["next_cursor"] is not None
+    assert first_page["total_asignaciones"] == 5
+
+    response = client.get(
+        f"/statistics/course/curso1?limit=2&cursor={first_page['next_cursor']}"
+    )
+    second_page = response.json()
+    assert [log["assessment_id"] for log in second_page["logs"]] == [
+        "examen1",
+        "tarea2",
+    ]
+
+    response = client.get(
+        f"/statistics/course/curso1?limit=2&cursor={second_page['next_cursor']}"
+    )
+    last_page = response.json()
+    assert [log["assessment_id"] for log in last_page["logs"]] == ["tarea1"]
+    assert last_page["next_cursor"] is None
+
+
+def test_get_user_statistics_without_logs(client: TestClient, sample_statistics):
+    response = client.get("/statistics/user/curso1/1?include_logs=false")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert "logs" not in data
+    assert data["total_asignaciones"] == 4
+
+
+def test_get_course_statistics_invalid_cursor(client: TestClient, sample_statistics):
+    response = client.get("/statistics/course/curso1?cursor=no-es-un-cursor")
+    assert response.status_code == 400
+
+
+def test_get_course_statistics_limit_out_of_range(client: TestClient):
+    response = client.get("/statistics/course/curso1?limit=0")
+    assert response.status_code == 422
+
+
+def test_export_statistics_to_excel(
+    client: TestClient, mock_validate_user, sample_statistics
+):
+    response = client.post(
+        "/statistics/export-excel",
+        json={"course_id": "curso1"},
+        headers={"Authorization": "Bearer test_token"},
+    )
+    assert response.status_code == 200
+    assert (
+        "attachment; filename=estadisticas_" in response.headers["content-disposition"]
+    )
+
+    worksheet = load_workbook(io.BytesIO(response.content))["Estadísticas"]
+    rows = list(worksheet.iter_rows(values_only=True))
+    assert rows[0][:3] == ("ID", "ID Usuario", "ID Curso")
+    assert len(rows) == 6
+    # Ordenadas por fecha descendente
+    assert rows[1][7] == "tarea1" and rows[1][1] == 2
+    assert rows[2][5] == "No" and rows[2][6] == "Sin calificar"
+    assert worksheet.column_dimensions["G"].width == len("Sin calificar") + 2
+    assert worksheet.column_dimensions["I"].width == len("2023-10-20 00:00:00") + 2
+
+
+def test_export_statistics_to_excel_not_found(
+    client: TestClient, mock_validate_user, sample_statistics
+):
+    response = client.post(
+        "/statistics/export-excel",
+        json={"course_id": "curso_inexistente"},
+        headers={"Authorization": "Bearer test_token"},
+    )
+    assert response.status_code == 404
+
+
+def test_export_statistics_csv(
+    client: TestClient, mock_validate_user, sample_statistics
+):
+    response = client.post(
+        "/statistics/export?format=csv",
+        json={"course_id": "curso1"},
+        headers={"Authorization": "Bearer test_token"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert ".csv" in response.headers["content-disposition"]
+
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0][:3] == ["id", "user_id", "course_id"]
+    assert len(rows) == 6
+    assert rows[1][7] == "tarea1" and rows[1][1] == "2"
+
+
+def test_export_statistics_ndjson(
+    client: TestClient, mock_validate_user, sample_statistics
+):
+    response = client.post(
+        "/statistics/export?format=ndjson",
+        json={"course_id": "curso1", "user_id": 1},
+        headers={"Authorization": "Bearer test_token"},
+    )
+    assert response.status_code == 200
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert len(records) == 4
+    assert all(record["user_id"] == 1 for record in records)
+    assert records[-1]["fecha"] == "2023-10-01T00:00:00"
+
+
+def test_export_statistics_parquet(
+    client: TestClient, mock_validate_user, sample_statistics
+):
+    response = client.post(
+        "/statistics/export?format=parquet",
+        json={"course_id": "curso1"},
+        headers={"Authorization": "Bearer test_token"},
+    )
+    assert response.status_code == 200
+
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == 5
+    assert table.column_names[:3] == ["id", "user_id", "course_id"]
+
+
+def test_export_statistics_invalid_format(client: TestClient, mock_validate_user):
+    response = client.post(
+        "/statistics/export?format=xml",
+        json={},
+        headers={"Authorization": "Bearer test_token"},
+    )
+    assert response.status_code == 422
+
+
+def test_export_statistics_not_found(
+    client: TestClient, mock_validate_user, sample_statistics
+):
+    response = client.post(
+        "/statistics/export?format=csv",
+        json={"course_id": "curso_inexistente"},
+        headers={"Authorization": "Bearer test_token"},
+    )
+    assert response.status_code == 404
+
+
+@pytest.fixture(scope="function")
+def export_jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_JOBS_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(export_jobs_service, "reader_session", TestingSessionLocal)
+    yield
+    export_jobs_service._jobs.clear()
+
+
+def _wait_for_job(client: TestClient, job_id: str) -> dict:
+    for _ in range(100):
+        response = client.get(
+            f"/statistics/export-jobs/{job_id}",
+            headers={"Authorization": "Bearer test_token"},
+        )
+        assert response.status_code == 200
+        job = response.json()
+        if job["estado"] in ("completado", "fallido"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("El trabajo de exportación no terminó")
+
+
+def test_export_job_completes_and_downloads(
+    client: TestClient, mock_validate_user, sample_statistics, export_jobs
+):
+    response = client.post(
+        "/statistics/export-jobs",
+        json={"course_id": "curso1", "format": "csv"},
+        headers={"Authorization": "Bearer test_token"},
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    job = _wait_for_job(client, job_id)
+    assert job["estado"] == "completado"
+    assert job["total"] == 5 and job["procesadas"] == 5
+    assert job["progreso"] == 100
+
+    response = client.get(
+        job["descarga"], headers={"Authorization": "Bearer test_token"}
+    )
+    assert response.status_code == 200
+    assert len(list(csv.reader(io.StringIO(response.text)))) == 6
+
+
+def test_export_job_excel(
+    client: TestClient, mock_validate_user, sample_statistics, export_jobs
+):
+    response = client.post(
+        "/statistics/export-jobs",
+        json={"user_id": 1},
+        headers={"Authorization": "Bearer test_token"},
+    )
+    job = _wait_for_job(client, response.json()["job_id"])
+    assert job["formato"] == "xlsx" and job["estado"] == "completado"
+
+    response = client.get(
+        job["descarga"], headers={"Authorization": "Bearer test_token"}
+    )
+    worksheet = load_workbook(io.BytesIO(response.content))["Estadísticas"]
+    assert worksheet.max_row == 6
+
+
+def test_export_job_without_results_fails(
+    client: TestClient, mock_validate_user, sample_statistics, export_jobs
+):
+    response = client.post(
+        "/statistics/export-jobs",
+        json={"course_id": "curso_inexistente"},
+        headers={"Authorization": "Bearer test_token"},
+    )
+    job = _wait_for_job(client, response.json()["job_id"])
+    assert job["estado"] == "fallido"
+    assert job["descarga"] is None
+
+    response = client.get(
+        f"/statistics/export-jobs/{job['job_id']}/download",
+        headers={"Authorization": "Bearer test_token"},
+    )
+    assert response.status_code == 409
+
+
+def test_export_job_not_found(client: TestClient, mock_validate_user, export_jobs):
+    response = client.get(
+        "/statistics/export-jobs/inexistente",
+        headers={"Authorization": "Bearer test_token"},
+    )
+    assert response.status_code == 404
+
+
+def test_export_job_expires(
+    client: TestClient, mock_validate_user, sample_statistics, export_jobs
+):
+    response = client.post(
+        "/statistics/export-jobs",
+        json={"course_id": "curso1", "format": "ndjson"},
+        headers={"Authorization": "Bearer test_token"},
+    )
+    job_id = _wait_for_job(client, response.json()["job_id"])["job_id"]
+    path = export_jobs_service._jobs[job_id].path
+    assert os.path.exists(path)
+
+    export_jobs_service.purge_expired_jobs(
+        now=time.time() + settings.EXPORT_JOBS_TTL_SECONDS + 1
+    )
+    assert not os.path.exists(path)
+
+    response = client.get(
+        f"/statistics/export-jobs/{job_id}",
+        headers={"Authorization": "Bearer test_token"},
+    )
+    assert response.status_code == 404
+
+
+def test_clear_spool_dir_only_removes_job_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_JOBS_SPOOL_DIR", str(tmp_path))
+    job_files = ["0" * 32 + ".csv", "a" * 32 + ".parquet.part"]
+    other_files = ["notas.csv", "0" * 32 + ".txt", "datos.csv.part"]
+    for name in job_files + other_files:
+        (tmp_path / name).write_text("x")
+
+    export_jobs_service.clear_spool_dir()
+
+    assert sorted(os.listdir(tmp_path)) == sorted(other_files)
+
+
+@pytest.mark.asyncio
+async def test_purge_expired_jobs_loop_runs_periodically(monkeypatch):
+    calls = []
+    monkeypatch.setattr(settings, "EXPORT_JOBS_PURGE_SECONDS", 0.01)
+    monkeypatch.setattr(
+        export_jobs_service, "purge_expired_jobs", lambda: calls.append(1)
+    )
+
+    task = asyncio.create_task(export_jobs_service.purge_expired_jobs_loop())
+    await asyncio.sleep(0.05)
+    task.cancel()
+
+    assert len(calls) >= 2
+
+
+def test_get_global_statistics_etag_not_modified(client: TestClient, sample_statistics):
+    response = client.get("/statistics/global")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = client.get("/statistics/global", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+
+def test_get_course_statistics_etag_depends_on_params(
+    client: TestClient, sample_statistics
+):
+    etag = client.get("/statistics/course/curso1").headers["etag"]
+
+    response = client.get(
+        "/statistics/course/curso1?limit=2", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_statistics_versions_are_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_MAX_SCOPES", 3)
+    etag = statistics_cache.statistics_etag("user", "curso1", 1)
+    statistics_cache.invalidate_statistics("curso1", [1])
+    written_at = statistics_cache.statistics_written_at("curso1", 1)
+
+    for course_id in ("curso2", "curso3"):
+        statistics_cache.invalidate_statistics(course_id)
+
+    # El alcance desalojado no vuelve a un ETag ni a una hora anteriores
+    assert len(statistics_cache._scopes_written) == 3
+    assert statistics_cache.statistics_etag("user", "curso1", 1) != etag
+    assert statistics_cache.statistics_written_at("curso1", 1) >= written_at
+
+
+def test_get_user_statistics_logs_payload(client: TestClient, sample_statistics):
+    response = client.get("/statistics/user/curso1/1?limit=1")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+
+    assert response.json()["logs"] == [
+        {
+            "id": 4,
+            "user_id": 1,
+            "course_id": "curso1",
+            "titulo": "Tarea 3",
+            "tipo": "Tarea",
+            "entregado": False,
+            "calificacion": None,
+            "assessment_id": "tarea3",
+            "fecha": "2023-10-15T00:00:00",
+        }
+    ]
+
+
+def test_get_course_trends_by_week(client: TestClient, sample_statistics):
+    response = client.get("/statistics/course/curso1/trends?granularity=week")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["granularidad"] == "week"
+    # Las semanas empiezan el lunes
+    assert [
+        (bucket["periodo"], bucket["total_asignaciones"]) for bucket in data["periodos"]
+    ] == [
+        ("2023-09-25", 1),
+        ("2023-10-02", 1),
+        ("2023-10-09", 2),
+        ("2023-10-16", 1),
+    ]
+
+
+def test_get_course_trends_by_month_matches_raw_query(
+    client: TestClient, sample_statistics
+):
+    from_rollups = client.get("/statistics/course/curso1/trends?granularity=month")
+    # Con fecha de fin se agrupa sobre la tabla de estadisticas
+    from_statistics = client.get(
+        "/statistics/course/curso1/trends?granularity=month&end_date=2023-12-31"
+    )
+    assert from_rollups.json()["periodos"] == from_statistics.json()["periodos"]
+    assert from_rollups.json()["periodos"] == [
+        {
+            "periodo": "2023-10-01",
+            "total_asignaciones": 5,
+            "asignaciones_completadas": 4,
+            "asignaciones_calificadas": 4,
+            "promedio_calificaciones": 8.0,
+        }
+    ]
+
+
+def test_get_user_trends_with_start_date(client: TestClient, sample_statistics):
+    response = client.get(
+        "/statistics/user/curso1/1/trends?granularity=day&start_date=2023-10-05"
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["user_id"] == 1
+    assert [bucket["periodo"] for bucket in data["periodos"]] == [
+        "2023-10-05",
+        "2023-10-10",
+        "2023-10-15",
+    ]
+    assert data["periodos"][-1]["asignaciones_completadas"] == 0
+
+
+def test_get_course_trends_invalid_granularity(client: TestClient):
+    response = client.get("/statistics/course/curso1/trends?granularity=year")
+    assert response.status_code == 422
+
+
+def test_get_grade_distribution_for_course(client: TestClient, sample_statistics):
+    response = client.get("/statistics/course/curso1/distribution")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["calificadas"] == 4
+    assert (data["minimo"], data["maximo"]) == (7.0, 9.0)
+    assert data["percentiles"]["p50"] == 8.0
+    assert data["percentiles"]["p90"] == 8.85
+    assert data["histograma"] == [
+        {"desde": 7.0, "hasta": 8.0, "cantidad": 2},
+        {"desde": 8.0, "hasta": 9.0, "cantidad": 1},
+        {"desde": 9.0, "hasta": 10.0, "cantidad": 1},
+    ]
+
+    # Con fechas se agrupa sobre la tabla de estadisticas
+    response = client.get(
+        "/statistics/course/curso1/distribution?start_date=2023-10-01"
+    )
+    assert response.json()["percentiles"] == data["percentiles"]
+    assert response.json()["histograma"] == data["histograma"]
+
+
+def test_get_grade_distribution_for_assessment(client: TestClient, sample_statistics):
+    response = client.get(
+        "/statistics/course/curso1/distribution?assessment_id=tarea1&bin_width=0.5"
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["calificadas"] == 2
+    assert data["percentiles"]["p50"] == 7.75
+    assert [bin["cantidad"] for bin in data["histograma"]] == [1, 0, 0, 1]
+
+
+def test_get_grade_distribution_without_grades(client: TestClient):
+    response = client.get("/statistics/course/curso_vacio/distribution")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["calificadas"] == 0
+    assert data["percentiles"]["p50"] is None
+    assert data["histograma"] == []
+
+
+def test_get_grade_distribution_exact_extremes(client: TestClient, db_session):
+    for user_id, calificacion in [(1, 7.37), (2, 9.99)]:
+        create_statistics(
+            db_session,
+            user_id=user_id,
+            assessment_id="examen1",
+            titulo="Examen 1",
+            tipo="Examen",
+            entregado=True,
+            calificacion=calificacion,
+            course_id="curso1",
+        )
+
+    data = client.get("/statistics/course/curso1/distribution").json()
+    # Los extremos son las notas reales, no el inicio de su tramo
+    assert (data["minimo"], data["maximo"]) == (7.37, 9.99)
+    assert data["minimo"] <= data["percentiles"]["p25"] <= data["maximo"]
+
+
+def test_get_grade_distribution_bin_width_limits(client: TestClient, db_session):
+    for user_id, calificacion in [(1, 0.0), (2, 1000.0)]:
+        create_statistics(
+            db_session,
+            user_id=user_id,
+            assessment_id="examen1",
+            titulo="Examen 1",
+            tipo="Examen",
+            entregado=True,
+            calificacion=calificacion,
+            course_id="curso1",
+        )
+
+    # Mas fino que el histograma de los rollups
+    response = client.get("/statistics/course/curso1/distribution?bin_width=0.00001")
+    assert response.status_code == 422
+
+    # 10001 tramos superan DISTRIBUTION_MAX_BINS
+    response = client.get("/statistics/course/curso1/distribution?bin_width=0.1")
+    assert response.status_code == 400
+
+    response = client.get("/statistics/course/curso1/distribution?bin_width=10")
+    assert response.status_code == 200
+    assert len(response.json()["histograma"]) == 101
+
+
+def test_get_courses_summary(client: TestClient, sample_statistics):
+    response = client.post(
+        "/statistics/courses/summary",
+        json={"course_ids": ["curso2", "curso1", "curso_inexistente", "curso1"]},
+    )
+    assert response.status_code == 200
+    courses = response.json()["cursos"]
+    assert [course["course_id"] for course in courses] == [
+        "curso2",
+        "curso1",
+        "curso_inexistente",
+    ]
+    assert courses[1] == {
+        "course_id": "curso1",
+        "promedio_calificaciones": 8.0,
+        "tasa_finalizacion": 80.0,
+        "total_asignaciones": 5,
+        "asignaciones_completadas": 4,
+    }
+    assert courses[2]["total_asignaciones"] == 0
+    assert "logs" not in courses[0]
+
+
+def test_get_courses_summary_with_date_range(client: TestClient, sample_statistics):
+    response = client.post(
+        "/statistics/courses/summary",
+        json={"course_ids": ["curso1", "curso2"], "start_date": "2023-10-06"},
+    )
+    assert response.status_code == 200
+    curso1, curso2 = response.json()["cursos"]
+    assert curso1["total_asignaciones"] == 3
+    assert curso1["asignaciones_completadas"] == 2
+    assert curso1["promedio_calificaciones"] == 7.25
+    assert curso2["total_asignaciones"] == 1
+
+
+def test_get_courses_summary_empty_list(client: TestClient):
+    response = client.post("/statistics/courses/summary", json={"course_ids": []})
+    assert response.status_code == 422
+
+
+def test_get_assessment_breakdown(client: TestClient, sample_statistics):
+    response = client.get("/statistics/course/curso1/assessments")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["next_cursor"] is None
+    assert [item["assessment_id"] for item in data["evaluaciones"]] == [
+        "examen1",
+        "tarea1",
+        "tarea2",
+        "tarea3",
+    ]
+    tarea1 = data["evaluaciones"][1]
+    assert tarea1["titulo"] == "Tarea 1"
+    assert tarea1["total_asignaciones"] == 2
+    assert tarea1["asignaciones_calificadas"] == 2
+    assert tarea1["promedio_calificaciones"] == 7.75
+    assert data["evaluaciones"][3]["tasa_finalizacion"] == 0
+
+
+def test_get_assessment_breakdown_pagination(client: TestClient, sample_statistics):
+    first = client.get("/statistics/course/curso1/assessments?limit=3").json()
+    assert len(first["evaluaciones"]) == 3
+    assert first["next_cursor"] is not None
+
+    second = client.get(
+        f"/statistics/course/curso1/assessments?limit=3&cursor={first['next_cursor']}"
+    ).json()
+    assert [item["assessment_id"] for item in second["evaluaciones"]] == ["tarea3"]
+    assert second["next_cursor"] is None
+
+    response = client.get("/statistics/course/curso1/assessments?cursor=invalido")
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "values", [("tarea1", "Foo"), ("tarea1", 1), (1, "Tarea"), ("tarea1",)]
+)
+def test_get_assessment_breakdown_tampered_cursor(
+    client: TestClient, sample_statistics, values
+):
+    cursor = encode_key_cursor(*values)
+    response = client.get(
+        f"/statistics/course/curso1/assessments?limit=1&cursor={cursor}"
+    )
+    assert response.status_code == 400
+
+
+def test_get_assessment_breakdown_pagination_same_assessment_id(
+    client: TestClient, db_session
+):
+    # Un mismo assessment_id con un examen y una tarea: el cursor queda en medio
+    for assessment_id, tipo in [("a1", "Examen"), ("a1", "Tarea"), ("a2", "Tarea")]:
+        create_statistics(
+            db_session,
+            user_id=1,
+            assessment_id=assessment_id,
+            titulo=f"{tipo} {assessment_id}",
+            tipo=tipo,
+            entregado=True,
+            course_id="curso1",
+        )
+
+    pages, cursor = [], None
+    while True:
+        url = "/statistics/course/curso1/assessments?limit=1"
+        response = client.get(f"{url}&cursor={cursor}" if cursor else url)
+        assert response.status_code == 200
+        data = response.json()
+        pages.extend(
+            (item["assessment_id"], item["tipo"]) for item in data["evaluaciones"]
+        )
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == [("a1", "Examen"), ("a1", "Tarea"), ("a2", "Tarea")]
+
+
+@pytest.fixture(scope="function")
+def ranking_statistics(db_session):
+    # Usuario 1: promedio 6, 1/2 entregadas; usuario 2: promedio 9, 1/1;
+    # usuario 3: sin notas, 1/2; usuario 4: promedio 9, 1/2
+    for user_id, assessment_id, entregado, calificacion in [
+        (1, "tarea1", True, 6.0),
+        (1, "tarea2", False, None),
+        (2, "tarea1", True, 9.0),
+        (3, "tarea1", True, None),
+        (3, "tarea2", False, None),
+        (4, "tarea1", True, 9.0),
+        (4, "tarea2", False, None),
+    ]:
+        create_statistics(
+            db_session,
+            user_id=user_id,
+            assessment_id=assessment_id,
+            titulo=assessment_id,
+            tipo="Tarea",
+            entregado=entregado,
+            calificacion=calificacion,
+            course_id="curso1",
+            date=datetime(2023, 10, 1),
+        )
+
+
+def test_get_course_ranking_by_average(client: TestClient, ranking_statistics):
+    response = client.get("/statistics/course/curso1/ranking")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_usuarios"] == 4
+    assert [(entry["posicion"], entry["user_id"]) for entry in data["ranking"]] == [
+        (1, 2),
+        (2, 4),
+        (3, 1),
+        (4, 3),
+    ]
+    assert data["ranking"][0]["promedio_calificaciones"] == 9.0
+    assert data["ranking"][0]["tasa_finalizacion"] == 100.0
+
+
+def test_get_course_ranking_by_completion_with_dates(
+    client: TestClient, ranking_statistics
+):
+    response = client.get(
+        "/statistics/course/curso1/ranking?order_by=finalizacion&start_date=2023-01-01"
+    )
+    assert response.status_code == 200
+    ranking = response.json()["ranking"]
+    # Empate en finalizacion: desempata el promedio, sin notas al final
+    assert [(entry["posicion"], entry["user_id"]) for entry in ranking] == [
+        (1, 2),
+        (2, 4),
+        (3, 1),
+        (4, 3),
+    ]
+    assert ranking[2]["tasa_finalizacion"] == 50.0
+
+
+def test_get_course_ranking_pagination(client: TestClient, ranking_statistics):
+    first = client.get("/statistics/course/curso1/ranking?limit=3").json()
+    assert [entry["user_id"] for entry in first["ranking"]] == [2, 4, 1]
+
+    second = client.get(
+        f"/statistics/course/curso1/ranking?limit=3&cursor={first['next_cursor']}"
+    ).json()
+    assert [entry["user_id"] for entry in second["ranking"]] == [3]
+    assert second["next_cursor"] is None
+
+
+@pytest.mark.parametrize("values", [("x", "y"), (1, "2"), (1, True), (1,)])
+def test_get_course_ranking_tampered_cursor(
+    client: TestClient, ranking_statistics, values
+):
+    cursor = encode_key_cursor(*values)
+    response = client.get(f"/statistics/course/curso1/ranking?limit=1&cursor={cursor}")
+    assert response.status_code == 400
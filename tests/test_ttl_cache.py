@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+
+from app.utils.ttl_cache import AsyncTTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = AsyncTTLCache(ttl=10, max_size=10, clock=clock)
+
+    cache.set("a", 1)
+    clock.now = 9.9
+    assert cache.get("a") == 1
+
+    clock.now = 10.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AsyncTTLCache(ttl=60, max_size=2)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_are_merged():
+    cache = AsyncTTLCache(ttl=60, max_size=10)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "valor"
+
+    results = await asyncio.gather(
+        *(cache.get_or_load("clave", loader) for _ in range(5))
+    )
+
+    assert results == ["valor"] * 5
+    assert calls == 1
+    assert await cache.get_or_load("clave", loader) == "valor"
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_loads_are_not_cached():
+    cache = AsyncTTLCache(ttl=60, max_size=10)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        raise ValueError("fallo")
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await cache.get_or_load("clave", loader)
+
+    assert calls == 2
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_entry():
+    cache = AsyncTTLCache(ttl=60, max_size=10)
+    cache.set("clave", 1)
+
+    cache.invalidate("clave")
+
+    async def loader():
+        return 2
+
+    assert await cache.get_or_load("clave", loader) == 2
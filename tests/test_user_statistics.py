@@ -7,8 +7,11 @@ from sqlalchemy.pool import StaticPool
 
 from app.main import app
 from app.db.base import Base
-from app.db.dependencies import get_db
+from app.db.dependencies import get_db, get_reader_db, get_statistics_reader_db
+from app.services.statistics_cache import clear_statistics_cache
 from app.models.statistics_model import Statistics
+from app.repositories.dictionary_repository import assessment_key_subquery
+from app.repositories.statistics_repository import create_statistics
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 engine = create_engine(
@@ -39,6 +42,8 @@ def client(db_session):
             db_session.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_reader_db] = override_get_db
+    app.dependency_overrides[get_statistics_reader_db] = override_get_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -53,6 +58,13 @@ def mock_validate_user():
         yield mock
 
 
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    clear_statistics_cache()
+    yield
+    clear_statistics_cache()
+
+
 @pytest.fixture(scope="function")
 def mock_get_course_users():
     with patch(
@@ -63,7 +75,8 @@ def mock_get_course_users():
 
 
 def test_save_user_statistics_success(client, mock_validate_user, db_session):
-    tarea = Statistics(
+    create_statistics(
+        db_session,
         user_id=1,
         course_id="curso-123",
         titulo="Tarea 1",
@@ -72,8 +85,6 @@ def test_save_user_statistics_success(client, mock_validate_user, db_session):
         calificacion=None,
         assessment_id="tarea-456",
     )
-    db_session.add(tarea)
-    db_session.commit()
 
     event_data = {
         "id_user": 1,
@@ -129,7 +140,8 @@ def test_save_user_statistics_unauthorized(client, mock_validate_user):
 
 
 def test_save_user_statistics_with_grade(client, mock_validate_user, db_session):
-    tarea = Statistics(
+    create_statistics(
+        db_session,
         user_id=1,
         course_id="curso-123",
         titulo="Examen 1",
@@ -138,8 +150,6 @@ def test_save_user_statistics_with_grade(client, mock_validate_user, db_session)
         calificacion=None,
         assessment_id="tarea-456",
     )
-    db_session.add(tarea)
-    db_session.commit()
 
     event_data = {
         "id_user": 1,
@@ -245,6 +255,44 @@ def test_save_course_statistics_success(
         assert stat.calificacion is None
 
 
+def test_save_course_statistics_refreshes_roster_for_new_assessments(
+    client, mock_validate_user, mock_get_course_users, db_session
+):
+    event = {
+        "assessment_id": "tarea-456",
+        "course_id": "curso-123",
+        "notification_type": "Tarea",
+        "event": "Nuevo",
+        "data": {"titulo": "Tarea 1"},
+    }
+
+    with patch(
+        "app.services.statistics_service.invalidate_course_users"
+    ) as mock_invalidate:
+        client.post(
+            "/course-statistics",
+            json=event,
+            headers={"Authorization": "Bearer test_token"},
+        )
+        mock_invalidate.assert_called_once_with("curso-123")
+
+        # Una actualizacion reusa el listado cacheado
+        mock_invalidate.reset_mock()
+        client.post(
+            "/course-statistics",
+            json={**event, "event": "Actualizado"},
+            headers={"Authorization": "Bearer test_token"},
+        )
+        mock_invalidate.assert_not_called()
+
+        client.post(
+            "/course-statistics/batch",
+            json=[event, {**event, "assessment_id": "tarea-789"}],
+            headers={"Authorization": "Bearer test_token"},
+        )
+        mock_invalidate.assert_called_once_with("curso-123")
+
+
 def test_save_course_statistics_unauthorized(
     client, mock_validate_user, mock_get_course_users
 ):
@@ -395,3 +443,290 @@ def test_save_course_statistics_update_succes(
         .all()
     )
     assert len(stats_tarea1) == 0
+
+
+def test_save_course_statistics_update_keeps_progress_and_adds_new_users(
+    client, mock_validate_user, mock_get_course_users, db_session
+):
+    create_statistics(
+        db_session,
+        user_id=1,
+        course_id="curso-123",
+        titulo="Tarea 1",
+        tipo="Tarea",
+        entregado=True,
+        calificacion=9.0,
+        assessment_id="tarea-456",
+    )
+
+    event_data = {
+        "assessment_id": "tarea-456",
+        "notification_type": "Tarea",
+        "event": "Actualizado",
+        "course_id": "curso-123",
+        "data": {
+            "titulo": "Tarea 1 (corregida)",
+        },
+    }
+
+    response = client.post(
+        "/course-statistics",
+        json=event_data,
+        headers={"Authorization": "Bearer test_token"},
+    )
+
+    assert response.status_code == 200
+
+    stats = (
+        db_session.query(Statistics)
+        .filter(Statistics.assessment_key == assessment_key_subquery("tarea-456"))
+        .order_by(Statistics.user_id)
+        .all()
+    )
+
+    assert [stat.user_id for stat in stats] == [1, 2, 3]
+    assert all(stat.titulo == "Tarea 1 (corregida)" for stat in stats)
+    assert stats[0].entregado is True
+    assert stats[0].calificacion == 9.0
+    assert stats[1].entregado is False
+    assert stats[2].calificacion is None
+
+
+# Tests para los endpoints de lotes
+def test_save_user_statistics_batch_partial_success(
+    client, mock_validate_user, db_session
+):
+    create_statistics(
+        db_session,
+        user_id=1,
+        course_id="curso-123",
+        titulo="Tarea 1",
+        tipo="Tarea",
+        entregado=False,
+        calificacion=None,
+        assessment_id="tarea-456",
+    )
+
+    events = [
+        {
+            "id_user": 1,
+            "assessment_id": "tarea-456",
+            "notification_type": "Tarea",
+            "event": "Entregado",
+            "data": {"entregado": True},
+        },
+        {
+            "id_user": 99,
+            "assessment_id": "tarea-456",
+            "notification_type": "Tarea",
+            "event": "Entregado",
+            "data": {"entregado": True},
+        },
+        {
+            "id_user": 1,
+            "assessment_id": "tarea-456",
+            "notification_type": "Tarea",
+            "event": "Calificado",
+            "data": {"entregado": True, "nota": 7.0},
+        },
+    ]
+
+    response = client.post(
+        "/user-statistics/batch",
+        json=events,
+        headers={"Authorization": "Bearer test_token"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is False
+    assert data["procesados"] == 3
+    assert data["fallidos"] == 1
+    assert [result["success"] for result in data["resultados"]] == [
+        True,
+        False,
+        True,
+    ]
+    assert mock_validate_user.await_count == 1
+
+    stat = (
+        db_session.query(Statistics)
+        .filter(
+            Statistics.user_id == 1,
+            Statistics.assessment_key == assessment_key_subquery("tarea-456"),
+        )
+        .one()
+    )
+    assert stat.entregado is True
+    assert stat.calificacion == 7.0
+
+
+def test_save_user_statistics_batch_unauthorized(client, mock_validate_user):
+    mock_validate_user.side_effect = Exception("Invalid token")
+
+    response = client.post(
+        "/user-statistics/batch",
+        json=[
+            {
+                "id_user": 1,
+                "assessment_id": "tarea-456",
+                "notification_type": "Tarea",
+                "event": "Entregado",
+                "data": {"entregado": True},
+            }
+        ],
+        headers={"Authorization": "Bearer invalid_token"},
+    )
+
+    assert response.status_code == 401
+
+
+def test_save_user_statistics_batch_empty(client, mock_validate_user):
+    response = client.post(
+        "/user-statistics/batch",
+        json=[],
+        headers={"Authorization": "Bearer test_token"},
+    )
+
+    assert response.status_code == 422
+
+
+def test_save_course_statistics_batch_success(
+    client, mock_validate_user, mock_get_course_users, db_session
+):
+    events = [
+        {
+            "assessment_id": "tarea-456",
+            "course_id": "curso-123",
+            "notification_type": "Tarea",
+            "event": "Nuevo",
+            "data": {"titulo": "Tarea 1"},
+        },
+        {
+            "assessment_id": "examen-789",
+            "course_id": "curso-123",
+            "notification_type": "Examen",
+            "event": "Nuevo",
+            "data": {"titulo": "Examen 1"},
+        },
+    ]
+
+    response = client.post(
+        "/course-statistics/batch",
+        json=events,
+        headers={"Authorization": "Bearer test_token"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True
+    assert data["fallidos"] == 0
+
+    # El listado del curso se obtiene una sola vez para todo el lote
+    mock_get_course_users.assert_awaited_once_with("curso-123")
+    assert db_session.query(Statistics).count() == 6
+
+
+def test_save_course_statistics_repeated_event_keeps_one_row(
+    client, mock_validate_user, mock_get_course_users, db_session
+):
+    event = {
+        "assessment_id": "tarea-456",
+        "course_id": "curso-123",
+        "notification_type": "Tarea",
+        "event": "Nuevo",
+        "data": {"titulo": "Tarea 1"},
+    }
+
+    # El mismo evento repetido en un lote y reenviado despues
+    response = client.post(
+        "/course-statistics/batch",
+        json=[event, event],
+        headers={"Authorization": "Bearer test_token"},
+    )
+    assert response.status_code == 200
+    assert response.json()["fallidos"] == 0
+    response = client.post(
+        "/course-statistics",
+        json=event,
+        headers={"Authorization": "Bearer test_token"},
+    )
+    assert response.status_code == 200
+
+    rows = db_session.query(Statistics.user_id).order_by(Statistics.user_id).all()
+    assert [user_id for (user_id,) in rows] == [1, 2, 3]
+    response = client.get("/statistics/global")
+    assert response.json()["total_asignaciones"] == 3
+
+
+def test_save_course_statistics_batch_course_service_error(
+    client, mock_validate_user, mock_get_course_users, db_session
+):
+    mock_get_course_users.side_effect = Exception("Error al obtener usuarios")
+
+    response = client.post(
+        "/course-statistics/batch",
+        json=[
+            {
+                "assessment_id": "tarea-456",
+                "course_id": "curso-123",
+                "notification_type": "Tarea",
+                "event": "Nuevo",
+                "data": {"titulo": "Tarea 1"},
+            }
+        ],
+        headers={"Authorization": "Bearer test_token"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["fallidos"] == 1
+    assert data["resultados"][0]["detail"] == "Error interno al procesar el evento"
+    assert db_session.query(Statistics).count() == 0
+
+
+def test_save_user_statistics_invalidates_cached_responses(
+    client, mock_validate_user, db_session
+):
+    for user_id in (1, 2):
+        create_statistics(
+            db_session,
+            user_id=user_id,
+            assessment_id="tarea-456",
+            titulo="Tarea 1",
+            tipo="Tarea",
+            entregado=False,
+            course_id="curso-123",
+        )
+
+    course_url = "/statistics/course/curso-123?include_logs=false"
+    user_url = "/statistics/user/curso-123/1?include_logs=false"
+    other_user_url = "/statistics/user/curso-123/2?include_logs=false"
+    course_etag = client.get(course_url).headers["etag"]
+    user_etag = client.get(user_url).headers["etag"]
+    other_user_etag = client.get(other_user_url).headers["etag"]
+
+    response = client.post(
+        "/user-statistics",
+        json={
+            "id_user": 1,
+            "assessment_id": "tarea-456",
+            "notification_type": "Tarea",
+            "event": "Entregado",
+            "data": {"titulo": "Tarea 1", "entregado": True, "nota": None},
+        },
+        headers={"Authorization": "Bearer test_token"},
+    )
+    assert response.status_code == 200
+
+    response = client.get(course_url, headers={"If-None-Match": course_etag})
+    assert response.status_code == 200
+    assert response.json()["asignaciones_completadas"] == 1
+
+    response = client.get(user_url, headers={"If-None-Match": user_etag})
+    assert response.status_code == 200
+    assert response.json()["tasa_finalizacion"] == 100
+
+    # Las estadisticas de otro usuario del curso siguen vigentes
+    response = client.get(other_user_url, headers={"If-None-Match": other_user_etag})
+    assert response.status_code == 304